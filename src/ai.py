@@ -1,16 +1,102 @@
-from src.utils.constants import GRID_SIZE
 import random
 import os
-import pickle
+import hashlib
+from collections import OrderedDict
+from src.opening_book import default_book
+from src.qtable import QTable
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
 
 # Define direction constants
 DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # right, down, left, up
 
+# Per-game targeting state, everything else is shared learning
+TARGETING_STATE = ('last_hit', 'direction', 'target_queue', 'original_hit', 'previous_hit',
+                   'tried_opposite', 'try_opposite', 'current_ship_hits', 'last_state', 'last_action',
+                   'unresolved', 'sunk_ships', 'remaining', 'sunk_reports')
+
+# Model location
+MODEL_PATH = os.path.join('models', 'battleship_rl_model.pkl')
+LINEAR_MODEL_PATH = os.path.join('models', 'battleship_linear.npz')
+
+# Views larger than this are keyed by their shot key instead of being hashed whole;
+# Q-learning states never repeat on such boards anyway
+STATE_KEY_MAX_CELLS = 400
+
+# Hunting on larger boards scores a random sample of the free cells instead of all of them
+HEATMAP_SAMPLE = 512
+
+def state_key(view):
+    """Stable 64-bit key for a board view (the built-in hash changes between runs)"""
+    data = ''.join(''.join(row) for row in view).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+def board_state_key(board):
+    """Q-learning state of a board: its view key, or its shot key on very large boards"""
+    if board.rules.num_cells > STATE_KEY_MAX_CELLS:
+        return hash(board.shot_key()) & 0xFFFFFFFFFFFFFFFF
+    return state_key(board.view)
+
+def shot_reward(hit, ship_hits):
+    """Reward for a shot, ship_hits being the hits already scored on the targeted ship"""
+    return 2.0 if hit and ship_hits > 1 else (1.0 if hit else -0.1)
+
+class TranspositionCache:
+    """Bounded LRU cache of scored hunt moves keyed by the board view"""
+    
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """Return the cached moves for a view, or None"""
+        moves = self._entries.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return moves
+    
+    def put(self, key, moves):
+        """Store the moves for a view, evicting the least recently used entry when full"""
+        self._entries[key] = moves
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop every entry (the counters are kept)"""
+        self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def stats(self):
+        """Return size and hit-rate counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
 class ReinforcementLearningAI:
     """AI using reinforcement learning to play Battleship"""
     
-    def __init__(self, player_board, learning_rate=0.1, discount_factor=0.9, exploration_rate=0.2):
+    # Hunt heatmaps shared by every AI instance, so they survive across games
+    transpositions = TranspositionCache()
+    
+    def __init__(self, player_board, learning_rate=0.1, discount_factor=0.9, exploration_rate=0.2,
+                 q_table=None, learn=True, rng=None, policy=None, targeter=None):
         self.player_board = player_board
+        # Own random stream, so games replay from a seed (see src.seeding)
+        self.rng = rng if rng is not None else random.Random()
         self.last_hit = None
         self.direction = None
         self.target_queue = []
@@ -18,47 +104,51 @@ class ReinforcementLearningAI:
         self.tried_opposite = False
         self.try_opposite = False
         self.current_ship_hits = 0
+        self._reset_fleet()
         
         # RL parameters
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.exploration_rate = exploration_rate
-        self.q_table = {}
+        self.learn = learn
+        self.q_table = QTable()
         self.last_state = None
         self.last_action = None
+        # Optional LinearPolicy (src.linear_policy) hunting instead of the Q-table
+        self.policy = policy
+        # Optional MonteCarloTargeter (src.targeting) aiming at ships once they are hit
+        self.targeter = targeter
         
-        # Cache for valid moves
-        self._valid_moves_cache = None
-        self._last_board_state = None
-        
-        # Load pre-trained model if available
-        self.load_model()
+        # Use a shared (possibly read-only) table, or load the pre-trained model if available
+        if q_table is not None:
+            self.q_table = QTable.from_dict(q_table) if isinstance(q_table, dict) else q_table
+        else:
+            self.load_model()
     
     def _get_current_state(self):
         """Get compact state representation for Q-learning"""
-        # Simplified pattern recognition focused on rows and columns
-        patterns = []
-        for r in range(GRID_SIZE):
-            patterns.append(''.join(self.player_board.view[r]))
-        for c in range(GRID_SIZE):
-            patterns.append(''.join(self.player_board.view[r][c] for r in range(GRID_SIZE)))
-        return hash(tuple(patterns))
+        return board_state_key(self.player_board)
     
     def _get_valid_moves(self):
-        """Get all valid moves with caching for performance"""
-        current_state = ''.join(''.join(row) for row in self.player_board.view)
-        if self._last_board_state == current_state and self._valid_moves_cache:
-            return self._valid_moves_cache
-        
-        valid_moves = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE) 
-                      if self.player_board.view[r][c] == '.']
-        
-        self._valid_moves_cache = valid_moves
-        self._last_board_state = current_state
-        return valid_moves
+        """Get all valid moves, read from the free cells the board maintains"""
+        return list(self.player_board.iter_free_cells())
     
     def get_attack_coordinates(self):
         """Get coordinates for the next attack based on AI strategy"""
+        # Sampled fleets replace the direction heuristics once there are hits to follow
+        board = self.player_board
+        if self.targeter is not None and self.targeter.supports(board.rules):
+            hits = self.unresolved if self.sunk_reports else board.hits
+            if hits:
+                sizes = [size for size, count in self.remaining.items() for _ in range(count)]
+                move = self.targeter.choose(board, self.rng, hits, self.sunk_ships, sizes)
+                if move is not None:
+                    return move
+        
+        # Hits not explained by the ships reported sunk are followed up again
+        if self.last_hit is None and not self.target_queue and self.sunk_reports and self.unresolved:
+            self._resume_target()
+        
         # Continue targeting if we have a hit
         if self.last_hit is not None:
             return self._target_ship()
@@ -67,14 +157,25 @@ class ReinforcementLearningAI:
         if self.target_queue:
             return self._process_hit_queue()
         
+        # Opening book for early views with no hits yet
+        opening_moves = self._opening_moves()
+        if opening_moves:
+            return self.rng.choice(opening_moves[:3])
+        
+        # Linear policy, on the boards it can score
+        if self.policy is not None and self.policy.supports(self.player_board.rules):
+            if self.rng.random() >= self.exploration_rate:
+                return self.policy.choose(self.player_board, self.rng)
+            return self._smart_random_attack()
+        
         # Q-learning strategy when no active targeting
         state = self._get_current_state()
-        if random.random() > self.exploration_rate and state in self.q_table:
-            valid_moves = self._get_valid_moves()
+        values = self.q_table.get(state) if self.rng.random() > self.exploration_rate else None
+        if values:
             best_value = -float('inf')
             best_moves = []
             
-            for move, value in self.q_table[state].items():
+            for move, value in values.items():
                 # Handle string tuples from serialized Q-table
                 if isinstance(move, str) and move.startswith('('):
                     try:
@@ -83,7 +184,7 @@ class ReinforcementLearningAI:
                     except:
                         continue
                 
-                if move in valid_moves and value >= best_value:
+                if self._is_valid_cell(*move) and value >= best_value:
                     if value > best_value:
                         best_value = value
                         best_moves = [move]
@@ -91,11 +192,22 @@ class ReinforcementLearningAI:
                         best_moves.append(move)
             
             if best_moves:
-                return random.choice(best_moves)
+                return self.rng.choice(best_moves)
         
         # Fallback to smart random attack
         return self._smart_random_attack()
 
+    def _opening_moves(self):
+        """Look up precomputed ranked moves while only a few misses have been fired"""
+        board = self.player_board
+        book = default_book()
+        if board.hits or not book.matches(board.rules):
+            return None
+        moves = book.lookup(board.misses)
+        if moves:
+            moves = [move for move in moves if board.view[move[0]][move[1]] == '.']
+        return moves
+
     def _target_ship(self):
         """Target a ship after the first hit with smart direction detection"""
         if self.last_hit is None:
@@ -103,8 +215,9 @@ class ReinforcementLearningAI:
         
         row, col = self.last_hit
         
-        # Reset if we've hit max ship size
-        if self.current_ship_hits >= 10:
+        # Reset if we've hit more than two ships' worth of cells
+        max_ship_size = max(self.remaining, default=self.player_board.rules.max_ship_size)
+        if self.current_ship_hits >= 2 * max_ship_size:
             self._reset_targeting()
             return self._smart_random_attack()
         
@@ -129,7 +242,7 @@ class ReinforcementLearningAI:
             dr, dc = self.direction
             next_row, next_col = row + dr, col + dc
             
-            if self._is_valid_cell(next_row, next_col) and self.current_ship_hits < 5:
+            if self._is_valid_cell(next_row, next_col) and self.current_ship_hits < max_ship_size:
                 return (next_row, next_col)
         
         # Check adjacent cells for first hit
@@ -148,6 +261,14 @@ class ReinforcementLearningAI:
         self._reset_targeting()
         return self._smart_random_attack()
     
+    def _resume_target(self):
+        """Restart targeting from an unresolved hit that still has untargeted neighbours"""
+        for row, col in self.unresolved:
+            if any(self._is_valid_cell(row + dr, col + dc) for dr, dc in DIRECTIONS):
+                self.last_hit = self.original_hit = (row, col)
+                self.current_ship_hits = 1
+                return
+    
     def _add_adjacent_to_queue(self, row, col):
         """Add all valid adjacent cells to the targeting queue"""
         self.target_queue = []
@@ -162,7 +283,7 @@ class ReinforcementLearningAI:
 
     def _is_valid_cell(self, row, col):
         """Check if a cell is valid for targeting"""
-        return (0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE and 
+        return (self.player_board.rules.in_bounds(row, col) and 
                 self.player_board.view[row][col] == '.')
 
     def _is_isolated_cell(self, row, col):
@@ -172,64 +293,93 @@ class ReinforcementLearningAI:
         
         return all(self.player_board.view[row+dr][col+dc] in ['X', 'O'] 
                   for dr, dc in DIRECTIONS 
-                  if 0 <= row+dr < GRID_SIZE and 0 <= col+dc < GRID_SIZE)
+                  if self.player_board.rules.in_bounds(row+dr, col+dc))
 
     def _calculate_ship_potential(self, row, col):
         """Calculate potential for ship placement at this location"""
         # Count consecutive open cells horizontally and vertically
         h_count = 1
         v_count = 1
+        rules = self.player_board.rules
+        # Runs longer than two ships add nothing; capping them keeps large boards cheap
+        reach = 2 * rules.max_ship_size
         
         # Check horizontally
         for dc in [-1, 1]:
             c = col + dc
-            while 0 <= c < GRID_SIZE and self.player_board.view[row][c] == '.':
+            while 0 <= c < rules.width and abs(c - col) < reach and self.player_board.view[row][c] == '.':
                 h_count += 1
                 c += dc
         
         # Check vertically
         for dr in [-1, 1]:
             r = row + dr
-            while 0 <= r < GRID_SIZE and self.player_board.view[r][col] == '.':
+            while 0 <= r < rules.height and abs(r - row) < reach and self.player_board.view[r][col] == '.':
                 v_count += 1
                 r += dr
         
+        # Runs too short for every ship still afloat cannot hold one
         max_count = max(h_count, v_count)
-        return 0 if max_count < 2 else (max_count - 1) / 4.0
+        return 0 if max_count < max(2, min(self.remaining, default=2)) else (max_count - 1) / 4.0
 
     def _smart_random_attack(self):
         """Make intelligent random attacks prioritizing high-value cells"""
-        valid_moves = self._get_valid_moves()
-        if not valid_moves:
-            return (0, 0)
-        
-        # Create a simple heatmap for cell selection
-        heatmap = {}
-        for r, c in valid_moves:
-            score = 1.0
-            if self._is_isolated_cell(r, c):
-                score *= 0.1
-            if (r + c) % 2 == 0:  # Prefer checkerboard pattern
-                score *= 1.5
-            score *= (1.0 + self._calculate_ship_potential(r, c))
-            heatmap[(r, c)] = score
+        key = (self.player_board.rules, self.player_board.shot_key(), min(self.remaining, default=0))
+        top_moves = self.transpositions.get(key)
+        if top_moves is None:
+            # Large boards score a uniform sample of the free cells instead of all of them
+            sampled = self.player_board.free_cell_count() > HEATMAP_SAMPLE
+            if sampled:
+                valid_moves = self.player_board.sample_free_cells(HEATMAP_SAMPLE, self.rng)
+            else:
+                valid_moves = self._get_valid_moves()
+            if not valid_moves:
+                return (0, 0)
+            
+            # Create a simple heatmap for cell selection
+            heatmap = {}
+            for r, c in valid_moves:
+                score = 1.0
+                if self._is_isolated_cell(r, c):
+                    score *= 0.1
+                if (r + c) % 2 == 0:  # Prefer checkerboard pattern
+                    score *= 1.5
+                score *= (1.0 + self._calculate_ship_potential(r, c))
+                heatmap[(r, c)] = score
+            
+            # Keep the top scoring moves for this view. Ties are broken by cell so that a
+            # cached entry only depends on the view, never on the game that computed it,
+            # and sampled heatmaps (drawn from the AI's stream) are not shared at all
+            top_moves = sorted(heatmap.items(), key=lambda x: (-x[1], x[0]))[:3]
+            if not sampled:
+                self.transpositions.put(key, top_moves)
         
         # Select from top scoring moves
-        top_moves = sorted(heatmap.items(), key=lambda x: x[1], reverse=True)[:3]
-        return random.choice([move for move, _ in top_moves])
+        return self.rng.choice([move for move, _ in top_moves])
 
-    def register_result(self, row, col, hit):
-        """Process attack result and update targeting strategy"""
-        # Update Q-values
-        if self.last_state and self.last_action:
-            reward = 2.0 if hit and self.current_ship_hits > 1 else (1.0 if hit else -0.1)
-            self._update_q_value(self.last_state, self.last_action, reward)
+    def register_result(self, row, col, hit, sunk=None):
+        """Process attack result and update targeting strategy
         
-        self.last_state = self._get_current_state()
-        self.last_action = (row, col)
+        `sunk` is the size of the ship the shot sank, for games that report it (see
+        Board.receive_attack's report_sunk).
+        """
+        # Update Q-values (skipped when the table is shared read-only, or unused by a policy)
+        if self.learn and self.policy is None:
+            if self.last_state and self.last_action:
+                reward = shot_reward(hit, self.current_ship_hits)
+                self._update_q_value(self.last_state, self.last_action, reward)
+            
+            self.last_state = self._get_current_state()
+            self.last_action = (row, col)
         
         # Handle targeting logic
         if hit:
+            self.unresolved.append((row, col))
+            if sunk is not None:
+                self._register_sunk(row, col, sunk)
+                self._reset_targeting()
+                return
+            
             self.current_ship_hits = self.current_ship_hits + 1 if hasattr(self, 'current_ship_hits') else 1
             
             # First hit on this ship
@@ -258,8 +408,8 @@ class ReinforcementLearningAI:
                 self.last_hit = (row, col)
                 self.target_queue = []  # Clear queue now that we have a direction
             
-            # Reset after max ship size
-            if self.current_ship_hits >= 5:
+            # Reset after max ship size (only a guess when sinks are not reported)
+            if not self.sunk_reports and self.current_ship_hits >= max(self.remaining, default=0):
                 self._reset_targeting()
         else:
             # Handle miss based on current targeting state
@@ -271,6 +421,37 @@ class ReinforcementLearningAI:
                     # Try opposite direction next turn
                     self.try_opposite = True
     
+    def _register_sunk(self, row, col, size):
+        """Attribute to a ship reported sunk by the shot at (row, col) the hits it can lie on"""
+        self.sunk_reports = True
+        if size in self.remaining:
+            self.remaining[size] -= 1
+            if not self.remaining[size]:
+                del self.remaining[size]
+        unresolved = set(self.unresolved)
+        candidates = []
+        for dr, dc in DIRECTIONS[:2]:
+            for offset in range(size):
+                cells = [(row + (i - offset) * dr, col + (i - offset) * dc) for i in range(size)]
+                if cells not in candidates and all(cell in unresolved for cell in cells):
+                    candidates.append(cells)
+        if not candidates:
+            candidates = [[(row, col)]]
+        self.sunk_ships.append(candidates)
+        # Hits in every possible position of the ship certainly belong to it
+        certain = set(candidates[0]).intersection(*candidates[1:])
+        self.unresolved = [cell for cell in self.unresolved if cell not in certain]
+    
+    def _reset_fleet(self):
+        """Forget the hits and sinks of the previous game"""
+        self.unresolved = []
+        self.sunk_ships = []
+        # Ships still afloat, as {size: count}
+        self.remaining = {}
+        for ship in self.player_board.rules.ships:
+            self.remaining[ship['size']] = self.remaining.get(ship['size'], 0) + 1
+        self.sunk_reports = False
+    
     def _reset_targeting(self):
         """Reset all targeting variables after completing a ship"""
         self.last_hit = None
@@ -283,33 +464,93 @@ class ReinforcementLearningAI:
 
     def _update_q_value(self, state, action, reward):
         """Update the Q-value for a state-action pair"""
-        if state not in self.q_table:
-            self.q_table[state] = {}
-        if action not in self.q_table[state]:
-            self.q_table[state][action] = 0.0
-        
-        self.q_table[state][action] += self.learning_rate * (reward - self.q_table[state][action])
+        self.q_table.update(state, action, reward, self.learning_rate)
     
-    def load_model(self):
+    def load_model(self, path=MODEL_PATH):
         """Load the Q-table from disk if available"""
+        self.transpositions.clear()
         try:
-            if os.path.exists('models/battleship_rl_model.pkl'):
-                with open('models/battleship_rl_model.pkl', 'rb') as f:
-                    self.q_table = pickle.load(f)
+            if os.path.exists(path):
+                import pickle  # Only needed when a model is read or written
+                with open(path, 'rb') as f:
+                    table = pickle.load(f)
+                # Models saved before QTable existed are plain dicts
+                self.q_table = QTable.from_dict(table) if isinstance(table, dict) else table
         except Exception:
-            self.q_table = {}
+            self.q_table = QTable()
     
-    def save_model(self):
+    def save_model(self, path=MODEL_PATH):
         """Save the Q-table to disk"""
         try:
-            os.makedirs('models', exist_ok=True)
-            with open('models/battleship_rl_model.pkl', 'wb') as f:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            import pickle
+            with open(path, 'wb') as f:
                 pickle.dump(self.q_table, f)
         except Exception:
             pass
     
+    def train_against_self(self, num_games=200, save_interval=20, seed=None, model_path=None):
+        """Train on self-play games through the offline trainer, saving every save_interval games
+
+        An AI with a policy trains the policy (saved to LINEAR_MODEL_PATH by default) instead
+        of the Q-table.
+        """
+        from src.training import generate_records, iter_trajectories, OfflineTrainer, PolicyTrainer
+        from src.seeding import new_master_seed
+        
+        if self.policy is not None:
+            trainer = PolicyTrainer(self.policy)
+            model_path = model_path or LINEAR_MODEL_PATH
+        else:
+            trainer = OfflineTrainer(self)
+            model_path = model_path or MODEL_PATH
+        if seed is None:
+            seed = new_master_seed()
+        played = 0
+        while played < num_games:
+            batch = min(save_interval, num_games - played)
+            records = generate_records(batch, ai=self, seed=seed, first_game=played)
+            played += batch
+            if self.policy is not None:
+                stats = trainer.train(records)
+                self.policy.save(model_path)
+                log.info("Training: %d/%d games, loss %.4f", played, num_games, stats['loss'])
+            else:
+                trainer.train(iter_trajectories(records))
+                self.save_model(model_path)
+                log.info("Training: %d/%d games, %d states", played, num_games, len(self.q_table))
+        self.reset_game_state()
+        return trainer.stats()
+    
+    def get_targeting_state(self):
+        """Copy the per-game targeting state so one AI can play several games in turn"""
+        state = {name: getattr(self, name, None) for name in TARGETING_STATE}
+        state['target_queue'] = list(self.target_queue)
+        state['unresolved'] = list(self.unresolved)
+        state['sunk_ships'] = list(self.sunk_ships)
+        state['remaining'] = dict(self.remaining)
+        return state
+    
+    def set_targeting_state(self, state):
+        """Restore a state returned by get_targeting_state"""
+        for name in TARGETING_STATE:
+            setattr(self, name, state.get(name))
+        self.target_queue = list(state.get('target_queue') or [])
+        self.current_ship_hits = state.get('current_ship_hits') or 0
+        self.tried_opposite = bool(state.get('tried_opposite'))
+        self.try_opposite = bool(state.get('try_opposite'))
+        self._reset_fleet()
+        self.unresolved = list(state.get('unresolved') or [])
+        self.sunk_ships = list(state.get('sunk_ships') or [])
+        if state.get('remaining') is not None:
+            self.remaining = dict(state['remaining'])
+        self.sunk_reports = bool(state.get('sunk_reports'))
+    
     def reset_game_state(self):
         """Reset the AI's state for a new game while preserving learning"""
+        # Each game is one epoch of the Q-table's recency (shared read-only tables have none)
+        if hasattr(self.q_table, 'advance_epoch'):
+            self.q_table.advance_epoch()
         self.last_hit = None
         self.original_hit = None
         self.direction = None
@@ -318,4 +559,5 @@ class ReinforcementLearningAI:
         self.try_opposite = False
         self.target_queue = []
         self.last_state = None
-        self.last_action = None
\ No newline at end of file
+        self.last_action = None
+        self._reset_fleet()
\ No newline at end of file
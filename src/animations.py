@@ -2,6 +2,9 @@ import pygame
 import random
 import os
 from src.utils.constants import RED, WHITE
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
 
 class FireAnimation:
     """Class for animated fire effects when ships are hit"""
@@ -23,18 +26,18 @@ class FireAnimation:
                 img = pygame.transform.scale(img, (int(cell_size), int(cell_size)))
                 self.frames.append(img)
             except Exception as e:
-                print(f"Error loading fire frame {i}: {e}")
+                log.warning("Error loading fire frame %d: %s", i, e)
                 # Create a fallback colored rectangle if image loading fails
                 surf = pygame.Surface((cell_size, cell_size))
                 surf.fill(RED)
                 self.frames.append(surf)
     
-    def update(self):
-        """Update the animation frame"""
-        self.counter += 1
+    def update(self, steps=1):
+        """Advance the animation by `steps` frames of FPS"""
+        self.counter += steps
         if self.counter >= self.animation_speed:
-            self.counter = 0
-            self.frame = (self.frame + 1) % self.max_frames
+            self.frame = (self.frame + self.counter // self.animation_speed) % self.max_frames
+            self.counter %= self.animation_speed
     
     def draw(self, screen):
         """Draw the current frame of the animation"""
@@ -61,18 +64,18 @@ class WaterAnimation:
                 img = pygame.transform.scale(img, (int(cell_size), int(cell_size)))
                 self.frames.append(img)
             except Exception as e:
-                print(f"Error loading water frame {i}: {e}")
+                log.warning("Error loading water frame %d: %s", i, e)
                 # Create a fallback colored rectangle if image loading fails
                 surf = pygame.Surface((cell_size, cell_size))
                 surf.fill(RED)
                 self.frames.append(surf)
     
-    def update(self):
-        """Update the animation frame"""
-        self.counter += 1
+    def update(self, steps=1):
+        """Advance the animation by `steps` frames of FPS"""
+        self.counter += steps
         if self.counter >= self.animation_speed:
-            self.counter = 0
-            self.frame = (self.frame + 1) % self.max_frames
+            self.frame = (self.frame + self.counter // self.animation_speed) % self.max_frames
+            self.counter %= self.animation_speed
     
     def draw(self, screen):
         """Draw the current frame of the animation"""
@@ -135,6 +138,8 @@ class EffectsManager:
         self.animated_messages = []
         self.victory_particles = []
         self.fire_animations = []  # Add this line to store fire animations
+        # Particles have their own generator so visuals never shift the games' random streams
+        self.rng = random.Random()
     
     def create_hit_effect(self, x, y):
         """Create a hit effect at the specified position"""
@@ -157,9 +162,16 @@ class EffectsManager:
         self.water_animations = getattr(self, 'water_animations', [])  # Create list if it doesn't exist
         self.water_animations.append(WaterAnimation(x, y, cell_size))
         
-    # Update the update_effects method in animations.py to include this:
-    def update_effects(self, screen):
-        """Update and draw all visual effects"""
+    def has_live_effects(self):
+        """Whether one-shot effects or messages are playing (they count frames of FPS)"""
+        return bool(self.effects or self.animated_messages)
+
+    def has_looping_animations(self):
+        """Whether fire or water animations are on screen"""
+        return bool(self.fire_animations or getattr(self, 'water_animations', None))
+
+    def update_effects(self, screen, steps=1):
+        """Update and draw all visual effects, looping animations advancing by `steps` frames"""
         expired_effects = []
         
         # Update effects
@@ -180,13 +192,13 @@ class EffectsManager:
             
         # Update and draw fire animations
         for fire in self.fire_animations:
-            fire.update()
+            fire.update(steps)
             fire.draw(screen)
             
         # Update and draw water animations
         if hasattr(self, 'water_animations'):
             for water in self.water_animations[:]:
-                water.update()
+                water.update(steps)
                 water.draw(screen)
     
     def update_animated_messages(self, screen):
@@ -218,12 +230,12 @@ class EffectsManager:
         colors = [(0, 255, 0), (255, 223, 0), (255, 255, 255)]  # Vert, or, blanc
         for _ in range(100):  # Nombre de particules
             particle = {
-                'x': random.randint(0, screen_width),
+                'x': self.rng.randint(0, screen_width),
                 'y': screen_height + 10,
-                'speed': random.uniform(5, 15),
-                'color': random.choice(colors),
-                'size': random.randint(5, 15),
-                'angle': random.uniform(-0.5, 0.5)
+                'speed': self.rng.uniform(5, 15),
+                'color': self.rng.choice(colors),
+                'size': self.rng.randint(5, 15),
+                'angle': self.rng.uniform(-0.5, 0.5)
             }
             self.victory_particles.append(particle)
     
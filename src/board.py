@@ -1,16 +1,120 @@
-from src.utils.constants import GRID_SIZE, CELL_SIZE
+import random
+from array import array
+from src.utils.constants import CELL_SIZE
+from src.rules import DEFAULT_RULES
+
+_MASK64 = (1 << 64) - 1
+# Rules with at least this many cells get a SparseBoard from new_board()
+SPARSE_MIN_CELLS = 1 << 16
+
+def cell_hash(cell):
+    """64-bit mix of a cell index (splitmix64), used to key attack states incrementally"""
+    z = (cell + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+class FreeCells:
+    """Indices of the cells not attacked yet, kept in an indexed array
+
+    The first len(self) entries of the array are the free cells. Removing one swaps it with
+    the last free entry, so removal, membership and uniform choice are all O(1).
+    """
+    
+    def __init__(self, num_cells):
+        self._cells = array('i', range(num_cells))
+        self._index = array('i', range(num_cells))
+        self._count = num_cells
+    
+    def remove(self, cell):
+        index = self._index[cell]
+        if index >= self._count:
+            return
+        self._count -= 1
+        last = self._cells[self._count]
+        self._cells[index] = last
+        self._index[last] = index
+        self._cells[self._count] = cell
+        self._index[cell] = self._count
+    
+    def __contains__(self, cell):
+        return self._index[cell] < self._count
+    
+    def __len__(self):
+        return self._count
+    
+    def __iter__(self):
+        return iter(self._cells[:self._count])
+    
+    def sample(self, count, rng=random):
+        """`count` distinct free cells, drawn uniformly"""
+        return [self._cells[index] for index in rng.sample(range(self._count), count)]
+
+
+class SparseFreeCells(FreeCells):
+    """FreeCells whose arrays are the identity except for the entries moved by removals
+
+    Only the moved entries are stored, so memory grows with the shots, not the cells.
+    """
+    
+    def __init__(self, num_cells):
+        self._cells = {}
+        self._index = {}
+        self._count = num_cells
+    
+    def remove(self, cell):
+        index = self._index.get(cell, cell)
+        if index >= self._count:
+            return
+        self._count -= 1
+        last = self._cells.get(self._count, self._count)
+        self._cells[index] = last
+        self._index[last] = index
+        self._cells[self._count] = cell
+        self._index[cell] = self._count
+    
+    def __contains__(self, cell):
+        return self._index.get(cell, cell) < self._count
+    
+    def __iter__(self):
+        return (self._cells.get(index, index) for index in range(self._count))
+    
+    def sample(self, count, rng=random):
+        return [self._cells.get(index, index) for index in rng.sample(range(self._count), count)]
+
 
 class Board:
     """Represents a game board with ships and attacks"""
     
-    def __init__(self):
-        self.grid = [['.' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.view = [['.' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    def __init__(self, rules=None):
+        self.rules = rules or DEFAULT_RULES
         self.ships = []
         self.hits = []
         self.misses = []
-        self.width = CELL_SIZE * GRID_SIZE
-        self.height = CELL_SIZE * GRID_SIZE
+        # Ship index of every ship cell and cells still afloat, so sinking checks are O(1)
+        self._ship_at = {}
+        self._init_cells()
+        self._afloat = []
+        self._cells_afloat = 0
+        # XOR of cell_hash over hit / missed cells, updated with each shot
+        self._hit_key = 0
+        self._miss_key = 0
+        self.width = CELL_SIZE * self.rules.width
+        self.height = CELL_SIZE * self.rules.height
+    
+    def _init_cells(self):
+        """Create the ship grid and the attack view"""
+        self.grid = [['.' for _ in range(self.rules.width)] for _ in range(self.rules.height)]
+        self._clear_view()
+    
+    def _clear_view(self):
+        self.view = [['.' for _ in range(self.rules.width)] for _ in range(self.rules.height)]
+        self.free_cells = FreeCells(self.rules.num_cells)
+    
+    def _occupy(self, row, col, index):
+        """Mark a cell as part of ship number `index`"""
+        self.grid[row][col] = 'S'
+        self._ship_at[(row, col)] = index
     
     def place_ship(self, ship, row, col, is_horizontal):
         """Place a ship on the board"""
@@ -19,9 +123,9 @@ class Board:
             return False
         
         # Check if placement is valid
-        if is_horizontal and col + ship.size > GRID_SIZE:
+        if is_horizontal and (col + ship.size > self.rules.width or row >= self.rules.height):
             return False
-        if not is_horizontal and row + ship.size > GRID_SIZE:
+        if not is_horizontal and (row + ship.size > self.rules.height or col >= self.rules.width):
             return False
         
         # Check for overlap with other ships
@@ -39,29 +143,196 @@ class Board:
         
         # Update the grid
         for r, c in ship.coordinates:
-            self.grid[r][c] = 'S'
+            self._occupy(r, c, len(self.ships))
         
         # Add to ships list
         self.ships.append(ship)
+        self._afloat.append(ship.size)
+        self._cells_afloat += ship.size
         return True
     
-    def receive_attack(self, row, col):
-        """Receive an attack at the specified coordinates"""
+    
+    def receive_attack(self, row, col, report_sunk=False):
+        """Receive an attack at the specified coordinates
+        
+        Returns whether it hit, or with report_sunk a (hit, ship sunk by this shot or None) pair.
+        """
         if self.view[row][col] != '.':
-            return False  # Already attacked this cell
+            return (False, None) if report_sunk else False  # Already attacked this cell
         
         if self.grid[row][col] == 'S':
             self.view[row][col] = 'X'
             self.hits.append((row, col))
+            self._record_shot(row, col, True)
+            index = self._ship_at[(row, col)]
+            self._afloat[index] -= 1
+            self._cells_afloat -= 1
+            if report_sunk:
+                return True, self.ships[index] if self._afloat[index] == 0 else None
             return True  # Hit
         else:
             self.view[row][col] = 'O'
             self.misses.append((row, col))
-            return False  # Miss
+            self._record_shot(row, col, False)
+            return (False, None) if report_sunk else False  # Miss
+    
+    def mark_attack(self, row, col, hit):
+        """Record the known result of an attack on a board whose ships are hidden"""
+        if self.view[row][col] != '.':
+            return
+        if hit:
+            self.view[row][col] = 'X'
+            self.hits.append((row, col))
+            self._record_shot(row, col, True)
+        else:
+            self.view[row][col] = 'O'
+            self.misses.append((row, col))
+            self._record_shot(row, col, False)
+    
+    def _record_shot(self, row, col, hit):
+        """Update the shot key and the free cells after a new mark in the view"""
+        cell = self.rules.cell(row, col)
+        if hit:
+            self._hit_key ^= cell_hash(cell)
+        else:
+            self._miss_key ^= cell_hash(cell)
+        self.free_cells.remove(cell)
+    
+    def sunk_ship(self, row, col):
+        """Index in self.ships of the ship at (row, col) if it has been sunk, else -1"""
+        index = self._ship_at.get((row, col), -1)
+        return index if index >= 0 and self._afloat[index] == 0 else -1
+    
+    @property
+    def hit_mask(self):
+        """Bit r * width + c is set for every hit (built on demand)"""
+        return sum(1 << self.rules.cell(row, col) for row, col in self.hits)
+    
+    @property
+    def miss_mask(self):
+        """Bit r * width + c is set for every miss (built on demand)"""
+        return sum(1 << self.rules.cell(row, col) for row, col in self.misses)
+    
+    def restore_shots(self, hit_mask=0, miss_mask=0, hits=None, misses=None):
+        """Replace the attack state by the one described by two cell bitmasks
+
+        The hits and misses lists may be given to keep the order they were fired in.
+        """
+        # The whole view is rebuilt: a desynced view may hold marks missing from the lists
+        self._clear_view()
+        self.hits = []
+        self.misses = []
+        self._hit_key = 0
+        self._miss_key = 0
+        self._afloat = [ship.size for ship in self.ships]
+        self._cells_afloat = sum(self._afloat)
+        for cells, mask, hit in ((hits, hit_mask, True), (misses, miss_mask, False)):
+            if cells is None:
+                cells = []
+                while mask:
+                    low = mask & -mask
+                    cells.append(self.rules.coords(low.bit_length() - 1))
+                    mask ^= low
+            for row, col in cells:
+                if hit:
+                    self.view[row][col] = 'X'
+                    self.hits.append((row, col))
+                    self._record_shot(row, col, True)
+                    index = self._ship_at.get((row, col))
+                    if index is not None:
+                        self._afloat[index] -= 1
+                        self._cells_afloat -= 1
+                else:
+                    self.view[row][col] = 'O'
+                    self.misses.append((row, col))
+                    self._record_shot(row, col, False)
+    
+    def free_cell_count(self):
+        """Number of cells not attacked yet"""
+        return len(self.free_cells)
+    
+    def iter_free_cells(self):
+        """Cells not attacked yet, in no particular order"""
+        return (self.rules.coords(cell) for cell in self.free_cells)
+    
+    def sample_free_cells(self, count, rng=random):
+        """Up to `count` distinct cells not attacked yet, drawn uniformly"""
+        count = min(count, len(self.free_cells))
+        return [self.rules.coords(cell) for cell in self.free_cells.sample(count, rng)]
+    
+    def shot_key(self):
+        """Compact key identifying the attack state of the view"""
+        return (self._hit_key, self._miss_key, len(self.hits), len(self.misses))
     
     def all_ships_sunk(self):
         """Check if all ships have been sunk"""
-        for ship in self.ships:
-            if not ship.is_sunk(self.hits):
-                return False
-        return True
\ No newline at end of file
+        return self._cells_afloat == 0
+
+
+class _SparseRow:
+    """One row of the attack view, indexed like a list of characters"""
+    
+    __slots__ = ('cells', 'row', 'width')
+    
+    def __init__(self, cells, row, width):
+        self.cells = cells
+        self.row = row
+        self.width = width
+    
+    def __getitem__(self, col):
+        if not 0 <= col < self.width:
+            raise IndexError(col)
+        return self.cells.get((self.row, col), '.')
+    
+    def __setitem__(self, col, value):
+        if value == '.':
+            self.cells.pop((self.row, col), None)
+        else:
+            self.cells[(self.row, col)] = value
+    
+    def __len__(self):
+        return self.width
+    
+    def __iter__(self):
+        return (self[col] for col in range(self.width))
+
+
+class _ShipRow(_SparseRow):
+    """One row of the ship grid: cells holding a ship index read as 'S' (read-only)"""
+    
+    __slots__ = ()
+    
+    def __getitem__(self, col):
+        if not 0 <= col < self.width:
+            raise IndexError(col)
+        return 'S' if (self.row, col) in self.cells else '.'
+    
+    def __setitem__(self, col, value):
+        raise TypeError("the ship grid of a SparseBoard is read-only")
+
+
+class SparseBoard(Board):
+    """Board storing only ship cells and shots, for grids too large for dense lists
+
+    grid and view keep the `board.view[row][col]` interface, so the engine and the AI
+    use it unchanged. Memory grows with the fleet and the shots, not with the grid.
+    """
+    
+    def _init_cells(self):
+        # One small row object per row: memory grows with the height, not the cell count
+        self.grid = [_ShipRow(self._ship_at, row, self.rules.width) for row in range(self.rules.height)]
+        self._clear_view()
+    
+    def _clear_view(self):
+        self._marks = {}
+        self.view = [_SparseRow(self._marks, row, self.rules.width) for row in range(self.rules.height)]
+        self.free_cells = SparseFreeCells(self.rules.num_cells)
+    
+    def _occupy(self, row, col, index):
+        self._ship_at[(row, col)] = index
+
+
+def new_board(rules=None):
+    """Board for headless runs: sparse for very large grids, dense otherwise"""
+    rules = rules or DEFAULT_RULES
+    return SparseBoard(rules) if rules.num_cells >= SPARSE_MIN_CELLS else Board(rules)
\ No newline at end of file
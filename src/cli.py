@@ -0,0 +1,280 @@
+import argparse
+import os
+import sys
+import time
+
+# Headless entry point: `python -m src simulate|train|evaluate|bench`.
+# Only the pure-logic modules are used, never pygame, and each command imports what it
+# needs when it runs so that starting the interpreter stays cheap for batch jobs.
+
+PLAYER_CHOICES = ["rl", "linear", "density", "random"]
+POLICY_CHOICES = ["qtable", "linear"]
+TARGETER_HELP = "fleets sampled per move to aim at hit ships (0: direction heuristics)"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules batch jobs start from, and the `-X importtime` budget each must load within
+STARTUP_MODULES = ["src.cli", "src.board", "src.ai", "src.training", "src.tournament", "src.game_state"]
+IMPORT_BUDGET_MS = 60
+IMPORT_RUNS = 5
+# Never imported by those modules
+HEAVY_MODULES = ["pygame", "numpy", "tkinter"]
+
+
+def shot_summary(counts):
+    """Distribution of the shots needed per game"""
+    import statistics
+    counts = sorted(counts)
+    return {
+        'games': len(counts),
+        'mean': round(statistics.fmean(counts), 2) if counts else None,
+        'median': statistics.median(counts) if counts else None,
+        'p90': counts[int(0.9 * (len(counts) - 1))] if counts else None,
+        'min': counts[0] if counts else None,
+        'max': counts[-1] if counts else None
+    }
+
+
+def simulate(args):
+    """Play self-play games against random fleets, optionally keeping them as records"""
+    from src.ai import ReinforcementLearningAI
+    from src.board import new_board
+    from src.rules import Rules, DEFAULT_RULES
+    from src.training import generate_records
+
+    rules = Rules.scaled(args.size) if args.size else DEFAULT_RULES
+    ai = ReinforcementLearningAI(new_board(rules), exploration_rate=args.exploration, q_table={}, learn=False)
+    if args.policy == "linear":
+        from src.linear_policy import LinearPolicy
+        ai.policy = LinearPolicy.load(args.model)
+    else:
+        ai.load_model(args.model)
+    if args.targeter_samples:
+        from src.targeting import MonteCarloTargeter
+        ai.targeter = MonteCarloTargeter(max_samples=args.targeter_samples)
+    if args.out:
+        import json
+        os.makedirs(args.out, exist_ok=True)
+    counts = []
+    start = time.perf_counter()
+    games = generate_records(args.games, ai=ai, seed=args.seed, rules=rules, first_game=args.first_game)
+    for entries in games:
+        counts.append(entries[-1]['shots'])
+        if args.out:
+            with open(os.path.join(args.out, f"selfplay_{entries[0]['game']:06d}.jsonl"), 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    elapsed = time.perf_counter() - start
+    return dict(shot_summary(counts), seconds=round(elapsed, 3),
+                games_per_second=round(len(counts) / elapsed, 2) if elapsed else None)
+
+
+def train(args):
+    """Train the model by self-play, or offline on recorded games, and save it"""
+    from src.ai import ReinforcementLearningAI
+    from src.board import Board
+    from src.training import train_from_records, train_policy_from_records
+
+    start = time.perf_counter()
+    if args.records and args.policy == "linear":
+        stats = train_policy_from_records(args.records, model_path=args.model)
+    elif args.records:
+        stats = train_from_records(args.records, model_path=args.model, seed=args.seed)
+    else:
+        ai = ReinforcementLearningAI(Board(), exploration_rate=args.exploration, q_table={})
+        if args.policy == "linear":
+            from src.linear_policy import LinearPolicy
+            ai.policy = LinearPolicy.load(args.model)
+        else:
+            ai.load_model(args.model)
+        stats = ai.train_against_self(args.games, save_interval=args.save_interval, seed=args.seed,
+                                      model_path=args.model)
+    return dict(stats, seconds=round(time.perf_counter() - start, 3))
+
+
+def evaluate(args):
+    """Shots needed by each player on the same seeded fleets"""
+    from src.tournament import play_games
+
+    seeds = [args.seed + game for game in range(args.games)]
+    results = {}
+    for player in args.players:
+        spec = {"name": player, "type": player}
+        if player == "rl":
+            spec["model"] = args.model
+        elif player == "linear" and args.linear_model:
+            spec["model"] = args.linear_model
+        if player in ("rl", "linear") and args.targeter_samples:
+            spec["targeter"] = {"max_samples": args.targeter_samples}
+        start = time.perf_counter()
+        counts = play_games(spec, seeds)
+        results[player] = dict(shot_summary(counts), seconds=round(time.perf_counter() - start, 3))
+    return results
+
+
+def _timed(function, repeat):
+    """Best wall time of `repeat` calls, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def import_times(module):
+    """Cumulative import time in ms of every module loaded by importing `module` in a fresh interpreter"""
+    import subprocess
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, cwd=ROOT)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def startup_report(repeat, budget_ms):
+    """Import time of each startup module (median of at least IMPORT_RUNS runs) and the ones breaking the budget"""
+    import statistics
+    report = {'import_ms': {}, 'budget_ms': budget_ms, 'failures': []}
+    for module in STARTUP_MODULES:
+        runs = [import_times(module) for _ in range(max(repeat, IMPORT_RUNS))]
+        elapsed = statistics.median(times[module] for times in runs)
+        report['import_ms'][module] = round(elapsed, 1)
+        if elapsed > budget_ms:
+            report['failures'].append(f"{module} takes {elapsed:.1f} ms to import")
+        for heavy in HEAVY_MODULES:
+            if heavy in runs[0]:
+                report['failures'].append(f"{module} imports {heavy}")
+    return report
+
+
+def bench(args):
+    """Time the engine hot paths and the startup of the command line itself"""
+    import random
+    from src.ai import ReinforcementLearningAI
+    from src.board import Board
+    from src.rules import DEFAULT_RULES
+    from src.seeding import GameStreams
+    from src.training import random_fleet_board
+
+    def attack_all():
+        for seed in range(args.games):
+            board = random_fleet_board(random.Random(seed))
+            for cell in range(DEFAULT_RULES.num_cells):
+                board.receive_attack(*DEFAULT_RULES.coords(cell))
+
+    ai = ReinforcementLearningAI(Board(), exploration_rate=0.0, q_table={}, learn=False)
+    moves = [0]
+
+    def play_all():
+        ai.transpositions.clear()  # Repeated runs would otherwise replay cached hunt moves
+        moves[0] = 0
+        for game in range(args.games):
+            streams = GameStreams(args.seed, game)
+            board = random_fleet_board(streams.fleet)
+            ai.player_board = board
+            ai.rng = streams.ai
+            ai.reset_game_state()
+            while not board.all_ships_sunk():
+                row, col = ai.get_attack_coordinates()
+                if board.view[row][col] != '.':
+                    row, col = board.sample_free_cells(1, streams.engine)[0]
+                hit, sunk = board.receive_attack(row, col, report_sunk=True)
+                ai.register_result(row, col, hit, sunk.size if sunk else None)
+                moves[0] += 1
+
+    def start_cli():
+        import subprocess
+        subprocess.run([sys.executable, "-m", "src", "--help"], check=True, stdout=subprocess.DEVNULL, cwd=ROOT)
+
+    attack = _timed(attack_all, args.repeat)
+    games = _timed(play_all, args.repeat)
+    startup = _timed(start_cli, args.repeat)
+    cells = args.games * DEFAULT_RULES.num_cells
+    return {
+        'board_setup_and_attacks_per_second': round(cells / attack),
+        'ai_move_ms': round(1000 * games / moves[0], 3),
+        'ai_games_per_second': round(args.games / games, 2),
+        'cli_startup_ms': round(1000 * startup, 1),
+        'startup': startup_report(args.repeat, args.import_budget_ms)
+    }
+
+
+def _print_result(result, as_json, indent=""):
+    if as_json:
+        import json
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        if isinstance(value, dict):
+            print(f"{indent}{key}:")
+            _print_result(value, False, indent + "  ")
+        else:
+            print(f"{indent}{key:<36}{value}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src", description="Bataille navale sans interface graphique")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add(name, function, help):
+        command = commands.add_parser(name, help=help, description=help)
+        command.set_defaults(function=function)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--json", action="store_true", help="print the result as JSON")
+        command.add_argument("--log", default=None, help="log levels, e.g. warning,src.ai=debug (default: $BATAILLE_LOG)")
+        command.add_argument("--log-file", default=None, help="also log to this rotating file, JSON lines if it ends in .jsonl")
+        return command
+
+    command = add("simulate", simulate, "Parties de l'IA contre des flottes aléatoires")
+    command.add_argument("--games", type=int, default=100)
+    command.add_argument("--size", type=int, default=None, help="grid width, the fleet is scaled to keep its density")
+    command.add_argument("--exploration", type=float, default=0.0)
+    command.add_argument("--model", default=None, help="model file (default: the game's model for the policy)")
+    command.add_argument("--policy", choices=POLICY_CHOICES, default="qtable")
+    command.add_argument("--targeter-samples", type=int, default=0, help=TARGETER_HELP)
+    command.add_argument("--out", default=None, help="directory to write one record per game")
+    command.add_argument("--first-game", type=int, default=0,
+                         help="index of the first game, to split one seeded run across jobs")
+
+    command = add("train", train, "Entraînement de l'IA par parties contre elle-même ou sur des parties enregistrées")
+    command.add_argument("--games", type=int, default=200)
+    command.add_argument("--save-interval", type=int, default=20)
+    command.add_argument("--exploration", type=float, default=0.2)
+    command.add_argument("--model", default=None)
+    command.add_argument("--policy", choices=POLICY_CHOICES, default="qtable",
+                         help="train the Q-table or the linear policy (needs numpy)")
+    command.add_argument("--records", nargs="+", default=None, help="record files or directories to learn from")
+
+    command = add("evaluate", evaluate, "Nombre de tirs de chaque joueur sur les mêmes flottes")
+    command.add_argument("--games", type=int, default=200)
+    command.add_argument("--players", nargs="+", choices=PLAYER_CHOICES, default=PLAYER_CHOICES)
+    command.add_argument("--model", default=None)
+    command.add_argument("--linear-model", default=None, help="linear policy of the linear player")
+    command.add_argument("--targeter-samples", type=int, default=0, help=TARGETER_HELP)
+
+    command = add("bench", bench, "Mesure des performances du moteur")
+    command.add_argument("--games", type=int, default=20)
+    command.add_argument("--repeat", type=int, default=3)
+    command.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from src.utils.log import configure
+    configure(args.log, args.log_file)
+    if getattr(args, "model", False) is None:
+        from src.ai import MODEL_PATH, LINEAR_MODEL_PATH
+        args.model = LINEAR_MODEL_PATH if getattr(args, "policy", None) == "linear" else MODEL_PATH
+    result = args.function(args)
+    _print_result(result, args.json)
+    # A benchmark breaking the startup budget fails, so CI jobs can enforce it
+    if result.get('startup', {}).get('failures'):
+        return 1
+    return 0
@@ -0,0 +1,252 @@
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.opening_book import grid_symmetries
+from src.rules import DEFAULT_RULES
+from src.seeding import derive_seed, stream
+from src.ship import Ship
+
+# The computer's fleet is drawn from a library of fleets that a reference hunter needs many
+# shots to sink. The library is built offline by simulated annealing: each chain moves one
+# ship at a time, scores a few such proposals by the hunter's mean shot count over a batch
+# of headless games (src.simulator), and keeps the best proposal if it needs more shots, or
+# with a probability falling with the temperature if it needs fewer. Chains run in parallel
+# worker processes. A fleet is a list of [row, col, horizontal], one per ship of the rules.
+
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "assets", "ai", "fleet_library.json")
+
+PLACEMENT = "placement"  # Seeding stream of the annealing chains
+
+
+def ship_cells(placement, size):
+    """Cells of a ship of `size` at a [row, col, horizontal] placement"""
+    row, col, horizontal = placement
+    return [(row, col + i) if horizontal else (row + i, col) for i in range(size)]
+
+
+def _random_placement(rules, size, rng):
+    orientations = [horizontal for horizontal in (True, False)
+                    if (size <= rules.width if horizontal else size <= rules.height)]
+    horizontal = rng.choice(orientations)
+    if horizontal:
+        return [rng.randrange(rules.height), rng.randrange(rules.width - size + 1), True]
+    return [rng.randrange(rules.height - size + 1), rng.randrange(rules.width), False]
+
+
+def random_fleet(rules, rng):
+    """Uniformly placed non-overlapping fleet"""
+    fleet = []
+    occupied = set()
+    for ship in rules.ships:
+        while True:
+            placement = _random_placement(rules, ship['size'], rng)
+            cells = ship_cells(placement, ship['size'])
+            if occupied.isdisjoint(cells):
+                break
+        occupied.update(cells)
+        fleet.append(placement)
+    return fleet
+
+
+def neighbor(rules, fleet, rng, tries=20):
+    """The fleet with one ship shifted, turned or moved anywhere it fits"""
+    index = rng.randrange(len(fleet))
+    size = rules.ships[index]['size']
+    occupied = set()
+    for other, placement in enumerate(fleet):
+        if other != index:
+            occupied.update(ship_cells(placement, rules.ships[other]['size']))
+    for _ in range(tries):
+        row, col, horizontal = fleet[index]
+        move = rng.randrange(3)
+        if move == 0:
+            dr, dc = rng.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+            placement = [row + dr, col + dc, horizontal]
+        elif move == 1:
+            placement = [row, col, not horizontal]
+        else:
+            placement = _random_placement(rules, size, rng)
+        cells = ship_cells(placement, size)
+        if all(rules.in_bounds(r, c) for r, c in cells) and occupied.isdisjoint(cells):
+            return fleet[:index] + [placement] + fleet[index + 1:]
+    return list(fleet)
+
+
+def board_with_fleet(fleet, rules=None):
+    """Board holding a fleet"""
+    from src.board import Board
+    board = Board(rules or DEFAULT_RULES)
+    for ship_data, (row, col, horizontal) in zip(board.rules.ships, fleet):
+        board.place_ship(Ship(ship_data['name'], ship_data['size']), row, col, horizontal)
+    return board
+
+
+def make_hunter(hunter, seed):
+    """Batched policy of a hunter spec: {"type": "density"} or {"type": "human", "weights": [...]}"""
+    from src.simulator import DensityBatchPolicy, WeightedDensityBatchPolicy
+    if hunter.get("type") == "human":
+        return WeightedDensityBatchPolicy(hunter["weights"], seed=seed)
+    return DensityBatchPolicy(seed=seed)
+
+
+def evaluate_fleets(fleets, rules, hunter, games, seed):
+    """Mean shots the hunter needs against each fleet, all fleets played in one batch
+
+    Every fleet faces the same `games` hunter streams, so fleets are compared on equal luck.
+    """
+    from src.simulator import BatchSimulator
+    sim = BatchSimulator(len(fleets) * games, rules=rules, seed=seed)
+    for index, fleet in enumerate(fleets):
+        board = board_with_fleet(fleet, rules)
+        for game in range(games):
+            sim.set_fleet(index * games + game, board)
+    shots = sim.run(make_hunter(hunter, seed))
+    return [float(mean) for mean in shots.reshape(len(fleets), games).mean(axis=1)]
+
+
+def anneal(rules, hunter, seed, steps=150, games=32, proposals=4, start_temperature=2.0, end_temperature=0.05):
+    """One annealing chain from a random fleet; return its best (fleet, mean shots)
+
+    Each step plays fresh games, derived from the chain seed and the step, so the chain does
+    not fit the luck of one set of games; the current fleet and its proposals share them.
+    """
+    rng = stream(seed, PLACEMENT)
+    fleet = random_fleet(rules, rng)
+    best, best_score = fleet, float('-inf')
+    for step in range(steps):
+        temperature = start_temperature * (end_temperature / start_temperature) ** (step / max(1, steps - 1))
+        candidates = [neighbor(rules, fleet, rng) for _ in range(proposals)]
+        score, *scores = evaluate_fleets([fleet] + candidates, rules, hunter, games,
+                                         derive_seed(seed, PLACEMENT, step))
+        if score > best_score:
+            best, best_score = fleet, score
+        candidate_score = max(scores)
+        if candidate_score >= score or rng.random() < math.exp((candidate_score - score) / temperature):
+            fleet, score = candidates[scores.index(candidate_score)], candidate_score
+            if score > best_score:
+                best, best_score = fleet, score
+    return best, best_score
+
+
+def optimize_fleets(count, rules=None, hunter=None, seed=0, workers=None, final_games=128, **options):
+    """Anneal `count` chains in parallel and return their fleets as a FleetLibrary
+
+    Chains keep the best fleet they met, whose score is optimistic (it won among noisy
+    measurements), so every fleet is scored again on `final_games` fresh games.
+    """
+    rules = rules or DEFAULT_RULES
+    hunter = hunter or {"type": "density"}
+    workers = workers or max(1, os.cpu_count() or 1)
+    seeds = [derive_seed(seed, PLACEMENT, chain) for chain in range(count)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(anneal, rules, hunter, chain_seed, **options) for chain_seed in seeds]
+        fleets = [future.result()[0] for future in futures]
+    scores = evaluate_fleets(fleets, rules, hunter, final_games, derive_seed(seed, PLACEMENT, "final"))
+    return FleetLibrary(fleets, scores, rules, hunter.get("type", "density"))
+
+
+def human_cell_weights(paths, rules=None):
+    """Relative frequency of every cell among the shots of human players in recorded games
+
+    Add-one smoothed and scaled to a mean of 1, so cells humans favour weigh more.
+    """
+    from src.training import iter_record_files
+    rules = rules or DEFAULT_RULES
+    counts = [1.0] * rules.num_cells
+    for entries in iter_record_files(paths):
+        for entry in entries:
+            if entry['type'] == 'shot' and entry['by'] == 'player':
+                counts[rules.cell(entry['row'], entry['col'])] += 1
+    mean = sum(counts) / len(counts)
+    return [count / mean for count in counts]
+
+
+class FleetLibrary:
+    """Strong fleets for some rules, drawn at game start under a random symmetry"""
+
+    def __init__(self, fleets=None, scores=None, rules=None, hunter="density"):
+        self.fleets = fleets or []
+        self.scores = scores or []
+        self.rules = rules or DEFAULT_RULES
+        self.hunter = hunter
+
+    def matches(self, rules):
+        """Whether the library holds fleets for these rules"""
+        return bool(self.fleets) and rules == self.rules
+
+    def sample(self, rng):
+        """A fleet of the library, turned by one of the grid's symmetries when it is square"""
+        fleet = rng.choice(self.fleets)
+        if self.rules.width != self.rules.height:
+            return [list(placement) for placement in fleet]
+        size = self.rules.width
+        perm = rng.choice(grid_symmetries(size)[0])
+        turned = []
+        for ship, placement in zip(self.rules.ships, fleet):
+            cells = sorted(divmod(perm[r * size + c], size) for r, c in ship_cells(placement, ship['size']))
+            row, col = cells[0]
+            turned.append([row, col, ship['size'] == 1 or cells[-1][0] == row])
+        return turned
+
+    def save(self, path=LIBRARY_PATH):
+        """Write the library as a small JSON file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'rules': self.rules.to_dict(), 'hunter': self.hunter,
+                       'fleets': self.fleets, 'shots': [round(score, 2) for score in self.scores]},
+                      f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path=LIBRARY_PATH):
+        """Load a library; an empty one is returned if the file is missing or unreadable"""
+        from src.rules import Rules
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['fleets'], data['shots'], Rules.from_dict(data['rules']), data['hunter'])
+        except Exception:
+            return cls()
+
+
+_default_library = None
+
+def default_library():
+    """Shared library loaded from the assets on first use"""
+    global _default_library
+    if _default_library is None:
+        _default_library = FleetLibrary.load()
+    return _default_library
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the library of fleets the computer places")
+    parser.add_argument("--fleets", type=int, default=32)
+    parser.add_argument("--steps", type=int, default=150)
+    parser.add_argument("--games", type=int, default=32, help="hunter games per fleet evaluation")
+    parser.add_argument("--hunter", choices=["density", "human"], default="density")
+    parser.add_argument("--records", nargs="+", default=None, help="recorded games to model human shots on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=LIBRARY_PATH)
+    args = parser.parse_args(argv)
+
+    hunter = {"type": "density"}
+    if args.hunter == "human":
+        if not args.records:
+            parser.error("--hunter human needs --records")
+        hunter = {"type": "human", "weights": human_cell_weights(args.records)}
+    library = optimize_fleets(args.fleets, hunter=hunter, seed=args.seed, workers=args.workers,
+                              steps=args.steps, games=args.games)
+    library.save(args.out)
+    rng = stream(args.seed, PLACEMENT, "baseline")
+    baseline = evaluate_fleets([random_fleet(DEFAULT_RULES, rng) for _ in range(args.fleets)],
+                               DEFAULT_RULES, hunter, 128, derive_seed(args.seed, PLACEMENT, "final"))
+    print(f"{len(library.fleets)} fleets: {sum(library.scores) / len(library.scores):.2f} shots on average "
+          f"against the {args.hunter} hunter (random fleets: {sum(baseline) / len(baseline):.2f})")
+
+
+if __name__ == "__main__":
+    main()
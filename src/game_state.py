@@ -1,10 +1,14 @@
 import random
-import pygame
 import os
-from src.utils.constants import SHIPS, GRID_SIZE
+from src.rules import DEFAULT_RULES
 from src.board import Board
 from src.ship import Ship
-from src.ai import ReinforcementLearningAI
+from src.record import GameRecorder, fleet_from_board
+from src.seeding import GameStreams
+from src.utils.constants import GAME_RECORDS_DIR
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
 
 class GameState:
     """Manages the state of the battleship game"""
@@ -18,18 +22,20 @@ class GameState:
     # Game modes
     SINGLE_PLAYER = "single"
     MULTIPLAYER = "multi"
+    NETWORK = "network"
     
     def __init__(self, resolution):
         self.resolution = resolution
         self.state = self.MENU
         self.game_mode = None
         
-        # Ships configuration
-        self.ships = SHIPS.copy()
+        # Grid and fleet configuration
+        self.rules = DEFAULT_RULES
+        self.ships = list(self.rules.ships)
         
         # Boards
-        self.player_board = Board()
-        self.computer_board = Board()
+        self.player_board = Board(self.rules)
+        self.computer_board = Board(self.rules)
         
         # Ship placement
         self.current_ship_index = 0
@@ -45,11 +51,24 @@ class GameState:
         
         # Computer AI - Initialize it later when needed
         self.computer_ai = None
+        
+        # AI moves are computed off the render thread and collected through a future
+        self._ai_executor = None
+        self.computer_move = None
 
         self.menu_music = None
         self.game_music = None
 
         self.victory_animation_started = False
+
+        # Game recording
+        self.record_games = GAME_RECORDS_DIR is not None
+        self.seed = None
+        self.streams = None
+        self.recorder = None
+
+        # Networked game client
+        self.network = None
     
     def start_single_player(self):
         """Start single player game"""
@@ -60,24 +79,49 @@ class GameState:
     def start_multiplayer(self):
         """Start multiplayer game"""
         from src.multiplayer import LocalMultiplayer
+        self._finish_recording(None)
         self.game_mode = self.MULTIPLAYER
         self.multiplayer = LocalMultiplayer()
         self.state = self.PLACEMENT
         self.reset_game()
     
+    def start_network_multiplayer(self, host=None, port=None):
+        """Start a networked game through the relay server"""
+        from src.network import NetworkMultiplayer
+        from src.utils.constants import NETWORK_HOST, NETWORK_PORT
+        self.game_mode = self.NETWORK
+        self.state = self.PLACEMENT
+        self.reset_game()
+        self.network = NetworkMultiplayer(host or NETWORK_HOST, port or NETWORK_PORT)
+    
     def reset_game(self):
         """Reset the game state for a new game"""
+        # Let a move still being computed finish before its AI and boards go away
+        self._cancel_computer_move()
+        
         # Reset boards
-        self.player_board = Board()
-        self.computer_board = Board()
+        self.player_board = Board(self.rules)
+        self.computer_board = Board(self.rules)
         
         # Reset ship placement
         self.current_ship_index = 0
         self.horizontal = True
         self.rotation_cooldown = 0
         
-        # Generate computer ships
-        self.generate_computer_ships()
+        # New seed and record for this game
+        self._finish_recording(None)
+        self.seed = random.randrange(2**32)
+        # Fleet, AI and fallback shots each draw from their own stream of this seed
+        self.streams = GameStreams(self.seed)
+        
+        # Close any previous network connection
+        if self.network is not None:
+            self.network.close()
+            self.network = None
+        
+        # Generate computer ships (the opponent's are unknown in network games)
+        if self.game_mode != self.NETWORK:
+            self.generate_computer_ships()
         
         # Reset turn
         self.player_turn = True
@@ -87,17 +131,36 @@ class GameState:
         
         # Reset AI only if in single player mode
         if self.game_mode == self.SINGLE_PLAYER:
-            self.computer_ai = ReinforcementLearningAI(self.player_board)
+            from src.ai import ReinforcementLearningAI
+            from src.targeting import MonteCarloTargeter
+            from src.utils.constants import AI_TARGETING_BUDGET_MS
+            self.computer_ai = ReinforcementLearningAI(self.player_board, rng=self.streams.ai,
+                                                       targeter=MonteCarloTargeter(budget_ms=AI_TARGETING_BUDGET_MS))
+    
+    def new_player_board(self):
+        """Give the player an empty board to place their fleet on, the one the computer aims at"""
+        self._cancel_computer_move()
+        self.player_board = Board(self.rules)
+        if self.computer_ai is not None:
+            self.computer_ai.player_board = self.player_board
+            self.computer_ai.reset_game_state()
     
     def generate_computer_ships(self):
-        """Generate ships for the computer"""
+        """Generate ships for the computer, from the library of strong fleets when it has some for these rules"""
+        from src.fleet_library import default_library
+        rng = self.streams.fleet
+        library = default_library()
+        if library.matches(self.rules):
+            for ship_data, (row, col, is_horizontal) in zip(self.ships, library.sample(rng)):
+                self.computer_board.place_ship(Ship(ship_data["name"], ship_data["size"]), row, col, is_horizontal)
+            return
         for ship_data in self.ships:
             ship = Ship(ship_data["name"], ship_data["size"])
             placed = False
             while not placed:
-                row = random.randint(0, GRID_SIZE - 1)
-                col = random.randint(0, GRID_SIZE - 1)
-                is_horizontal = random.choice([True, False])
+                row = rng.randint(0, self.rules.height - 1)
+                col = rng.randint(0, self.rules.width - 1)
+                is_horizontal = rng.choice([True, False])
                 placed = self.computer_board.place_ship(ship, row, col, is_horizontal)
     
     def place_player_ship(self, row, col, size, is_horizontal):
@@ -113,27 +176,67 @@ class GameState:
     def player_attack(self, row, col):
         """Player attacks the computer's grid"""
         hit = self.computer_board.receive_attack(row, col)
+        self._record_shot("player", "computer", row, col, hit)
         
         # Check if all computer ships are sunk
         if self.computer_board.all_ships_sunk():
             self.winner = "player"
             self.state = self.END
+            self._finish_recording(self.winner)
         
         return hit
     
     def computer_attack(self):
         """Computer attacks the player's grid"""
-        # First, collect all available (not yet attacked) positions
-        available_positions = []
-        for row in range(len(self.player_board.grid)):
-            for col in range(len(self.player_board.grid[row])):
-                # Only consider positions that haven't been attacked yet
-                if self.player_board.view[row][col] == '.':
-                    available_positions.append((row, col))
-        
-        # If no positions available, return None (game should be over already)
-        if not available_positions:
+        row, col = self.choose_computer_attack()
+        if row is None:
+            return None, None, False
+        return self.apply_computer_attack(row, col)
+    
+    def start_computer_turn(self):
+        """Start computing the computer's move in the background, unless already started"""
+        if self.computer_move is None:
+            if self._ai_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
+            self.computer_move = self._ai_executor.submit(self.choose_computer_attack)
+    
+    def poll_computer_turn(self):
+        """Play the computer's move once it is ready: (row, col, hit), or None while still thinking"""
+        if self.computer_move is None or not self.computer_move.done():
+            return None
+        future, self.computer_move = self.computer_move, None
+        row, col = future.result()
+        if row is None:
             return None, None, False
+        return self.apply_computer_attack(row, col)
+    
+    def _cancel_computer_move(self):
+        """Drop the move being computed, first waiting for the worker if it has already started
+
+        The worker reads the AI and the player's board, so they must not be reset under it.
+        """
+        if self.computer_move is not None:
+            future, self.computer_move = self.computer_move, None
+            if not future.cancel():
+                future.exception()  # Waits for the move; its result or error is not needed
+
+    def close(self):
+        """Stop the background work of the game before the program exits"""
+        self._cancel_computer_move()
+        if self._ai_executor is not None:
+            self._ai_executor.shutdown()
+            self._ai_executor = None
+        self._finish_recording(None)
+        if self.network is not None:
+            self.network.close()
+            self.network = None
+    
+    def choose_computer_attack(self):
+        """Pick the computer's next target without changing the board (safe in a worker thread)"""
+        # If no positions available, return None (game should be over already)
+        if not self.player_board.free_cell_count():
+            return None, None
         
         # If we have an AI, get its suggestion
         if self.computer_ai:
@@ -142,39 +245,91 @@ class GameState:
             # Check if the AI-suggested position has already been attacked
             # If so, pick a random available position instead
             if self.player_board.view[row][col] != '.':
-                import random
-                row, col = random.choice(available_positions)
+                row, col = self.player_board.sample_free_cells(1, self.streams.engine)[0]
         else:
             # No AI, just pick a random available position
-            import random
-            row, col = random.choice(available_positions)
+            row, col = self.player_board.sample_free_cells(1, self.streams.engine)[0]
         
         # Now we're guaranteed to have an unattacked position
-        # Make the attack
-        hit = self.player_board.receive_attack(row, col)
+        return row, col
+    
+    def apply_computer_attack(self, row, col):
+        """Fire the computer's chosen shot and update the AI and the game result"""
+        hit, sunk = self.player_board.receive_attack(row, col, report_sunk=True)
+        self._record_shot("computer", "player", row, col, hit)
         
-        # Update AI if we have one
+        # Update AI if we have one (sinks are announced, so it knows which ship went down)
         if self.computer_ai:
-            self.computer_ai.register_result(row, col, hit)
+            self.computer_ai.register_result(row, col, hit, sunk.size if sunk else None)
         
         # Check if all player ships are sunk
         if self.player_board.all_ships_sunk():
             self.winner = "computer"
             self.state = self.END
+            self._finish_recording(self.winner)
         
         return row, col, hit
     
+    def _record_shot(self, shooter, board, row, col, hit):
+        """Append a shot to the game record, starting the record on the first shot"""
+        if not self.record_games:
+            return
+        try:
+            if self.recorder is None:
+                self.recorder = GameRecorder(self.game_mode, self.seed, rules=self.rules,
+                                             directory=GAME_RECORDS_DIR)
+                self.recorder.start({
+                    "player": fleet_from_board(self.player_board),
+                    "computer": fleet_from_board(self.computer_board)
+                })
+            self.recorder.record_shot(shooter, board, row, col, hit)
+        except Exception as e:
+            log.error("Error recording game: %s", e)
+            self.record_games = False
+    
+    def _finish_recording(self, winner):
+        """Close the current game record, and the hot-seat one if it was left unfinished"""
+        if self.recorder is not None:
+            try:
+                self.recorder.finish(winner)
+            except Exception as e:
+                log.error("Error recording game: %s", e)
+            self.recorder = None
+        if getattr(self, 'multiplayer', None) is not None:
+            self.multiplayer.finish_recording()
+    
+    def send_network_fleet(self):
+        """Send our placed fleet to the relay server once placement is done"""
+        # The computer board stands for the opponent: only attack results are known
+        if self.network is not None:
+            self.network.send_fleet(self.player_board, self.computer_board)
+    
+    def update_network(self):
+        """Apply the messages received from the server and end the game once it has a winner"""
+        if self.network is None:
+            return []
+        messages = self.network.poll()
+        if self.network.winner is not None and self.state == self.GAME:
+            self.winner = self.network.winner
+            self.state = self.END
+        return messages
+    
     def restart_game(self):
         """Reset game state to start a new game"""
         self.state = GameState.MENU
         self.player_turn = True
+        self._cancel_computer_move()
+        self._finish_recording(self.winner)
+        if self.network is not None:
+            self.network.close()
+            self.network = None
         self.winner = None
         self.current_ship_index = 0
         self.horizontal = True
         
         # Réinitialiser le plateau du joueur
-        self.player_board = Board()
-        self.computer_board = Board() if hasattr(self, 'computer_board') else None
+        self.new_player_board()
+        self.computer_board = Board(self.rules) if hasattr(self, 'computer_board') else None
         
         # Réinitialiser les listes de bateaux placés
         self.placed_ships = []  # Pour le mode solo
@@ -204,7 +359,8 @@ class GameState:
     def handle_cell_hit(self, cell_value, row, col, cell_size, cell_x, cell_y, screen, boom_image):
         """Handle the event when a cell is hit"""
         if cell_value == 'X':  # Case touchée
-            print(f"Case touchée à la position ({row}, {col})")
+            import pygame
+            log.debug("Case touchée à la position (%d, %d)", row, col)
             scaled_boom = pygame.transform.scale(boom_image, (int(cell_size), int(cell_size)))
             screen.blit(scaled_boom, (cell_x, cell_y))
 
@@ -218,15 +374,16 @@ class GameState:
         # Save AI learning data if it exists and we're in single player mode
         if self.game_mode == self.SINGLE_PLAYER and self.computer_ai:
             try:
-                print("Saving AI model...")
+                log.info("Saving AI model")
                 self.computer_ai.save_model()
             except Exception as e:
-                print(f"Error saving AI model: {e}")
+                log.error("Error saving AI model: %s", e)
 
     def train_ai(self):
         """Train the AI by playing against itself"""
         import tkinter as tk
         from tkinter import simpledialog, messagebox
+        from src.ai import ReinforcementLearningAI
         
         try:
             # Initialize AI if not already done
@@ -266,7 +423,7 @@ class GameState:
                     f"The AI now knows {len(self.computer_ai.q_table)} different game states."
                 )
         except Exception as e:
-            print(f"Error during AI training: {e}")
+            log.error("Error during AI training: %s", e)
             
             # Show error message
             try:
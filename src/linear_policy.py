@@ -0,0 +1,146 @@
+import os
+import numpy as np
+from src.ai import LINEAR_MODEL_PATH
+
+# Hunting policy as a linear model over per-cell features, a compact alternative to the
+# Q-table: it predicts the log-odds that a ship lies under each cell, every cell of the
+# board is scored by one (cells, features) x (features,) product, and the whole model is
+# a few weights. It is fitted by logistic regression on played games (see PolicyTrainer).
+
+FEATURES = ('bias', 'parity', 'run', 'density', 'hit_neighbors', 'hit_lines', 'isolated', 'density_near_hits')
+
+# Untrained model: the preferences of the hunt heatmap (checkerboard, long runs of open
+# cells, dense placements, cells next to hits, isolated cells last)
+DEFAULT_WEIGHTS = (-2.0, 0.4, 0.5, 2.0, 2.5, 2.0, -1.5, 0.0)
+
+# Features are computed on dense arrays, so larger (sparse) boards keep the sampled heatmap
+MAX_CELLS = 1 << 16
+
+
+def _runs(free):
+    """Length of the run of free cells each cell belongs to, along the rows"""
+    height, width = free.shape
+    # Cells of one run share a row and a count of blocked cells before them
+    run_id = np.cumsum(~free, axis=1) + np.arange(height)[:, None] * (width + 1)
+    lengths = np.bincount(run_id[free], minlength=height * (width + 1))
+    return lengths[run_id] * free
+
+
+def _coverage(blocked, size):
+    """Placements of a ship of `size` along the rows that cover each cell and no blocked cell"""
+    height, width = blocked.shape
+    if size > width:
+        return np.zeros((height, width), dtype=np.int32)
+    counts = np.zeros((height, width + 1), dtype=np.int32)
+    np.cumsum(blocked, axis=1, out=counts[:, 1:])
+    starts = np.zeros((height, width + 1), dtype=np.int32)
+    np.cumsum(counts[:, size:] == counts[:, :width - size + 1], axis=1, out=starts[:, 1:width - size + 2])
+    starts[:, width - size + 2:] = starts[:, width - size + 1:width - size + 2]
+    cols = np.arange(width)
+    return starts[:, cols + 1] - starts[:, np.maximum(cols - size + 1, 0)]
+
+
+def _ship_sizes(rules):
+    """Number of ships of each size in the fleet"""
+    sizes = {}
+    for ship in rules.ships:
+        sizes[ship['size']] = sizes.get(ship['size'], 0) + 1
+    return sizes
+
+
+def cell_features(board):
+    """(cells, FEATURES) float array for every cell of the board, and the mask of free cells"""
+    view = np.array(board.view)
+    free = view == '.'
+    hit = view == 'X'
+    miss = view == 'O'
+    height, width = free.shape
+    rules = board.rules
+
+    rows, cols = np.indices((height, width))
+    parity = (rows + cols) % 2 == 0
+    run = np.maximum(_runs(free), _runs(free.T).T)
+    run = np.minimum(run, rules.max_ship_size) / rules.max_ship_size
+
+    # Rows and columns are scanned together: the columns are stacked under the rows, the
+    # padding between them being blocked
+    lines = np.ones((height + width, max(height, width)), dtype=bool)
+    lines[:height, :width] = miss
+    lines[height:, :height] = miss.T
+    density = np.zeros((height, width))
+    for size, count in _ship_sizes(rules).items():
+        coverage = _coverage(lines, size)
+        density += count * (coverage[:height, :width] + coverage[height:, :height].T)
+    density /= max(1.0, density.max())
+
+    # Neighbours read from copies padded with two empty cells on every side
+    padded_hit = np.zeros((height + 4, width + 4), dtype=bool)
+    padded_hit[2:-2, 2:-2] = hit
+    padded_free = np.zeros((height + 4, width + 4), dtype=bool)
+    padded_free[2:-2, 2:-2] = free
+
+    def near(padded, dr, dc):
+        return padded[2 + dr:2 + dr + height, 2 + dc:2 + dc + width]
+
+    neighbors = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    hit_neighbors = sum(near(padded_hit, dr, dc).astype(np.int32) for dr, dc in neighbors)
+    hit_lines = sum((near(padded_hit, dr, dc) & near(padded_hit, 2 * dr, 2 * dc)).astype(np.int32)
+                    for dr, dc in neighbors)
+    isolated = ~(near(padded_free, 0, 1) | near(padded_free, 1, 0) | near(padded_free, 0, -1)
+                 | near(padded_free, -1, 0))
+
+    features = np.stack([
+        np.ones((height, width)), parity, run, density, hit_neighbors / 4.0, hit_lines / 2.0,
+        isolated, density * (hit_neighbors > 0)
+    ], axis=-1)
+    return features.reshape(-1, len(FEATURES)), free.ravel()
+
+
+class LinearPolicy:
+    """Scores every cell of a board with a linear model over FEATURES"""
+
+    def __init__(self, weights=None):
+        self.weights = np.array(DEFAULT_WEIGHTS if weights is None else weights, dtype=np.float64)
+
+    def supports(self, rules):
+        return rules.num_cells <= MAX_CELLS
+
+    def scores(self, board):
+        """Log-odds of a ship under each cell (-inf for cells already attacked)"""
+        features, free = cell_features(board)
+        scores = features @ self.weights
+        scores[~free] = -np.inf
+        return scores
+
+    def choose(self, board, rng):
+        """Best scoring free cell, ties broken with rng"""
+        scores = self.scores(board)
+        best = np.flatnonzero(scores == scores.max())
+        return board.rules.coords(int(best[rng.randrange(len(best))]))
+
+    def fit(self, features, labels, learning_rate=0.5, steps=1):
+        """Logistic regression steps on (examples, FEATURES) features; return the mean log loss"""
+        labels = labels.astype(np.float64)
+        for _ in range(steps):
+            predicted = 1.0 / (1.0 + np.exp(-(features @ self.weights)))
+            self.weights -= learning_rate * features.T @ (predicted - labels) / len(labels)
+        predicted = np.clip(1.0 / (1.0 + np.exp(-(features @ self.weights))), 1e-7, 1 - 1e-7)
+        return float(-np.mean(labels * np.log(predicted) + (1 - labels) * np.log(1 - predicted)))
+
+    @property
+    def nbytes(self):
+        return self.weights.nbytes
+
+    def save(self, path=LINEAR_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, weights=self.weights, features=np.array(FEATURES))
+
+    @classmethod
+    def load(cls, path=LINEAR_MODEL_PATH):
+        """Saved policy, or the untrained one if there is none for the current FEATURES"""
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if tuple(data['features']) == FEATURES:
+                    return cls(data['weights'])
+        return cls()
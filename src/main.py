@@ -1,7 +1,6 @@
 import pygame
 import sys
 import os
-import pygame.mixer
 
 # Make sure the current directory is in the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,22 +10,25 @@ from src.game_state import GameState
 from src.animations import EffectsManager
 from src.ui.screens import draw_main_menu, draw_ship_selection, draw_game_end, draw_pause_screen
 from src.ui.grid import draw_grid
-from src.utils.constants import WHITE, GRAY, GREEN, RED, FPS
+from src.utils.constants import WHITE, GRAY, GREEN, RED, FPS, IDLE_FPS, INPUT_GRACE_MS, AI_THINKING_DELAY, get_screen_resolution
 from src.utils.helpers import initialize_fonts, load_assets
-from src.board import Board
+from src.utils.log import configure as configure_logging, get_logger
 from src.placement import handle_placement, handle_multiplayer_placement
+from src.pacing import FramePacer
 
-# Initialize pygame
-pygame.init()
+log = get_logger(__name__)
 
-# Initialize mixer for music
-pygame.mixer.init()
+# The window, the game state and the assets are created by init() when the game starts,
+# so importing this module opens nothing
+resolution = None
+screen = None
+game_state = None
+assets = None
+background = None
+fonts = None
+effects_manager = None
+_ship_images = None
 
-# Get screen resolution first
-resolution = [pygame.display.Info().current_w, pygame.display.Info().current_h - 72]
-
-# After pygame.init() and mixer initialization
-# Add these variables
 music_muted = False
 mute_button_rect = pygame.Rect(10, 10, 100, 30)  # Position and size of mute button
 
@@ -34,17 +36,13 @@ mute_button_rect = pygame.Rect(10, 10, 100, 30)  # Position and size of mute but
 last_click_pos = None
 click_processed = False
 
-# Now initialize game state after resolution is defined
-game_state = GameState(resolution)
-
-# Initialize display
-screen = pygame.display.set_mode((resolution[0], resolution[1]))
-pygame.display.set_caption("Bataille navale")
-
 # Load and start background music
 def initialize_music():
     global music_muted
     try:
+        # The audio device is opened here, the first time music is needed
+        pygame.mixer.init()
+        
         # Load all music files
         game_music_path = os.path.join(os.path.dirname(__file__), '..', 'SFX', 'background.mp3')
         menu_music_path = os.path.join(os.path.dirname(__file__), '..', 'SFX', 'menu.mp3')
@@ -61,12 +59,13 @@ def initialize_music():
         if not music_muted:
             pygame.mixer.music.play(-1)
     except Exception as e:
-        print(f"Error loading music: {e}")
-        print(f"Current working directory: {os.getcwd()}")  # Debug print
+        log.warning("Error loading music: %s", e, cwd=os.getcwd())
 
 def toggle_music():
     global music_muted
     music_muted = not music_muted
+    if not pygame.mixer.get_init():
+        return
     if music_muted:
         pygame.mixer.music.pause()
     else:
@@ -88,15 +87,7 @@ def change_music(music_path):
                 pygame.mixer.music.play(-1)  # -1 means loop indefinitely
                 
     except Exception as e:
-        print(f"Error changing music: {e}")
-
-# Initialize music after game_state is created
-initialize_music()
-
-# Load assets
-assets = load_assets(resolution)
-background = assets["background"]
-fonts = initialize_fonts()
+        log.warning("Error changing music: %s", e)
 
 def load_ship_images():
     """Load ship images from the assets/ships directory."""
@@ -108,19 +99,39 @@ def load_ship_images():
             ship_images[ship_key] = pygame.image.load(os.path.join(ships_path, ship_name)).convert_alpha()
     return ship_images
 
-# Charger les images des bateaux après avoir chargé les assets
-ship_images = load_ship_images()
-
-# Initialize effects manager
-effects_manager = EffectsManager()
+def get_ship_images():
+    """Ship images, loaded the first time a placement screen needs them"""
+    global _ship_images
+    if _ship_images is None:
+        _ship_images = load_ship_images()
+    return _ship_images
 
-# Ajouter après l'initialisation de effects_manager (ligne 116 environ)
 def create_hit_effect(self, x, y):
     """Create a hit effect at the specified position"""
     self.create_fire_animation(x, y, 40)  # Fixed size for fire effect
 
-# Attacher la méthode à l'instance EffectsManager
-effects_manager.create_hit_effect = create_hit_effect.__get__(effects_manager)
+def init():
+    """Open the window and create the game state, music, fonts and assets"""
+    global resolution, screen, game_state, assets, background, fonts, effects_manager
+    # Only the subsystems the first frame needs: the mixer starts with the music
+    pygame.display.init()
+    pygame.font.init()
+    resolution = get_screen_resolution()
+    game_state = GameState(resolution)
+    screen = pygame.display.set_mode((resolution[0], resolution[1]))
+    pygame.display.set_caption("Bataille navale")
+    
+    # Initialize music after game_state is created
+    initialize_music()
+    
+    # Load assets
+    assets = load_assets(resolution)
+    background = assets["background"]
+    fonts = initialize_fonts()
+    
+    # Attacher la méthode à l'instance EffectsManager
+    effects_manager = EffectsManager()
+    effects_manager.create_hit_effect = create_hit_effect.__get__(effects_manager)
 
 # Game variables
 button_cooldown = 0
@@ -308,6 +319,97 @@ def handle_multiplayer_game():
                         message_color = WHITE
                         message_timer = 90
 
+def create_board_animations(board, board_x, board_y, cell_size):
+    """Create the fire and water animations for the attacked cells of a board"""
+    for row in range(len(board.grid)):
+        for col in range(len(board.grid[row])):
+            cell_value = board.view[row][col]
+            cell_x = board_x + col * cell_size
+            cell_y = board_y + row * cell_size
+            
+            if cell_value == 'X':  # Case touchée
+                if not any(fire.x == cell_x and fire.y == cell_y for fire in effects_manager.fire_animations):
+                    effects_manager.create_fire_animation(cell_x, cell_y, int(cell_size))
+            elif cell_value == 'O':  # Case manquée
+                if not hasattr(effects_manager, 'water_animations') or not any(water.x == cell_x and water.y == cell_y for water in effects_manager.water_animations):
+                    effects_manager.create_water_animation(cell_x, cell_y, int(cell_size))
+
+def handle_network_game():
+    """Handle a networked game: our board on the left, the opponent's known results on the right"""
+    global message_timer, message_text, message_color
+    
+    # Draw the gameplay background first
+    if "gameplay_background" in assets:
+        screen.blit(assets["gameplay_background"], (0, 0))
+    
+    network = game_state.network
+    
+    # Apply the messages received since the last frame (never waits on the socket)
+    for message in game_state.update_network():
+        if message.get('t') == 'result':
+            our_shot = message['p'] == network.player
+            if message['hit']:
+                message_text = "Touché! Vous rejouez." if our_shot else "Touché! L'adversaire rejoue."
+            else:
+                message_text = "Manqué! Au tour de votre adversaire." if our_shot else "Manqué! À vous de jouer."
+            message_color = WHITE
+            message_timer = 60
+    
+    # Our grid with the placed ships
+    player_x, player_y = draw_grid(screen, game_state.player_board, fonts, assets, reveal=True, 
+                                   is_player_grid=True, position="left")
+    cell_size = game_state.player_board.width / len(game_state.player_board.grid[0])
+    for ship in game_state.placed_ships:
+        ship_image = get_ship_images().get(ship['name'].lower())
+        if ship_image:
+            scaled_image = pygame.transform.scale(ship_image, (int(cell_size * ship['size']), int(cell_size)))
+            if ship['horizontal']:
+                screen.blit(scaled_image, (player_x + ship['col'] * cell_size, player_y + ship['row'] * cell_size))
+            else:
+                rotated_image = pygame.transform.rotate(scaled_image, 90)
+                screen.blit(rotated_image, (player_x + ship['col'] * cell_size, player_y + ship['row'] * cell_size))
+    
+    # The opponent's grid only shows the results sent by the server
+    opponent_board = game_state.computer_board
+    comp_x, comp_y = draw_grid(screen, opponent_board, fonts, assets, reveal=False, 
+                               is_player_grid=False, position="right")
+    
+    create_board_animations(game_state.player_board, player_x, player_y, cell_size)
+    create_board_animations(opponent_board, comp_x, comp_y, cell_size)
+    
+    # Victory ends the game through update_network
+    if game_state.winner is not None:
+        if game_state.winner == "player" and not game_state.victory_animation_started:
+            effects_manager.clear_fire_animations()
+            effects_manager.create_victory_animation(resolution[0], resolution[1])
+            game_state.victory_animation_started = True
+            change_music(game_state.victory_music)
+        return
+    
+    # Turn indicator or connection status
+    if network.is_my_turn():
+        status = fonts["small"].render("Votre tour", True, GREEN)
+    elif network.started and network.connected:
+        status = fonts["small"].render("Tour de l'adversaire", True, RED)
+    else:
+        status = fonts["small"].render(network.status, True, WHITE)
+    screen.blit(status, (resolution[0] // 2 - status.get_width() // 2, comp_y - 50))
+    
+    if message_timer > 0:
+        message = fonts["small"].render(message_text, True, message_color)
+        screen.blit(message, (resolution[0] // 2 - message.get_width() // 2, 
+                              max(player_y, comp_y) + game_state.player_board.height + 30))
+    
+    # Send a shot; the result is applied when the server answers
+    mouse_pressed = pygame.mouse.get_pressed()
+    mouse_pos = pygame.mouse.get_pos()
+    if mouse_pressed[0] and network.is_my_turn():
+        if (comp_x <= mouse_pos[0] < comp_x + opponent_board.width and 
+            comp_y <= mouse_pos[1] < comp_y + opponent_board.height):
+            col = int((mouse_pos[0] - comp_x) // cell_size)
+            row = int((mouse_pos[1] - comp_y) // cell_size)
+            network.attack(row, col)
+
 def handle_game():
     """Handle the game phase (player turns, computer turns)"""
     global message_timer, message_text, message_color, waiting_for_action, button_cooldown, last_click_pos, click_processed
@@ -323,7 +425,7 @@ def handle_game():
     # Draw already placed ships on the player's grid
     cell_size = game_state.player_board.width / len(game_state.player_board.grid[0])
     for ship in game_state.placed_ships:
-        ship_image = ship_images.get(ship['name'].lower())
+        ship_image = get_ship_images().get(ship['name'].lower())
         if ship_image:
             scaled_image = pygame.transform.scale(ship_image, (int(cell_size * ship['size']), int(cell_size)))
             if ship['horizontal']:
@@ -441,6 +543,7 @@ def handle_game():
                             message_color = WHITE
                             message_timer = 90
                             game_state.player_turn = False
+                            game_state.start_computer_turn()
             
             # Also check for pygame events to ensure we don't miss any clicks
             for event in pygame.event.get([pygame.MOUSEBUTTONDOWN]):
@@ -481,6 +584,7 @@ def handle_game():
                                 message_color = WHITE
                                 message_timer = 90
                                 game_state.player_turn = False
+                                game_state.start_computer_turn()
         
         # Computer's turn
         else:
@@ -493,6 +597,9 @@ def handle_game():
             instructions_x = player_x + (game_state.player_board.width // 2) - (instructions.get_width() // 2)
             screen.blit(instructions, (instructions_x, player_y - 25))  # Changed from -30 to -25
             
+            # The move is computed in the background while messages are displayed
+            game_state.start_computer_turn()
+            
             # If a message is being displayed
             if message_timer > 0:
                 message = fonts["small"].render(message_text, True, message_color)
@@ -502,21 +609,27 @@ def handle_game():
             
             # Computer's turn logic
             if not waiting_for_action:
-                # Show that the computer is thinking
+                # Show that the computer is thinking for at least AI_THINKING_DELAY frames
                 message_text = "L'ordinateur réfléchit..."
                 message_color = WHITE
-                message_timer = 90
+                message_timer = AI_THINKING_DELAY
                 waiting_for_action = True
                 
                 # ADD THIS: Return to give the thinking animation time to display
                 return  # This is critical - allows the thinking message to appear
-
-            # Reset waiting state only after message has been shown
-            waiting_for_action = False
             
-            # Computer makes a move
+            # Computer makes a move as soon as it is ready, the thinking message stays meanwhile
             try:
-                row, col, hit = game_state.computer_attack()
+                result = game_state.poll_computer_turn()
+                if result is None:
+                    message = fonts["small"].render(message_text, True, message_color)
+                    screen.blit(message, (resolution[0] // 2 - message.get_width() // 2, 
+                                        max(player_y, comp_y) + game_state.player_board.height + 30))
+                    return
+                
+                # Reset waiting state only once the move has been played
+                waiting_for_action = False
+                row, col, hit = result
                 
                 if row is not None:
                     # Add visual effect
@@ -534,188 +647,218 @@ def handle_game():
                         message_timer = 75
                         game_state.player_turn = True
             except Exception as e:
-                print(f"Error during computer's turn: {e}")
+                waiting_for_action = False
+                log.error("Error during computer's turn: %s", e)
                 # Recover gracefully by switching back to player's turn
                 message_text = "Erreur lors du tour de l'ordinateur. Votre tour."
                 message_color = RED
                 message_timer = 90
                 game_state.player_turn = True
 
-# Main game loop
-running = True
-clock = pygame.time.Clock()
 # Variable pour suivre si on vient de changer d'état
 recently_changed_state = False
 previous_state = None
-
-# Ajoutez ces variables globales
 paused = False
-previous_state = None
 
-while running:
-    events = pygame.event.get()
-    
-    # Handle events
-    for event in events:
-        if event.type == pygame.QUIT:
-            running = False
+def frame_is_busy():
+    """Whether a timer, an effect or a move in progress needs frames at the full rate"""
+    if paused:
+        return False
+    multiplayer = getattr(game_state, 'multiplayer', None)
+    return bool(button_cooldown or message_timer or game_state.rotation_cooldown or waiting_for_action
+                or game_state.computer_move is not None
+                or (multiplayer is not None and multiplayer.transition_screen)
+                or effects_manager.has_live_effects()
+                or (game_state.winner is not None and game_state.victory_animation_started
+                    and effects_manager.victory_particles))
+
+def main():
+    """Run the game until the window is closed"""
+    global paused, previous_state, recently_changed_state, button_cooldown, message_timer, message_text
+    global message_color, waiting_for_action, click_processed
+    configure_logging()
+    init()
+    
+    # Main game loop
+    running = True
+    pacer = FramePacer(FPS, IDLE_FPS, INPUT_GRACE_MS)
+    
+    while running:
+        events = pacer.events()
+    
+        # Handle events
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
         
-        # Gestion de la touche P pour la pause
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_p:
-                if game_state.state in [GameState.GAME, GameState.PLACEMENT]:
-                    paused = not paused
-                    if paused:
-                        previous_state = game_state.state
-                        pygame.mixer.music.pause()  # Mettre la musique en pause
-                    else:
-                        if not music_muted:
-                            pygame.mixer.music.unpause()  # Reprendre la musique si pas en mode muet
+            # Gestion de la touche P pour la pause
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_p:
+                    if game_state.state in [GameState.GAME, GameState.PLACEMENT]:
+                        paused = not paused
+                        if paused:
+                            previous_state = game_state.state
+                            if pygame.mixer.get_init():
+                                pygame.mixer.music.pause()  # Mettre la musique en pause
+                        else:
+                            if not music_muted and pygame.mixer.get_init():
+                                pygame.mixer.music.unpause()  # Reprendre la musique si pas en mode muet
         
-        # Handle mute button clicks
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if mute_button_rect.collidepoint(event.pos):
-                toggle_music()
-    
-    # Clear screen
-    screen.fill(GRAY)
-    
-    # Si la partie est en pause, afficher l'écran de pause
-    if paused:
-        # Fonction pour reprendre le jeu
-        def resume_game():
-            global paused
-            paused = False
-            if not music_muted:
-                pygame.mixer.music.unpause()
+            # Handle mute button clicks
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if mute_button_rect.collidepoint(event.pos):
+                    toggle_music()
+    
+        # Clear screen
+        screen.fill(GRAY)
+    
+        # Si la partie est en pause, afficher l'écran de pause
+        if paused:
+            # Fonction pour reprendre le jeu
+            def resume_game():
+                global paused
+                paused = False
+                if not music_muted and pygame.mixer.get_init():
+                    pygame.mixer.music.unpause()
 
-        # Fonction pour quitter le jeu et retourner au menu
-        def quit_to_menu():
-            global paused
-            paused = False
-            game_state.state = GameState.MENU
-            effects_manager.clear_fire_animations()
-            if hasattr(effects_manager, 'clear_water_animations'):
-                effects_manager.clear_water_animations()
-            change_music(game_state.menu_music)
+            # Fonction pour quitter le jeu et retourner au menu
+            def quit_to_menu():
+                global paused
+                paused = False
+                game_state.state = GameState.MENU
+                effects_manager.clear_fire_animations()
+                if hasattr(effects_manager, 'clear_water_animations'):
+                    effects_manager.clear_water_animations()
+                change_music(game_state.menu_music)
 
-            game_state.state = GameState.MENU
-            game_state.placed_ships = []  # Vider la liste des bateaux placés
-            game_state.restart_game()
+                game_state.state = GameState.MENU
+                game_state.placed_ships = []  # Vider la liste des bateaux placés
+                game_state.restart_game()
 
-            if hasattr(game_state, 'multiplayer'):
-                if hasattr(game_state.multiplayer, 'player1_ships'):
-                    game_state.multiplayer.player1_ships = []
-                if hasattr(game_state.multiplayer, 'player2_ships'):
-                    game_state.multiplayer.player2_ships = []
+                if hasattr(game_state, 'multiplayer'):
+                    if hasattr(game_state.multiplayer, 'player1_ships'):
+                        game_state.multiplayer.player1_ships = []
+                    if hasattr(game_state.multiplayer, 'player2_ships'):
+                        game_state.multiplayer.player2_ships = []
         
-        # Dessiner l'écran de pause par-dessus tout
-        draw_pause_screen(screen, fonts, resolution, resume_game, quit_to_menu)
-    else:
-        # Update timers
-        if button_cooldown > 0:
-            button_cooldown -= 1
+            # Dessiner l'écran de pause par-dessus tout
+            draw_pause_screen(screen, fonts, resolution, resume_game, quit_to_menu)
+        else:
+            # Update timers
+            if button_cooldown > 0:
+                button_cooldown -= 1
         
-        if message_timer > 0:
-            message_timer -= 1
+            if message_timer > 0:
+                message_timer -= 1
         
-        if game_state.rotation_cooldown > 0:
-            game_state.rotation_cooldown -= 1
+            if game_state.rotation_cooldown > 0:
+                game_state.rotation_cooldown -= 1
             
-        # Regular game state handling (menu, placement, game, etc.)
-        # Vérifier si l'état a changé
-        if previous_state != game_state.state:
-            previous_state = game_state.state
-            recently_changed_state = True
+            # Regular game state handling (menu, placement, game, etc.)
+            # Vérifier si l'état a changé
+            if previous_state != game_state.state:
+                previous_state = game_state.state
+                recently_changed_state = True
             
-            # Save AI model when transitioning to END state
-            if game_state.state == GameState.END and game_state.computer_ai:
-                try:
-                    print("Saving AI model at game end...")
-                    game_state.computer_ai.save_model()
-                except Exception as e:
-                    print(f"Error saving AI model: {e}")
+                # Save AI model when transitioning to END state
+                if game_state.state == GameState.END and game_state.computer_ai:
+                    try:
+                        log.info("Saving AI model at game end")
+                        game_state.computer_ai.save_model()
+                    except Exception as e:
+                        log.error("Error saving AI model: %s", e)
             
-            # Clear fire animations when game ends or restarts
-            if game_state.state == GameState.END or (game_state.state == GameState.MENU and previous_state == GameState.END):
-                effects_manager.clear_fire_animations()
-                if hasattr(effects_manager, 'clear_water_animations'):
-                    effects_manager.clear_water_animations()
+                # Clear fire animations when game ends or restarts
+                if game_state.state == GameState.END or (game_state.state == GameState.MENU and previous_state == GameState.END):
+                    effects_manager.clear_fire_animations()
+                    if hasattr(effects_manager, 'clear_water_animations'):
+                        effects_manager.clear_water_animations()
             
-            # Change music based on state
-            if game_state.state == GameState.MENU:
-                change_music(game_state.menu_music)
-            elif game_state.state in [GameState.PLACEMENT, GameState.GAME]:
-                change_music(game_state.game_music)
+                # Change music based on state
+                if game_state.state == GameState.MENU:
+                    change_music(game_state.menu_music)
+                elif game_state.state in [GameState.PLACEMENT, GameState.GAME]:
+                    change_music(game_state.game_music)
             
-            # Force a longer cooldown when changing to placement state
-            if game_state.state == GameState.PLACEMENT:
-                button_cooldown = 120
-                game_state.player_board = Board()
-                game_state.current_ship_index = 0
-            else:
-                button_cooldown = 60
+                # Force a longer cooldown when changing to placement state
+                if game_state.state == GameState.PLACEMENT:
+                    button_cooldown = 120
+                    game_state.new_player_board()
+                    game_state.current_ship_index = 0
+                else:
+                    button_cooldown = 60
             
-            # Reset message when changing states to avoid old messages carrying over
-            if game_state.state == GameState.GAME:
-                message_text = ""
-                message_timer = 0
-                waiting_for_action = False
+                # Reset message when changing states to avoid old messages carrying over
+                if game_state.state == GameState.GAME:
+                    message_text = ""
+                    message_timer = 0
+                    waiting_for_action = False
+                
+                    # Networked games start once both fleets reach the server
+                    if game_state.game_mode == GameState.NETWORK:
+                        game_state.send_network_fleet()
         
-        # Handle game state
-        if game_state.state == GameState.MENU:
-            # Transmet le statut de changement d'état récent à la fonction du menu
-            result = draw_main_menu(screen, game_state, fonts, background, button_cooldown)
-            # Si on a appuyé sur start et qu'on change d'état, réinitialiser la variable
-            if result and recently_changed_state == False:
-                recently_changed_state = True
-        elif game_state.state == GameState.PLACEMENT:
-            if game_state.game_mode == GameState.SINGLE_PLAYER:
-                message_timer, message_text, message_color = handle_placement(
-                    screen, game_state, fonts, assets, ship_images, 
-                    button_cooldown=button_cooldown,
-                    message_timer=message_timer,
-                    message_text=message_text,
-                    message_color=message_color,
-                    events = events
-                )
-            else : # Multiplayer mode
-                message_timer, message_text, message_color, click_processed = handle_multiplayer_placement(
-                    screen, game_state, fonts, assets, ship_images, resolution,
-                    button_cooldown=button_cooldown,
-                    message_timer=message_timer,
-                    message_text=message_text,
-                    message_color=message_color,
-                    click_processed=click_processed,
-                    events = events
-                )
-            recently_changed_state = False
-        elif game_state.state == GameState.GAME:
-            if game_state.game_mode == GameState.SINGLE_PLAYER:
-                handle_game()
-            else:  # Multiplayer mode
-                handle_multiplayer_game()
-            recently_changed_state = False
-        elif game_state.state == GameState.END:
-            draw_game_end(screen, game_state.winner, fonts, game_state.restart_game)
-            recently_changed_state = False
+            # Handle game state
+            if game_state.state == GameState.MENU:
+                # Transmet le statut de changement d'état récent à la fonction du menu
+                result = draw_main_menu(screen, game_state, fonts, background, button_cooldown)
+                # Si on a appuyé sur start et qu'on change d'état, réinitialiser la variable
+                if result and recently_changed_state == False:
+                    recently_changed_state = True
+            elif game_state.state == GameState.PLACEMENT:
+                if game_state.game_mode in [GameState.SINGLE_PLAYER, GameState.NETWORK]:
+                    message_timer, message_text, message_color = handle_placement(
+                        screen, game_state, fonts, assets, get_ship_images(), 
+                        button_cooldown=button_cooldown,
+                        message_timer=message_timer,
+                        message_text=message_text,
+                        message_color=message_color,
+                        events = events
+                    )
+                else : # Multiplayer mode
+                    message_timer, message_text, message_color, click_processed = handle_multiplayer_placement(
+                        screen, game_state, fonts, assets, get_ship_images(), resolution,
+                        button_cooldown=button_cooldown,
+                        message_timer=message_timer,
+                        message_text=message_text,
+                        message_color=message_color,
+                        click_processed=click_processed,
+                        events = events
+                    )
+                recently_changed_state = False
+            elif game_state.state == GameState.GAME:
+                if game_state.game_mode == GameState.SINGLE_PLAYER:
+                    handle_game()
+                elif game_state.game_mode == GameState.NETWORK:
+                    handle_network_game()
+                else:  # Multiplayer mode
+                    handle_multiplayer_game()
+                recently_changed_state = False
+            elif game_state.state == GameState.END:
+                draw_game_end(screen, game_state.winner, fonts, game_state.restart_game)
+                recently_changed_state = False
         
-        # Update effects
-        effects_manager.update_effects(screen)
-        effects_manager.update_animated_messages(screen)
-        if game_state.winner is not None and game_state.victory_animation_started:
-            if len(effects_manager.victory_particles) > 0:
-                effects_manager.update_victory_animation(screen)
-    
-    # Draw mute button (qu'on soit en pause ou non)
-    pygame.draw.rect(screen, WHITE if not music_muted else RED, mute_button_rect)
-    mute_text = fonts["small"].render("ON" if not music_muted else "OFF", True, GRAY)
-    text_rect = mute_text.get_rect(center=mute_button_rect.center)
-    screen.blit(mute_text, text_rect)
-    
-    pygame.display.flip()
-    clock.tick(FPS)
+            # Update effects
+            effects_manager.update_effects(screen, pacer.steps)
+            effects_manager.update_animated_messages(screen)
+            if game_state.winner is not None and game_state.victory_animation_started:
+                if len(effects_manager.victory_particles) > 0:
+                    effects_manager.update_victory_animation(screen)
+    
+        # Draw mute button (qu'on soit en pause ou non)
+        pygame.draw.rect(screen, WHITE if not music_muted else RED, mute_button_rect)
+        mute_text = fonts["small"].render("ON" if not music_muted else "OFF", True, GRAY)
+        text_rect = mute_text.get_rect(center=mute_button_rect.center)
+        screen.blit(mute_text, text_rect)
+    
+        pygame.display.flip()
+        pacer.wait(frame_is_busy(), animating=not paused and effects_manager.has_looping_animations())
+
+    game_state.close()
+    if pygame.mixer.get_init():
+        pygame.mixer.music.stop()  # Stop music before quitting
+    pygame.quit()
+    sys.exit()
 
-pygame.mixer.music.stop()  # Stop music before quitting
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+import asyncio
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.board import Board
+from src.model_service import load_packed_table
+from src.network import encode, decode, board_from_network_fleet
+from src.rules import Rules, DEFAULT_RULES
+from src.seeding import derive_seed, AI
+from src.ship import Ship
+from src.utils.constants import NETWORK_HOST
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
+
+# Headless server hosting many matches at once, with the same line protocol as the
+# relay server. Clients may send {"t": "join", "ai": 1} to play against the computer.
+
+
+class CompactBoard:
+    """Attack state of one fleet as bitmasks (bit rules.cell(r, c)), a few hundred bytes per board"""
+
+    __slots__ = ('rules', 'ship_masks', 'fleet', 'hits', 'misses')
+
+    def __init__(self, ship_masks, rules=DEFAULT_RULES):
+        self.rules = rules
+        self.ship_masks = list(ship_masks)
+        self.fleet = 0
+        for mask in self.ship_masks:
+            self.fleet |= mask
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_board(cls, board):
+        cell = board.rules.cell
+        return cls((sum(1 << cell(r, c) for r, c in ship.coordinates) for ship in board.ships), board.rules)
+
+    def is_attacked(self, row, col):
+        return bool((self.hits | self.misses) >> self.rules.cell(row, col) & 1)
+
+    def attack(self, row, col):
+        """Resolve a shot and return (hit, index of the ship it sank or -1)"""
+        bit = 1 << self.rules.cell(row, col)
+        if not self.fleet & bit:
+            self.misses |= bit
+            return False, -1
+        self.hits |= bit
+        for index, mask in enumerate(self.ship_masks):
+            if mask & bit:
+                return True, index if self.hits & mask == mask else -1
+        return True, -1
+
+    def ship_size(self, index):
+        return bin(self.ship_masks[index]).count('1')
+
+    @property
+    def shots(self):
+        return bin(self.hits | self.misses).count('1')
+
+    def all_sunk(self):
+        return self.hits & self.fleet == self.fleet
+
+
+def random_compact_fleet(rng, rules=DEFAULT_RULES):
+    """Random fleet for the computer, placed with the same rules as GameState"""
+    board = Board(rules)
+    for ship_data in rules.ships:
+        ship = Ship(ship_data["name"], ship_data["size"])
+        while not board.place_ship(ship, rng.randint(0, rules.height - 1), rng.randint(0, rules.width - 1),
+                                   rng.choice([True, False])):
+            pass
+    return CompactBoard.from_board(board)
+
+
+# --- AI worker processes -------------------------------------------------------
+
+_worker_ai = None
+
+def _init_ai_worker():
+    """Map the packed model once per worker process; every worker shares the same pages"""
+    global _worker_ai
+    from src.ai import ReinforcementLearningAI
+    table = load_packed_table()
+    _worker_ai = ReinforcementLearningAI(Board(), q_table=table if table is not None else {}, learn=False)
+
+
+def ai_move(state, hits, misses, last_result, seed, rules=DEFAULT_RULES):
+    """Pick the AI's next shot from the attack masks and its targeting state (runs in a worker)
+
+    The move draws from its own seeded stream, so it does not depend on the worker.
+    """
+    if _worker_ai is None:
+        _init_ai_worker()
+    ai = _worker_ai
+    ai.rng = random.Random(seed)
+    board = Board(rules)
+    for cell in range(rules.num_cells):
+        if hits >> cell & 1:
+            board.mark_attack(*rules.coords(cell), True)
+        elif misses >> cell & 1:
+            board.mark_attack(*rules.coords(cell), False)
+    ai.player_board = board
+    if state is None:
+        ai.reset_game_state()
+    else:
+        ai.set_targeting_state(state)
+    if last_result is not None:
+        ai.register_result(*last_result)
+
+    row, col = ai.get_attack_coordinates()
+    if board.view[row][col] != '.':
+        row, col = board.sample_free_cells(1, ai.rng)[0]
+    return row, col, ai.get_targeting_state()
+
+
+# --- Server --------------------------------------------------------------------
+
+class _Player:
+    """A connected client"""
+
+    __slots__ = ('writer', 'board', 'match', 'number', 'wants_ai')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.board = None
+        self.match = None
+        self.number = None
+        self.wants_ai = False
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode(message))
+
+
+class _AIPlayer:
+    """Computer opponent; its targeting state travels to the worker pool with each move"""
+
+    __slots__ = ('board', 'match', 'number', 'state', 'last_result', 'seed', 'moves')
+
+    def __init__(self, board, seed):
+        self.board = board
+        self.match = None
+        self.number = None
+        self.state = None
+        self.last_result = None
+        self.seed = seed
+        self.moves = 0
+
+    def send(self, message):
+        pass
+
+
+class _ServerMatch:
+    __slots__ = ('id', 'players', 'turn', 'winner')
+
+    def __init__(self, match_id, first, second):
+        self.id = match_id
+        self.players = {1: first, 2: second}
+        self.turn = 1
+        self.winner = None
+        for number, player in self.players.items():
+            player.match = self
+            player.number = number
+
+    @property
+    def started(self):
+        return self.players[1].board is not None and self.players[2].board is not None
+
+    def broadcast(self, message):
+        for player in self.players.values():
+            player.send(message)
+
+
+class MatchServer:
+    """Hosts many concurrent matches with matchmaking and pooled AI opponents"""
+
+    def __init__(self, host=NETWORK_HOST, port=0, ai_workers=None, seed=None, publisher=None, rules=None):
+        self.host = host
+        self.port = port
+        self.publisher = publisher
+        self.rules = rules or DEFAULT_RULES
+        self._match_ids = itertools.count(1)
+        self.ai_workers = ai_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.rng = random.Random(seed)
+        self.pool = None
+        self._server = None
+        self._waiting = None
+        self._handlers = {}
+        self.active_matches = 0
+        self.finished_matches = 0
+        self.ai_turns = 0
+        self.ai_turn_seconds = 0.0
+
+    async def start(self):
+        # Refresh the packed model here so the workers only have to map it
+        table = load_packed_table()
+        if table is not None:
+            table.close()
+        self.pool = ProcessPoolExecutor(max_workers=self.ai_workers, initializer=_init_ai_worker)
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Closing the sockets lets every handler finish on end of stream
+        for writer in list(self._handlers.values()):
+            writer.close()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def stats(self):
+        return {
+            'active_matches': self.active_matches,
+            'finished_matches': self.finished_matches,
+            'ai_workers': self.ai_workers,
+            'ai_turns': self.ai_turns,
+            'ai_turn_ms': self.ai_turn_seconds / self.ai_turns * 1000 if self.ai_turns else 0.0
+        }
+
+    async def _handle_client(self, reader, writer):
+        player = _Player(writer)
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = decode(line)
+                if message is None:
+                    player.send({'t': 'error', 'msg': 'bad message'})
+                    continue
+                self._dispatch(player, message)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._leave(player)
+            writer.close()
+            del self._handlers[task]
+
+    def _dispatch(self, player, message):
+        kind = message.get('t')
+        if kind == 'join':
+            self._join(player, bool(message.get('ai')))
+        elif kind == 'fleet':
+            self._fleet(player, message.get('ships'))
+        elif kind == 'shot':
+            self._shot(player, message.get('r'), message.get('c'))
+        else:
+            player.send({'t': 'error', 'msg': 'unknown message'})
+
+    def _join(self, player, wants_ai):
+        if player.match is not None or player is self._waiting:
+            return
+        if wants_ai:
+            opponent = _AIPlayer(random_compact_fleet(self.rng, self.rules), self.rng.getrandbits(64))
+        elif self._waiting is None:
+            self._waiting = player
+            player.send({'t': 'wait'})
+            return
+        else:
+            opponent, self._waiting = self._waiting, None
+        # The player who waited (or the human facing the AI) plays first
+        match_id = f"match-{next(self._match_ids)}"
+        match = _ServerMatch(match_id, player, opponent) if wants_ai else _ServerMatch(match_id, opponent, player)
+        self.active_matches += 1
+        for number, other in match.players.items():
+            other.send({'t': 'joined', 'p': number})
+        self._start_if_ready(match)
+
+    def _fleet(self, player, ships):
+        if player.board is not None:
+            player.send({'t': 'error', 'msg': 'fleet already received'})
+            return
+        board = board_from_network_fleet(ships, self.rules)
+        if board is None:
+            player.send({'t': 'error', 'msg': 'invalid fleet'})
+            return
+        player.board = CompactBoard.from_board(board)
+        if player.match is not None:
+            self._start_if_ready(player.match)
+
+    def _start_if_ready(self, match):
+        if match.started:
+            match.broadcast({'t': 'start', 'turn': match.turn})
+            if self.publisher is not None:
+                kind = 'ai' if any(isinstance(p, _AIPlayer) for p in match.players.values()) else 'human'
+                self.publisher.open_game(match.id, {'kind': kind}, rules=self.rules)
+            self._schedule_ai(match)
+
+    def _shot(self, player, row, col):
+        match = player.match
+        if match is None or not match.started or match.winner is not None:
+            player.send({'t': 'error', 'msg': 'game not running'})
+            return
+        if match.turn != player.number:
+            player.send({'t': 'error', 'msg': 'not your turn'})
+            return
+        if not isinstance(row, int) or not isinstance(col, int) or not self.rules.in_bounds(row, col):
+            player.send({'t': 'error', 'msg': 'shot out of range'})
+            return
+        if match.players[3 - player.number].board.is_attacked(row, col):
+            player.send({'t': 'error', 'msg': 'cell already attacked'})
+            return
+        self._resolve(match, player, row, col)
+        self._schedule_ai(match)
+
+    def _resolve(self, match, shooter, row, col):
+        """Apply a validated shot with LocalMultiplayer's rules and tell both players"""
+        target = match.players[3 - shooter.number].board
+        hit, sunk = target.attack(row, col)
+        win = hit and target.all_sunk()
+        # Same shot event as src.sync, without the view checksum (boards are bitmasks here)
+        event = {'s': target.shots, 'r': row, 'c': col, 'hit': int(hit), 'k': sunk}
+        if self.publisher is not None:
+            self.publisher.publish(match.id, str(3 - shooter.number), event)
+        if win:
+            self._end(match, shooter.number)
+        elif not hit:
+            match.turn = 3 - shooter.number
+        match.broadcast(dict(event, t='result', p=shooter.number, turn=match.turn, win=int(win)))
+        return hit, sunk
+
+    def _schedule_ai(self, match):
+        current = match.players[match.turn]
+        if isinstance(current, _AIPlayer) and match.winner is None:
+            asyncio.get_running_loop().create_task(self._ai_turns(match, current))
+
+    async def _ai_turns(self, match, ai):
+        """Play the AI's turn in the worker pool so the event loop keeps serving other matches"""
+        loop = asyncio.get_running_loop()
+        while match.winner is None and match.turn == ai.number:
+            target = match.players[3 - ai.number].board
+            start = time.perf_counter()
+            try:
+                row, col, ai.state = await loop.run_in_executor(
+                    self.pool, ai_move, ai.state, target.hits, target.misses, ai.last_result,
+                    derive_seed(ai.seed, AI, ai.moves), self.rules)
+                ai.moves += 1
+            except Exception as e:
+                # A broken worker pool or AI bug forfeits the match instead of leaving it stuck
+                log.error("AI turn failed in %s: %r", match.id, e)
+                self._end(match, 3 - ai.number)
+                human = match.players[3 - ai.number]
+                human.send({'t': 'error', 'msg': 'AI opponent failed'})
+                human.send({'t': 'left'})
+                return
+            self.ai_turns += 1
+            self.ai_turn_seconds += time.perf_counter() - start
+            if match.winner is not None:
+                return
+            hit, sunk = self._resolve(match, ai, row, col)
+            ai.last_result = (row, col, hit, target.ship_size(sunk) if sunk >= 0 else None)
+
+    def _end(self, match, winner):
+        if match.winner is None:
+            match.winner = winner
+            self.active_matches -= 1
+            self.finished_matches += 1
+            if self.publisher is not None:
+                self.publisher.close_game(match.id, str(winner))
+
+    def _leave(self, player):
+        if self._waiting is player:
+            self._waiting = None
+        match = player.match
+        if match is not None and match.winner is None:
+            self._end(match, 3 - player.number)
+            match.players[3 - player.number].send({'t': 'left'})
+
+
+# --- Load generator ------------------------------------------------------------
+
+async def _simulated_client(host, port, wants_ai, rng, latencies, rules=DEFAULT_RULES):
+    """Join, place a random fleet and fire random shots until the match ends"""
+    from src.record import fleet_from_board
+    from src.training import random_fleet_board
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({'t': 'join', 'ai': int(wants_ai)}))
+    writer.write(encode({'t': 'fleet', 'ships': fleet_from_board(random_fleet_board(rng, rules))}))
+    cells = [(r, c) for r in range(rules.height) for c in range(rules.width)]
+    rng.shuffle(cells)
+    number = None
+    sent_at = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return False
+            message = decode(line)
+            if message is None:
+                continue
+            kind = message.get('t')
+            if kind == 'joined':
+                number = message['p']
+            elif kind in ('left', 'error'):
+                return False
+            elif kind == 'result' and message['p'] == number and sent_at is not None:
+                latencies.append(time.perf_counter() - sent_at)
+                sent_at = None
+            if kind == 'result' and message['win']:
+                return True
+            if kind in ('start', 'result') and message['turn'] == number and sent_at is None:
+                row, col = cells.pop()
+                sent_at = time.perf_counter()
+                writer.write(encode({'t': 'shot', 'r': row, 'c': col}))
+                await writer.drain()
+    except ConnectionError:
+        return False
+    finally:
+        writer.close()
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_load_test(clients=200, ai_fraction=0.5, ai_workers=None, seed=None, rules=None):
+    """Start a local server, play `clients` simulated clients against it and report latency and throughput"""
+    server = MatchServer(ai_workers=ai_workers, seed=seed, rules=rules)
+    await server.start()
+    rng = random.Random(seed)
+    # An even number of human clients, so nobody is left waiting for an opponent
+    humans = clients - round(clients * ai_fraction)
+    humans -= humans % 2
+    wants_ai = [True] * (clients - humans) + [False] * humans
+    rng.shuffle(wants_ai)
+    latencies = []
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            _simulated_client(server.host, server.port, flag, random.Random(rng.getrandbits(32)), latencies,
+                              server.rules)
+            for flag in wants_ai))
+    finally:
+        elapsed = time.perf_counter() - start
+        await server.close()
+    cores = 1 + server.ai_workers
+    return {
+        'clients': clients,
+        'matches': server.finished_matches,
+        'completed_clients': sum(1 for result in results if result),
+        'seconds': elapsed,
+        'turns': len(latencies),
+        'p50_turn_ms': _percentile(latencies, 0.50) * 1000,
+        'p99_turn_ms': _percentile(latencies, 0.99) * 1000,
+        'matches_per_second': server.finished_matches / elapsed if elapsed else 0.0,
+        'matches_per_core_second': server.finished_matches / elapsed / cores if elapsed else 0.0,
+        'cores': cores
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serveur de parties headless")
+    parser.add_argument("--host", default=NETWORK_HOST)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--size", type=int, default=None, help="grid width, the fleet is scaled to keep its density")
+    parser.add_argument("--load-test", type=int, default=0, metavar="CLIENTS",
+                        help="play simulated clients against a local server and print the report")
+    args = parser.parse_args()
+    rules = Rules.scaled(args.size) if args.size else None
+    if args.load_test:
+        for key, value in asyncio.run(run_load_test(args.load_test, ai_workers=args.workers, rules=rules)).items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    else:
+        print(f"Serving on {args.host}:{args.port}")
+        asyncio.run(MatchServer(args.host, args.port, args.workers, rules=rules).serve_forever())
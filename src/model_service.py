@@ -0,0 +1,257 @@
+import mmap
+import os
+import random
+import struct
+from array import array
+from bisect import bisect_left
+from src.ai import ReinforcementLearningAI, MODEL_PATH
+from src.board import Board
+
+# Packed table layout: header, sorted state keys, row offsets, move cells, values.
+# Every section starts on an 8-byte boundary so it can be viewed in place. Move cells are
+# row * width + col, with the grid width of the model's moves stored in the header.
+PACKED_MAGIC = b'BSQT'
+PACKED_VERSION = 2
+_HEADER = struct.Struct('<4sIQQII')
+
+
+def packed_path(model_path=MODEL_PATH):
+    """Location of the packed copy of a pickled model"""
+    return os.path.splitext(model_path)[0] + '.qtab'
+
+
+def _move_coords(move):
+    """(row, col) of a Q-table move, accepting the string tuples of old models, or None"""
+    if isinstance(move, str):
+        try:
+            move = tuple(int(n) for n in move.strip('()').split(','))
+        except ValueError:
+            return None
+    try:
+        row, col = move
+    except (TypeError, ValueError):
+        return None
+    if not (isinstance(row, int) and isinstance(col, int) and row >= 0 and col >= 0):
+        return None
+    return row, col
+
+
+def _pad(size):
+    return -size % 8
+
+
+class PackedQTable:
+    """Read-only Q-table memory-mapped from disk, shared by every game and process using it
+
+    It behaves like the dict the AI expects: `state in table` and `table[state].items()`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, states, entries, self.width, _ = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a packed Q-table")
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        self._keys = view[offset:offset + 8 * states].cast('Q')
+        offset += 8 * states
+        self._offsets = view[offset:offset + 8 * (states + 1)].cast('Q')
+        offset += 8 * (states + 1)
+        self._cells = view[offset:offset + 2 * entries].cast('H')
+        offset += 2 * entries + _pad(2 * entries)
+        self._values = view[offset:offset + 4 * entries].cast('f')
+        self.entries = entries
+
+    @staticmethod
+    def build(q_table, path):
+        """Write a Q-table dict to a packed file (replaced atomically)"""
+        # Keys of models saved before state_key() was stable cannot match anything: skip them
+        states = sorted(key for key in q_table if isinstance(key, int) and 0 <= key < 2 ** 64)
+        rows = []
+        for state in states:
+            moves = {}
+            for move, value in q_table[state].items():
+                coords = _move_coords(move)
+                if coords is not None:
+                    moves[coords] = value
+            rows.append(moves)
+        width = 1 + max((col for moves in rows for _, col in moves), default=0)
+
+        keys = array('Q')
+        offsets = array('Q', [0])
+        cells = array('H')
+        values = array('f')
+        for state, moves in zip(states, rows):
+            row = {r * width + c: value for (r, c), value in moves.items() if r * width + c < 2 ** 16}
+            if not row:
+                continue
+            keys.append(state)
+            for cell in sorted(row):
+                cells.append(cell)
+                values.append(row[cell])
+            offsets.append(len(cells))
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, len(keys), len(cells), width, 0))
+            keys.tofile(f)
+            offsets.tofile(f)
+            cells.tofile(f)
+            f.write(b'\0' * _pad(2 * len(cells)))
+            values.tofile(f)
+        os.replace(tmp_path, path)
+
+    def _index(self, state):
+        if not isinstance(state, int):
+            return -1
+        index = bisect_left(self._keys, state)
+        if index < len(self._keys) and self._keys[index] == state:
+            return index
+        return -1
+
+    def __contains__(self, state):
+        return self._index(state) >= 0
+
+    def __getitem__(self, state):
+        index = self._index(state)
+        if index < 0:
+            raise KeyError(state)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return {divmod(cell, self.width): value
+                for cell, value in zip(self._cells[start:end], self._values[start:end])}
+
+    def get(self, state, default=None):
+        return self[state] if state in self else default
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def nbytes(self):
+        return len(self._mmap)
+
+    def close(self):
+        for view in (self._keys, self._offsets, self._cells, self._values):
+            view.release()
+        self._mmap.close()
+
+
+def load_packed_table(model_path=MODEL_PATH):
+    """Map the packed copy of a model, rebuilding it first if the pickle is newer
+
+    Returns None when there is no model to serve.
+    """
+    path = packed_path(model_path)
+    if os.path.exists(model_path) and (not os.path.exists(path)
+                                       or os.path.getmtime(path) < os.path.getmtime(model_path)):
+        _pack_model(model_path, path)
+    if not os.path.exists(path):
+        return None
+    try:
+        return PackedQTable(path)
+    except ValueError:
+        # Packed by an older layout: pack the model again
+        if not os.path.exists(model_path):
+            return None
+        _pack_model(model_path, path)
+    try:
+        return PackedQTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _pack_model(model_path, path):
+    loader = ReinforcementLearningAI(Board(), q_table={})
+    loader.load_model(model_path)
+    PackedQTable.build(loader.q_table, path)
+
+
+class AISession:
+    """Per-game state served by a ModelService: the attacked board, targeting state and random stream"""
+
+    __slots__ = ('board', 'targeting', 'rng')
+
+    def __init__(self, board, rng=None):
+        self.board = board
+        self.targeting = None
+        self.rng = rng if rng is not None else random.Random()
+
+
+class ModelService:
+    """One read-only model serving the attacks of many concurrent games
+
+    Games open a session, queue move requests with request() and collect every answer on
+    the next tick(). A single AI engine plays each session in turn by swapping its
+    targeting state in and out, so the Q-table is held once whatever the number of games.
+    Sessions hunting on the same view share the engine's scored heatmap (its transposition
+    cache, keyed by the rules, the view and the smallest ship left) but each picks among the
+    best cells with its own stream, so a game's moves never depend on the other games.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, exploration_rate=0.0):
+        self.table = load_packed_table(model_path)
+        self.engine = ReinforcementLearningAI(Board(), exploration_rate=exploration_rate,
+                                              q_table=self.table if self.table is not None else {},
+                                              learn=False)
+        self.sessions = 0
+        self.requests = 0
+        self.shared = 0
+        self._pending = []
+
+    def open_session(self, board, rng=None):
+        """Start serving a game whose attacked board is `board`, drawing from `rng`"""
+        self.sessions += 1
+        return AISession(board, rng)
+
+    def close_session(self, session):
+        self.sessions -= 1
+
+    def _use(self, session):
+        self.engine.player_board = session.board
+        self.engine.rng = session.rng
+        if session.targeting is None:
+            self.engine.reset_game_state()
+        else:
+            self.engine.set_targeting_state(session.targeting)
+
+    def request(self, session):
+        """Queue a move request for the next tick"""
+        self._pending.append(session)
+
+    def tick(self):
+        """Answer every queued request, returning (session, (row, col)) pairs"""
+        pending, self._pending = self._pending, []
+        cache_hits = self.engine.transpositions.hits
+        answers = []
+        for session in pending:
+            self._use(session)
+            answers.append((session, self.engine.get_attack_coordinates()))
+            session.targeting = self.engine.get_targeting_state()
+        self.requests += len(pending)
+        self.shared += self.engine.transpositions.hits - cache_hits
+        return answers
+
+    def get_attack_coordinates(self, session):
+        """Answer one request immediately"""
+        self.request(session)
+        return self.tick()[-1][1]
+
+    def register_result(self, session, row, col, hit, sunk=None):
+        """Update the targeting state of a session after its shot was resolved (sunk: size of the ship sunk)"""
+        self._use(session)
+        self.engine.register_result(row, col, hit, sunk)
+        session.targeting = self.engine.get_targeting_state()
+
+    def stats(self):
+        """Return session, request and table counters"""
+        return {
+            'sessions': self.sessions,
+            'requests': self.requests,
+            'shared': self.shared,
+            'states': len(self.engine.q_table),
+            'table_bytes': self.table.nbytes if self.table is not None else 0
+        }
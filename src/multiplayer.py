@@ -1,14 +1,20 @@
-import pygame
 from src.board import Board
 from src.ship import Ship
-from src.utils.constants import GRID_SIZE, SHIPS
+from src.record import GameRecorder
+from src.rules import DEFAULT_RULES
+from src.sync import BoardEventLog
+from src.utils.constants import GAME_RECORDS_DIR
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
 
 class LocalMultiplayer:
     """Manages local multiplayer mode where two players use the same machine."""
     
-    def __init__(self):
-        self.player1_board = Board()
-        self.player2_board = Board()
+    def __init__(self, rules=None):
+        self.rules = rules or DEFAULT_RULES
+        self.player1_board = Board(self.rules)
+        self.player2_board = Board(self.rules)
         self.current_player = 1  # 1 = Player 1's turn, 2 = Player 2's turn
         self.placement_phase = True  # True during ship placement, False during battle
         self.player1_ships_placed = False
@@ -20,10 +26,15 @@ class LocalMultiplayer:
         self.transition_timer = 0
         self.transition_duration = 180  # 3 seconds at 60 FPS
         self.transition_message = ""
+        self.record_games = GAME_RECORDS_DIR is not None
+        self.recorder = None
+        # Shots received by each player's board, the same event stream as networked games
+        self.event_logs = {1: BoardEventLog(self.player1_board), 2: BoardEventLog(self.player2_board)}
     
     def reset(self):
         """Reset the game state for a new game."""
-        self.__init__()
+        self.finish_recording()
+        self.__init__(self.rules)
     
     def switch_player(self):
         """Switch the active player and show transition screen."""
@@ -46,14 +57,14 @@ class LocalMultiplayer:
         """Update transition screen timer."""
         if self.transition_screen:
             self.transition_timer -= 1
-            print(f"Transition timer: {self.transition_timer}")  # Debug
+            log.debug("Transition timer: %d", self.transition_timer)
             if self.transition_timer <= 0:
                 self.transition_screen = False
-                print("Transition ended")  # Debug
+                log.debug("Transition ended")
                 
                 # Important: Si on a fini la phase de placement, passons immédiatement à la phase de jeu
                 if not self.placement_phase and self.current_player == 1:
-                    print("Starting game phase")  # Debug
+                    log.debug("Starting game phase")
     
     def get_current_board(self):
         """Return the current player's board."""
@@ -75,8 +86,8 @@ class LocalMultiplayer:
         ship_name = ""
         ship_size = 0
         
-        # Find the corresponding ship in SHIPS
-        for ship_info in SHIPS:
+        # Find the corresponding ship in the fleet
+        for ship_info in self.rules.ships:
             if ship_info["size"] == ship_data:
                 ship_name = ship_info["name"]
                 ship_size = ship_info["size"]
@@ -105,19 +116,19 @@ class LocalMultiplayer:
             if self.current_player == 1:
                 self.player1_ships.append(ship_info)
                 # Check if all ships are placed
-                if len(self.player1_ships) == len(SHIPS):  # Utiliser len(SHIPS) au lieu d'une valeur fixe
-                    print("Player 1 has placed all ships")  # Debug
+                if len(self.player1_ships) == len(self.rules.ships):
+                    log.debug("Player 1 has placed all ships")
                     self.player1_ships_placed = True
                     self.switch_player()
             else:
                 self.player2_ships.append(ship_info)
                 # Check if all ships are placed
-                if len(self.player2_ships) == len(SHIPS):  # Utiliser len(SHIPS) au lieu d'une valeur fixe
-                    print("Player 2 has placed all ships")  # Debug
+                if len(self.player2_ships) == len(self.rules.ships):
+                    log.debug("Player 2 has placed all ships")
                     self.player2_ships_placed = True
                     self.switch_player()
                 
-            print(f"Ship placed: {ship_name} at ({row},{col}). Current player: {self.current_player}")  # Debug
+            log.debug("Ship placed: %s at (%d,%d)", ship_name, row, col, player=self.current_player)
             
         return result
     
@@ -125,32 +136,14 @@ class LocalMultiplayer:
         """Handle attack from current player to opponent's board."""
         target_board = self.get_opponent_board()
         
-        # Check if the cell has already been attacked
-        if target_board.view[row][col] != '.':
+        # Attack through the target's event log (None if the cell has already been attacked)
+        event = self.event_logs[3 - self.current_player].attack(row, col)
+        if event is None:
             return False, False
+        hit = bool(event['hit'])
         
-        # Get the grid value at that position before attack
-        has_ship = target_board.grid[row][col] == 'S'
-        
-        # Process the attack by modifying ONLY the target board's view, not the grid
-        if has_ship:
-            # Mark as hit in view, but don't modify the actual grid
-            target_board.view[row][col] = 'X'
-            hit = True
-        else:
-            # Mark as miss in view
-            target_board.view[row][col] = 'O'
-            hit = False
-        
-        # Check for victory by counting remaining ships
-        ships_remaining = 0
-        for r in range(len(target_board.grid)):
-            for c in range(len(target_board.grid[r])):
-                # Check if there's a ship that hasn't been hit yet
-                if target_board.grid[r][c] == 'S' and target_board.view[r][c] != 'X':
-                    ships_remaining += 1
-        
-        victory = ships_remaining == 0
+        victory = target_board.all_ships_sunk()
+        self._record_shot(row, col, hit, victory)
         
         if victory:
             self.winner = f"player{self.current_player}"
@@ -158,4 +151,30 @@ class LocalMultiplayer:
             # Switch players only on miss
             self.switch_player()
             
-        return hit, victory
\ No newline at end of file
+        return hit, victory
+    
+    def _record_shot(self, row, col, hit, victory):
+        """Append the shot to the game record, starting it on the first shot"""
+        shooter = f"player{self.current_player}"
+        target = f"player{3 - self.current_player}"
+        if not self.record_games:
+            return
+        try:
+            if self.recorder is None:
+                self.recorder = GameRecorder("multi", directory=GAME_RECORDS_DIR)
+                self.recorder.start({"player1": self.player1_ships, "player2": self.player2_ships})
+            self.recorder.record_shot(shooter, target, row, col, hit)
+        except Exception as e:
+            log.error("Error recording game: %s", e)
+            self.record_games = False
+        if victory:
+            self.finish_recording(shooter)
+
+    def finish_recording(self, winner=None):
+        """Close the game record; a game left before its end has no winner"""
+        if self.recorder is not None:
+            try:
+                self.recorder.finish(winner)
+            except Exception as e:
+                log.error("Error recording game: %s", e)
+            self.recorder = None
@@ -0,0 +1,423 @@
+import asyncio
+import itertools
+import json
+import queue
+import threading
+from src.board import Board
+from src.record import fleet_from_board
+from src.ship import Ship
+from src.sync import BoardEventLog, BoardMirror
+from src.rules import DEFAULT_RULES
+from src.utils.constants import NETWORK_HOST, NETWORK_PORT
+
+# Protocol: one compact JSON object per line. Fleets are sent once; each turn only
+# carries a shot ("shot") and its authoritative result ("result"), which is a shot event
+# of src.sync. A client that detects a desync sends {"t": "resync", "b": board owner,
+# "s": its seq} and gets back a "sync" message with the missing events or a snapshot.
+
+
+def encode(message):
+    """Serialize a protocol message to a line of bytes"""
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+def decode(line):
+    """Parse a protocol line, returning None for garbage"""
+    try:
+        message = json.loads(line)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def board_from_network_fleet(fleet, rules=None):
+    """Build a board from a fleet sent by a client, or None if it breaks the rules"""
+    rules = rules or DEFAULT_RULES
+    if not isinstance(fleet, list):
+        return None
+    try:
+        if sorted(ship['size'] for ship in fleet) != sorted(ship['size'] for ship in rules.ships):
+            return None
+        board = Board(rules)
+        for ship_info in fleet:
+            ship = Ship(str(ship_info['name']), int(ship_info['size']))
+            if not board.place_ship(ship, int(ship_info['row']), int(ship_info['col']), bool(ship_info['horizontal'])):
+                return None
+        return board
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class _Seat:
+    """One connected player on the server"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.board = None
+        self.log = None
+        self.match = None
+        self.player = None
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode(message))
+
+
+class _Match:
+    """Authoritative state of one networked game"""
+
+    def __init__(self, match_id, first, second):
+        self.id = match_id
+        self.seats = {1: first, 2: second}
+        self.turn = 1
+        self.winner = None
+        for player, seat in self.seats.items():
+            seat.match = self
+            seat.player = player
+
+    @property
+    def started(self):
+        return self.seats[1].board is not None and self.seats[2].board is not None
+
+    def broadcast(self, message):
+        for seat in self.seats.values():
+            seat.send(message)
+
+
+class RelayServer:
+    """Asyncio TCP server pairing clients two by two and validating every shot
+
+    With a SpectatorPublisher, every match is also streamed to spectators.
+    """
+
+    def __init__(self, host=NETWORK_HOST, port=NETWORK_PORT, publisher=None, rules=None):
+        self.host = host
+        self.port = port
+        self.publisher = publisher
+        self.rules = rules or DEFAULT_RULES
+        self._server = None
+        self._waiting = None
+        self._match_ids = itertools.count(1)
+
+    async def start(self):
+        """Start listening; port 0 picks a free port, available afterwards in self.port"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        seat = _Seat(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = decode(line)
+                if message is None:
+                    seat.send({'t': 'error', 'msg': 'bad message'})
+                    continue
+                self._dispatch(seat, message)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._leave(seat)
+            writer.close()
+
+    def _dispatch(self, seat, message):
+        kind = message.get('t')
+        if kind == 'join':
+            self._join(seat)
+        elif kind == 'fleet':
+            self._fleet(seat, message.get('ships'))
+        elif kind == 'shot':
+            self._shot(seat, message.get('r'), message.get('c'))
+        elif kind == 'resync':
+            self._resync(seat, message.get('b'), message.get('s'))
+        else:
+            seat.send({'t': 'error', 'msg': 'unknown message'})
+
+    def _join(self, seat):
+        if seat.match is not None or seat is self._waiting:
+            return
+        if self._waiting is None:
+            self._waiting = seat
+            seat.send({'t': 'wait'})
+            return
+        match = _Match(f"relay-{next(self._match_ids)}", self._waiting, seat)
+        self._waiting = None
+        for player, other in match.seats.items():
+            other.send({'t': 'joined', 'p': player})
+        if match.started:
+            self._start(match)
+
+    def _fleet(self, seat, ships):
+        # Fleets may arrive before an opponent has been found
+        if seat.board is not None:
+            seat.send({'t': 'error', 'msg': 'fleet already received'})
+            return
+        board = board_from_network_fleet(ships, self.rules)
+        if board is None:
+            seat.send({'t': 'error', 'msg': 'invalid fleet'})
+            return
+        seat.board = board
+        seat.log = BoardEventLog(board)
+        if seat.match is not None and seat.match.started:
+            self._start(seat.match)
+
+    def _start(self, match):
+        match.broadcast({'t': 'start', 'turn': match.turn})
+        if self.publisher is not None:
+            self.publisher.open_game(match.id, {'kind': 'human'}, rules=self.rules)
+
+    def _shot(self, seat, row, col):
+        match = seat.match
+        if match is None or not match.started or match.winner is not None:
+            seat.send({'t': 'error', 'msg': 'game not running'})
+            return
+        if match.turn != seat.player:
+            seat.send({'t': 'error', 'msg': 'not your turn'})
+            return
+        if not isinstance(row, int) or not isinstance(col, int) or not self.rules.in_bounds(row, col):
+            seat.send({'t': 'error', 'msg': 'shot out of range'})
+            return
+        target = match.seats[3 - seat.player]
+        event = target.log.attack(row, col)
+        if event is None:
+            seat.send({'t': 'error', 'msg': 'cell already attacked'})
+            return
+
+        hit = bool(event['hit'])
+        win = hit and target.board.all_ships_sunk()
+        if win:
+            match.winner = seat.player
+        elif not hit:
+            # Same rule as LocalMultiplayer: the shooter plays again after a hit
+            match.turn = 3 - seat.player
+        match.broadcast(dict(event, t='result', p=seat.player, turn=match.turn, win=int(win)))
+        if self.publisher is not None:
+            self.publisher.publish(match.id, str(target.player), event)
+            if win:
+                self.publisher.close_game(match.id, str(seat.player))
+
+    def _resync(self, seat, owner, seq):
+        match = seat.match
+        # Checked before the lookup: an unhashable owner would raise in `owner in match.seats`
+        if match is None or not isinstance(owner, int) or owner not in match.seats \
+                or not isinstance(seq, int) or match.seats[owner].log is None:
+            seat.send({'t': 'error', 'msg': 'cannot resync'})
+            return
+        seat.send(dict(match.seats[owner].log.sync_message(seq), t='sync', b=owner))
+
+    def _leave(self, seat):
+        if self._waiting is seat:
+            self._waiting = None
+        match = seat.match
+        if match is not None and match.winner is None:
+            match.winner = 3 - seat.player
+            match.seats[3 - seat.player].send({'t': 'left'})
+            if self.publisher is not None:
+                self.publisher.close_game(match.id, str(match.winner))
+
+
+class NetworkClient:
+    """Non-blocking client: the socket lives on a background asyncio loop, the game polls a queue"""
+
+    def __init__(self, host=NETWORK_HOST, port=NETWORK_PORT):
+        self.host = host
+        self.port = port
+        self.incoming = queue.Queue()
+        self._loop = None
+        self._thread = None
+        self._future = None
+        self._writer = None
+        self._outbox = []
+
+    def connect(self):
+        """Start the network thread; messages sent before the connection is up are queued"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._future = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+
+    async def _run(self):
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError as e:
+            self.incoming.put({'t': 'error', 'msg': str(e)})
+            self.incoming.put({'t': 'closed'})
+            self._loop.stop()
+            return
+        self._writer = writer
+        for message in self._outbox:
+            writer.write(encode(message))
+        self._outbox = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = decode(line)
+                if message is not None:
+                    self.incoming.put(message)
+        except ConnectionError:
+            pass
+        finally:
+            self._writer = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, asyncio.CancelledError):
+                pass
+            self.incoming.put({'t': 'closed'})
+            self._loop.stop()
+
+    def _send_now(self, message):
+        if self._writer is None:
+            self._outbox.append(message)
+        elif not self._writer.is_closing():
+            self._writer.write(encode(message))
+
+    def send(self, message):
+        """Queue a message for sending; never blocks (dropped once the client is closed)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._send_now, message)
+
+    def poll(self):
+        """Return every message received since the last call; never blocks"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.incoming.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def _shutdown(self):
+        # Runs on the loop: cancel the connection, then stop the loop once it has wound down
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        asyncio.gather(*tasks, return_exceptions=True).add_done_callback(lambda _: self._loop.stop())
+
+    def close(self):
+        """Close the connection, stop the network thread and close its event loop"""
+        if self._loop is None:
+            return
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._shutdown)
+            self._thread.join(timeout=2)
+        if not self._thread.is_alive():
+            self._loop.close()
+        self._loop = None
+        self._future = None
+
+
+class NetworkMultiplayer:
+    """Client side of a networked game: own board with ships, opponent board known only through results"""
+
+    def __init__(self, host=NETWORK_HOST, port=NETWORK_PORT):
+        self.player_board = None
+        self.opponent_board = None
+        self.mirrors = {}
+        self.client = NetworkClient(host, port)
+        self.player = None
+        self.started = False
+        self.turn = None
+        self.pending = False
+        self.winner = None
+        self.connected = True
+        self.status = "Connexion au serveur..."
+        self.client.connect()
+        self.client.send({'t': 'join'})
+
+    def send_fleet(self, player_board, opponent_board):
+        """Send the fleet of our board once placement is done; results are applied to these boards"""
+        self.player_board = player_board
+        self.opponent_board = opponent_board
+        self.mirrors = {'own': BoardMirror(player_board), 'opponent': BoardMirror(opponent_board)}
+        self.client.send({'t': 'fleet', 'ships': fleet_from_board(player_board)})
+        self.status = "En attente de l'adversaire..."
+
+    def is_my_turn(self):
+        return (self.started and self.connected and self.winner is None and self.turn == self.player
+                and not self.pending)
+
+    def attack(self, row, col):
+        """Send a shot; the result arrives later through poll(). Returns False if not allowed now"""
+        if not self.is_my_turn() or self.opponent_board.view[row][col] != '.':
+            return False
+        self.pending = True
+        self.client.send({'t': 'shot', 'r': row, 'c': col})
+        return True
+
+    def poll(self):
+        """Apply every message received since the last frame and return them"""
+        messages = self.client.poll()
+        for message in messages:
+            kind = message.get('t')
+            if kind == 'wait':
+                self.status = "En attente d'un adversaire..."
+            elif kind == 'joined':
+                self.player = message['p']
+                self.status = f"Vous êtes le Joueur {self.player}"
+            elif kind == 'start':
+                self.started = True
+                self.turn = message['turn']
+                self.status = "Partie en cours"
+            elif kind == 'result':
+                ours = message['p'] == self.player
+                if ours:
+                    self.pending = False
+                self._apply_event('opponent' if ours else 'own', message)
+                self.turn = message['turn']
+                if message['win']:
+                    self.winner = "player" if message['p'] == self.player else "computer"
+            elif kind == 'sync':
+                side = 'own' if message.get('b') == self.player else 'opponent'
+                if side in self.mirrors and not self.mirrors[side].apply_sync(message):
+                    self._request_resync(side)
+            elif kind == 'error':
+                self.pending = False
+                self.status = f"Erreur réseau : {message.get('msg')}"
+            elif kind in ('left', 'closed') and self.winner is None:
+                self.status = "Adversaire déconnecté" if kind == 'left' else "Connexion perdue"
+                if kind == 'left' and self.started:
+                    self.winner = "player"
+                elif kind == 'closed':
+                    self.connected = False
+        return messages
+
+    def _apply_event(self, side, event):
+        """Apply a shot event to one of our boards, asking for a resync if it does not fit"""
+        mirror = self.mirrors.get(side)
+        if mirror is None or mirror.desynced:
+            return  # The pending resync answer already includes this event
+        if not mirror.apply(event):
+            self._request_resync(side)
+
+    def _request_resync(self, side):
+        owner = self.player if side == 'own' else 3 - self.player
+        self.client.send({'t': 'resync', 'b': owner, 's': self.mirrors[side].seq})
+
+    def close(self):
+        self.client.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serveur relais pour la bataille navale en réseau")
+    parser.add_argument("--host", default=NETWORK_HOST)
+    parser.add_argument("--port", type=int, default=NETWORK_PORT)
+    args = parser.parse_args()
+    print(f"Serving on {args.host}:{args.port}")
+    asyncio.run(RelayServer(args.host, args.port).serve_forever())
@@ -0,0 +1,138 @@
+import itertools
+import os
+from src.rules import DEFAULT_RULES
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "assets", "ai", "opening_book.json")
+
+
+def grid_symmetries(grid_size):
+    """Cell permutations for the 8 rotations/reflections of a square grid"""
+    n = grid_size - 1
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - r),
+        lambda r, c: (n - r, n - c),
+        lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c),
+        lambda r, c: (n - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - c, n - r),
+    ]
+    perms = []
+    for transform in transforms:
+        perm = [0] * (grid_size * grid_size)
+        for r in range(grid_size):
+            for c in range(grid_size):
+                tr, tc = transform(r, c)
+                perm[r * grid_size + c] = tr * grid_size + tc
+        perms.append(perm)
+    inverses = []
+    for perm in perms:
+        inverse = [0] * len(perm)
+        for cell, moved in enumerate(perm):
+            inverse[moved] = cell
+        inverses.append(inverse)
+    return perms, inverses
+
+
+def _ship_sizes(rules):
+    return [ship['size'] for ship in rules.ships]
+
+
+class OpeningBook:
+    """Precomputed ranked first moves for early all-miss views, keyed up to board symmetry"""
+
+    def __init__(self, entries=None, depth=0, rules=DEFAULT_RULES):
+        if rules.width != rules.height:
+            raise ValueError("Opening books are keyed up to the symmetries of a square grid")
+        self.entries = entries or {}
+        self.depth = depth
+        self.rules = rules
+        self.grid_size = rules.width
+        self._perms, self._inverses = grid_symmetries(self.grid_size)
+
+    def matches(self, rules):
+        """Whether the book was built for these rules"""
+        return (rules.width == rules.height == self.grid_size
+                and _ship_sizes(rules) == _ship_sizes(self.rules))
+
+    def canonical(self, cells):
+        """Return (key, symmetry index) of the smallest symmetric image of a set of cells"""
+        best = None
+        for index, perm in enumerate(self._perms):
+            image = tuple(sorted(perm[cell] for cell in cells))
+            if best is None or image < best[0]:
+                best = (image, index)
+        return ','.join(str(cell) for cell in best[0]), best[1]
+
+    def lookup(self, misses):
+        """Return ranked (row, col) moves for a view whose only shots are these misses, or None"""
+        if len(misses) > self.depth:
+            return None
+        key, index = self.canonical([r * self.grid_size + c for r, c in misses])
+        ranked = self.entries.get(key)
+        if ranked is None:
+            return None
+        inverse = self._inverses[index]
+        return [divmod(inverse[cell], self.grid_size) for cell in ranked]
+
+    def save(self, path=BOOK_PATH):
+        """Write the book as a small JSON file"""
+        import json
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'grid_size': self.grid_size, 'depth': self.depth,
+                       'ships': _ship_sizes(self.rules), 'book': self.entries},
+                      f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path=BOOK_PATH, rules=DEFAULT_RULES):
+        """Load the book for these rules; an empty book is returned if the file is missing or made for other rules"""
+        import json  # Only loading a book needs the JSON decoder, keep it out of the AI's import
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data['grid_size'] != rules.width or data['ships'] != _ship_sizes(rules):
+                return cls(rules=rules)
+            return cls(data['book'], data['depth'], rules)
+        except Exception:
+            return cls(rules=rules)
+
+
+def build_opening_book(depth=2, moves_per_state=8, rules=DEFAULT_RULES):
+    """Rank moves for every canonical view with up to `depth` misses using the density engine"""
+    import numpy as np
+    from src.simulator import BatchSimulator, DensityBatchPolicy
+
+    book = OpeningBook(depth=depth, rules=rules)
+    num_cells = rules.num_cells
+    states = {}
+    for shots in range(depth + 1):
+        for cells in itertools.combinations(range(num_cells), shots):
+            key, index = book.canonical(cells)
+            if key not in states:
+                states[key] = [int(cell) for cell in key.split(',')] if key else []
+
+    # Score every canonical view in one batch; fleets are irrelevant to the density
+    keys = list(states)
+    sim = BatchSimulator(len(keys), rules=rules, seed=0)
+    for game, key in enumerate(keys):
+        sim.shots[game, states[key]] = True
+    scores = DensityBatchPolicy(seed=0).density(sim)
+    scores[sim.shots] = -1.0
+
+    for game, key in enumerate(keys):
+        ranked = np.argsort(-scores[game], kind='stable')[:moves_per_state]
+        book.entries[key] = [int(cell) for cell in ranked]
+    return book
+
+
+_default_book = None
+
+def default_book():
+    """Shared book loaded from the assets on first use"""
+    global _default_book
+    if _default_book is None:
+        _default_book = OpeningBook.load()
+    return _default_book
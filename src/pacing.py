@@ -0,0 +1,52 @@
+import pygame
+
+# Frame pacing of the game window. Timers, effects and messages count frames of FPS, so the
+# loop keeps the full rate while any of them runs and for a moment after each input. Once
+# the screen is static it blocks in pygame.event.wait instead: an event wakes it at once,
+# otherwise a frame is still drawn at the idle rate so that work finishing in the background
+# (network messages, the computer's move) is picked up.
+# Looping animations (fires, water) keep the full rate while the window has the focus and
+# drop to the idle rate behind other windows; they advance by the frames of FPS that really
+# elapsed (`steps`), so they play at the same speed at any rate.
+
+
+class FramePacer:
+    """Paces the main loop: full rate while busy, woken by events while idle"""
+
+    def __init__(self, fps, idle_fps, grace_ms=500):
+        self.fps = fps
+        self.idle_ms = int(1000 / idle_fps)
+        self.grace_ms = grace_ms
+        self.clock = pygame.time.Clock()
+        self.pending = []
+        self.last_input = self.last_frame = pygame.time.get_ticks()
+        self.steps = 1  # Frames of FPS the last frame lasted
+
+    def events(self):
+        """Events received since the last frame, including the one that woke an idle wait"""
+        events = self.pending + pygame.event.get()
+        self.pending = []
+        if events:
+            self.last_input = pygame.time.get_ticks()
+        return events
+
+    def focused(self):
+        return pygame.display.get_active() and pygame.key.get_focused()
+
+    def wait(self, busy, animating=False):
+        """Wait until the next frame is due
+
+        `busy`: something counts frames and needs the full rate; `animating`: only looping
+        animations play, at full rate while the window has the focus.
+        """
+        now = pygame.time.get_ticks()
+        if busy or now - self.last_input < self.grace_ms or (animating and self.focused()):
+            self.clock.tick(self.fps)
+        else:
+            event = pygame.event.wait(self.idle_ms)
+            if event.type != pygame.NOEVENT:
+                self.pending.append(event)
+            self.clock.tick()
+        now = pygame.time.get_ticks()
+        self.steps = max(1, round((now - self.last_frame) * self.fps / 1000))
+        self.last_frame = now
@@ -62,23 +62,24 @@ def handle_placement(screen, game_state, fonts, assets, ship_images, player_x=No
         row = int((mouse_pos[1] - player_y) // cell_size)
         
         # Check if ship can be placed here
+        rules = game_state.player_board.rules
         valid_placement = True
         preview_coords = []
         if game_state.horizontal:
-            if col + current_ship['size'] > 10:  # Out of bounds check
+            if col + current_ship['size'] > rules.width:  # Out of bounds check
                 valid_placement = False
             else:
                 for i in range(current_ship['size']):
-                    if row < 0 or row >= 10 or col + i < 0 or col + i >= 10 or game_state.player_board.grid[row][col + i] == 'S':
+                    if row < 0 or row >= rules.height or col + i < 0 or col + i >= rules.width or game_state.player_board.grid[row][col + i] == 'S':
                         valid_placement = False
                         break
                     preview_coords.append((row, col + i))
         else:  # Vertical
-            if row + current_ship['size'] > 10:  # Out of bounds check
+            if row + current_ship['size'] > rules.height:  # Out of bounds check
                 valid_placement = False
             else:
                 for i in range(current_ship['size']):
-                    if row + i < 0 or row + i >= 10 or col < 0 or col >= 10 or game_state.player_board.grid[row + i][col] == 'S':
+                    if row + i < 0 or row + i >= rules.height or col < 0 or col >= rules.width or game_state.player_board.grid[row + i][col] == 'S':
                         valid_placement = False
                         break
                     preview_coords.append((row + i, col))
@@ -110,6 +111,7 @@ def handle_placement(screen, game_state, fonts, assets, ship_images, player_x=No
     # Handle mouse clicks for placement
     for event in events:  # Utilisez les événements passés en paramètre
         if event.type == pygame.QUIT:
+            game_state.close()
             pygame.quit()
             sys.exit()
         if event.type == pygame.KEYDOWN and event.key == pygame.K_r and game_state.rotation_cooldown == 0:
@@ -180,6 +182,7 @@ def handle_multiplayer_placement(screen, game_state, fonts, assets, ship_images,
         # Important: Process events here to continue counting down even during transition
         for event in events:  # Utilisez les événements passés en paramètre
             if event.type == pygame.QUIT:
+                game_state.close()
                 pygame.quit()
                 sys.exit()
         
@@ -244,21 +247,22 @@ def handle_multiplayer_placement(screen, game_state, fonts, assets, ship_images,
         col = int((mouse_pos[0] - player_x) // cell_size)
         row = int((mouse_pos[1] - player_y) // cell_size)
         
+        rules = current_board.rules
         valid_placement = True
         if game_state.horizontal:
-            if col + current_ship['size'] > 10:
+            if col + current_ship['size'] > rules.width:
                 valid_placement = False
             else:
                 for i in range(current_ship['size']):
-                    if row < 0 or row >= 10 or col + i < 0 or col + i >= 10 or current_board.grid[row][col + i] == 'S':
+                    if row < 0 or row >= rules.height or col + i < 0 or col + i >= rules.width or current_board.grid[row][col + i] == 'S':
                         valid_placement = False
                         break
         else:  # Vertical
-            if row + current_ship['size'] > 10:
+            if row + current_ship['size'] > rules.height:
                 valid_placement = False
             else:
                 for i in range(current_ship['size']):
-                    if row + i < 0 or row + i >= 10 or col < 0 or col >= 10 or current_board.grid[row + i][col] == 'S':
+                    if row + i < 0 or row + i >= rules.height or col < 0 or col >= rules.width or current_board.grid[row + i][col] == 'S':
                         valid_placement = False
                         break
         
@@ -288,6 +292,7 @@ def handle_multiplayer_placement(screen, game_state, fonts, assets, ship_images,
     # Handle mouse clicks for placement
     for event in events:  # Utilisez les événements passés en paramètre
         if event.type == pygame.QUIT:
+            game_state.close()
             pygame.quit()
             sys.exit()
         if event.type == pygame.KEYDOWN and event.key == pygame.K_r and game_state.rotation_cooldown == 0:
@@ -0,0 +1,245 @@
+import heapq
+import sys
+from array import array
+
+# Q-values of the learning AI, bounded in memory. Each state owns a slot holding its moves
+# and values in two packed arrays, plus a visit count and the epoch (game) it was last
+# used in. When the table is full, the slots with the lowest visit counts, halved for
+# every `half_life` epochs since their last use, are evicted in one batch.
+
+DEFAULT_CAPACITY = 200000
+
+
+def _pack_move(move):
+    """Encode a (row, col) move in one unsigned int"""
+    row, col = move
+    return row << 16 | col
+
+
+def _unpack_move(code):
+    return (code >> 16, code & 0xFFFF)
+
+
+def _parse_move(move):
+    """(row, col) of a move, accepting the string tuples of old models; None if invalid"""
+    if isinstance(move, str):
+        try:
+            move = tuple(int(n) for n in move.strip('()').split(','))
+        except ValueError:
+            return None
+    try:
+        row, col = move
+    except (TypeError, ValueError):
+        return None
+    if not (0 <= row < 1 << 16 and 0 <= col < 1 << 16):
+        return None
+    return (row, col)
+
+
+class QTable:
+    """Capacity-bounded state -> {move: value} store with LFU/LRU eviction
+
+    It reads like the dict the AI used before (`state in table`, `table[state].items()`),
+    and counts lookups, visits and evictions for stats().
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, half_life=8, evict_fraction=1 / 16):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.evict_batch = max(1, int(capacity * evict_fraction))
+        self.epoch = 0
+        self._slots = {}
+        self._states = []
+        self._moves = []
+        self._values = []
+        self._visits = array('I')
+        self._seen = array('I')
+        self._free = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_dict(cls, table, capacity=DEFAULT_CAPACITY, **options):
+        """Build a table from a dict-of-dicts Q-table (the format of older models)"""
+        qtable = cls(max(capacity, len(table)), **options)
+        for state, row in table.items():
+            for move, value in row.items():
+                move = _parse_move(move)
+                if move is not None:
+                    qtable.set(state, move, value)
+        return qtable
+
+    def advance_epoch(self):
+        """Start a new epoch (one game); recency is measured in epochs"""
+        self.epoch += 1
+
+    def _slot(self, state, create=False):
+        slot = self._slots.get(state)
+        if slot is None and create:
+            if len(self._slots) >= self.capacity:
+                self._evict()
+            if self._free:
+                slot = self._free.pop()
+                self._states[slot] = state
+                self._moves[slot] = array('I')
+                self._values[slot] = array('f')
+                self._visits[slot] = 0
+                self._seen[slot] = self.epoch
+            else:
+                slot = len(self._states)
+                self._states.append(state)
+                self._moves.append(array('I'))
+                self._values.append(array('f'))
+                self._visits.append(0)
+                self._seen.append(self.epoch)
+            self._slots[state] = slot
+        return slot
+
+    def _evict(self):
+        """Drop the least valuable batch of states"""
+        decay = 0.5 ** (1 / self.half_life)
+        victims = heapq.nsmallest(
+            self.evict_batch, self._slots.values(),
+            key=lambda slot: self._visits[slot] * decay ** (self.epoch - self._seen[slot]))
+        for slot in victims:
+            del self._slots[self._states[slot]]
+            self._states[slot] = None
+            self._moves[slot] = None
+            self._values[slot] = None
+            self._free.append(slot)
+        self.evictions += len(victims)
+
+    def _touch(self, slot):
+        self._visits[slot] = min(self._visits[slot] + 1, 0xFFFFFFFF)
+        self._seen[slot] = self.epoch
+
+    def _row(self, slot):
+        return {_unpack_move(code): value for code, value in zip(self._moves[slot], self._values[slot])}
+
+    def get(self, state, default=None):
+        """Move values of a state, counted as a visit; `default` if the state is unknown"""
+        slot = self._slots.get(state)
+        if slot is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._touch(slot)
+        return self._row(slot)
+
+    def __contains__(self, state):
+        return state in self._slots
+
+    def __getitem__(self, state):
+        slot = self._slots.get(state)
+        if slot is None:
+            raise KeyError(state)
+        return self._row(slot)
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def keys(self):
+        return self._slots.keys()
+
+    def items(self):
+        return ((state, self._row(slot)) for state, slot in self._slots.items())
+
+    def value(self, state, move, default=0.0):
+        slot = self._slots.get(state)
+        if slot is None:
+            return default
+        moves = self._moves[slot]
+        code = _pack_move(move)
+        for index in range(len(moves)):
+            if moves[index] == code:
+                return self._values[slot][index]
+        return default
+
+    def set(self, state, move, value):
+        """Store the value of a move, adding the state (and evicting others) if needed"""
+        slot = self._slot(state, create=True)
+        moves = self._moves[slot]
+        code = _pack_move(move)
+        for index in range(len(moves)):
+            if moves[index] == code:
+                self._values[slot][index] = value
+                return
+        moves.append(code)
+        self._values[slot].append(value)
+
+    def update(self, state, move, target, learning_rate):
+        """Move the value of a move towards `target` (a Q-learning step) and count the visit"""
+        slot = self._slot(state, create=True)
+        self._touch(slot)
+        moves = self._moves[slot]
+        values = self._values[slot]
+        code = _pack_move(move)
+        for index in range(len(moves)):
+            if moves[index] == code:
+                values[index] += learning_rate * (target - values[index])
+                return
+        moves.append(code)
+        values.append(learning_rate * target)
+
+    def __getstate__(self):
+        # Saved models hold live slots only, with every row packed end to end
+        slots = list(self._slots.values())
+        lengths = array('I', (len(self._moves[slot]) for slot in slots))
+        moves = array('I')
+        values = array('f')
+        for slot in slots:
+            moves.extend(self._moves[slot])
+            values.extend(self._values[slot])
+        return {
+            'capacity': self.capacity, 'half_life': self.half_life, 'evict_batch': self.evict_batch,
+            'epoch': self.epoch, 'states': [self._states[slot] for slot in slots],
+            'visits': array('I', (self._visits[slot] for slot in slots)),
+            'seen': array('I', (self._seen[slot] for slot in slots)),
+            'lengths': lengths.tobytes(), 'moves': moves.tobytes(), 'values': values.tobytes()
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['capacity'], state['half_life'])
+        self.evict_batch = state['evict_batch']
+        self.epoch = state['epoch']
+        lengths = array('I', state['lengths'])
+        moves = array('I', state['moves'])
+        values = array('f', state['values'])
+        self._states = state['states']
+        self._visits = state['visits']
+        self._seen = state['seen']
+        start = 0
+        for slot, (key, length) in enumerate(zip(self._states, lengths)):
+            self._slots[key] = slot
+            self._moves.append(moves[start:start + length])
+            self._values.append(values[start:start + length])
+            start += length
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the table"""
+        size = sys.getsizeof(self._slots) + sys.getsizeof(self._states) + sys.getsizeof(self._moves)
+        size += sys.getsizeof(self._values) + sys.getsizeof(self._visits) + sys.getsizeof(self._seen)
+        for moves, values in zip(self._moves, self._values):
+            if moves is not None:
+                size += sys.getsizeof(moves) + sys.getsizeof(values)
+        return size
+
+    def stats(self):
+        """Return size, memory and hit-rate counters"""
+        lookups = self.hits + self.misses
+        return {
+            'states': len(self._slots),
+            'capacity': self.capacity,
+            'actions': sum(len(moves) for moves in self._moves if moves is not None),
+            'bytes': self.nbytes,
+            'epoch': self.epoch,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,179 @@
+import os
+import time
+from src.board import new_board
+from src.rules import Rules, DEFAULT_RULES
+from src.ship import Ship
+
+RECORDS_DIR = "records"
+RECORD_VERSION = 1
+
+
+def fleet_from_board(board):
+    """Describe the ships of a board as LocalMultiplayer.player1_ships-style dicts"""
+    fleet = []
+    for ship in board.ships:
+        row, col = ship.coordinates[0]
+        fleet.append({
+            'name': ship.name,
+            'size': ship.size,
+            'row': row,
+            'col': col,
+            'horizontal': ship.is_horizontal
+        })
+    return fleet
+
+
+def board_from_fleet(fleet, rules=None):
+    """Build a board with the ships described by a fleet list"""
+    board = new_board(rules)
+    for ship_info in fleet:
+        ship = Ship(ship_info['name'], ship_info['size'])
+        board.place_ship(ship, ship_info['row'], ship_info['col'], ship_info['horizontal'])
+    return board
+
+
+class GameRecorder:
+    """Writes a game as JSON lines (header, one line per shot, end) while it is played
+
+    Every line is appended as it happens, so a game cut short keeps the shots played so far.
+    """
+
+    def __init__(self, mode, seed=None, path=None, rules=None, directory=RECORDS_DIR):
+        self.mode = mode
+        self.seed = seed
+        self.path = path
+        self.directory = directory
+        self.rules = rules or DEFAULT_RULES
+        self.shot_count = 0
+        self._file = None
+
+    @property
+    def started(self):
+        return self._file is not None
+
+    def start(self, fleets):
+        """Open the record file and write the header with both fleets"""
+        if self.path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d_%H%M%S")
+            self.path = os.path.join(self.directory, f"{self.mode}_{stamp}_{os.getpid()}_{id(self):x}.jsonl")
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._write({
+            'type': 'header',
+            'version': RECORD_VERSION,
+            'mode': self.mode,
+            'seed': self.seed,
+            'grid_size': self.rules.width,
+            'rules': self.rules.to_dict(),
+            'fleets': fleets
+        })
+
+    def record_shot(self, shooter, board, row, col, hit):
+        """Append one shot; board is the name of the fleet being attacked"""
+        self._write({'type': 'shot', 'n': self.shot_count, 'by': shooter, 'board': board,
+                     'row': row, 'col': col, 'hit': bool(hit)})
+        self.shot_count += 1
+
+    def finish(self, winner):
+        """Write the result line and close the file"""
+        if self._file is None:
+            return
+        self._write({'type': 'end', 'winner': winner, 'shots': self.shot_count})
+        self._file.close()
+        self._file = None
+
+    def _write(self, entry):
+        import json
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+
+def header_rules(header):
+    """Rules of a recorded game (records written before rules existed used the defaults)"""
+    return Rules.from_dict(header['rules']) if 'rules' in header else DEFAULT_RULES
+
+
+def read_record(path):
+    """Stream the entries of a record file one at a time"""
+    import json
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class GameReplay:
+    """Rebuilds the boards of a recorded game at any move, using periodic snapshots to seek"""
+
+    def __init__(self, header, shots, winner=None, snapshot_interval=16):
+        self.header = header
+        self.shots = shots
+        self.winner = winner
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.fleets = header['fleets']
+        self.rules = header_rules(header)
+
+        # Play the game once, keeping a snapshot every snapshot_interval shots
+        self._snapshots = []
+        boards = self._initial_boards()
+        for move in range(len(shots) + 1):
+            if move % self.snapshot_interval == 0:
+                self._snapshots.append(self._snapshot(boards))
+            if move < len(shots):
+                self._apply(boards, shots[move])
+
+    @classmethod
+    def load(cls, path, snapshot_interval=16):
+        """Load a replay from a JSON-lines record file"""
+        return cls.from_entries(read_record(path), snapshot_interval)
+
+    @classmethod
+    def from_entries(cls, entries, snapshot_interval=16):
+        """Build a replay from decoded record entries"""
+        header = None
+        shots = []
+        winner = None
+        for entry in entries:
+            if entry['type'] == 'header':
+                header = entry
+            elif entry['type'] == 'shot':
+                shots.append((entry['board'], entry['row'], entry['col'], entry['hit']))
+            elif entry['type'] == 'end':
+                winner = entry['winner']
+        if header is None:
+            raise ValueError("Record has no header")
+        return cls(header, shots, winner, snapshot_interval)
+
+    def __len__(self):
+        return len(self.shots)
+
+    def boards_at(self, move):
+        """Return {fleet name: Board} as they were after the first `move` shots"""
+        move = max(0, min(move, len(self.shots)))
+        index = move // self.snapshot_interval
+        boards = self._restore(self._snapshots[index])
+        for shot in self.shots[index * self.snapshot_interval:move]:
+            self._apply(boards, shot)
+        return boards
+
+    def final_boards(self):
+        """Return the boards at the end of the game"""
+        return self.boards_at(len(self.shots))
+
+    def _initial_boards(self):
+        return {name: board_from_fleet(fleet, self.rules) for name, fleet in self.fleets.items()}
+
+    def _apply(self, boards, shot):
+        name, row, col, _ = shot
+        boards[name].receive_attack(row, col)
+
+    def _snapshot(self, boards):
+        """Copy the attack state of every board (ships never move during a game)"""
+        return {name: (board.hits[:], board.misses[:]) for name, board in boards.items()}
+
+    def _restore(self, snapshot):
+        boards = self._initial_boards()
+        for name, (hits, misses) in snapshot.items():
+            boards[name].restore_shots(hits=hits, misses=misses)
+        return boards
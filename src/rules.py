@@ -0,0 +1,59 @@
+from src.utils.constants import GRID_SIZE, SHIPS
+
+
+class Rules:
+    """Grid dimensions and fleet composition of a game"""
+
+    def __init__(self, width=GRID_SIZE, height=None, ships=None):
+        self.width = width
+        self.height = width if height is None else height
+        self.ships = [dict(ship) for ship in (SHIPS if ships is None else ships)]
+        if self.width < 1 or self.height < 1:
+            raise ValueError("The grid needs at least one cell")
+        if any(ship["size"] > max(self.width, self.height) for ship in self.ships):
+            raise ValueError("A ship is larger than the grid")
+        # Rules are not modified once built: derived values are computed once
+        self.num_cells = self.width * self.height
+        self.max_ship_size = max((ship["size"] for ship in self.ships), default=1)
+        self.fleet_cells = sum(ship["size"] for ship in self.ships)
+        self._hash = hash((self.width, self.height, tuple(ship["size"] for ship in self.ships)))
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def cell(self, row, col):
+        """Index of a cell, row-major"""
+        return row * self.width + col
+
+    def coords(self, cell):
+        """(row, col) of a cell index"""
+        return divmod(cell, self.width)
+
+    def to_dict(self):
+        return {"width": self.width, "height": self.height, "ships": self.ships}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["width"], data["height"], data["ships"])
+
+    @classmethod
+    def scaled(cls, width, height=None):
+        """Rules for a larger grid, with the standard fleet repeated to keep its density"""
+        height = width if height is None else height
+        copies = max(1, (width * height) // (GRID_SIZE * GRID_SIZE))
+        ships = [{"name": f"{ship['name']} {n + 1}" if copies > 1 else ship["name"], "size": ship["size"]}
+                 for n in range(copies) for ship in SHIPS]
+        return cls(width, height, ships)
+
+    def __eq__(self, other):
+        return self is other or (isinstance(other, Rules) and self._hash == other._hash
+                                 and self.to_dict() == other.to_dict())
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return f"Rules({self.width}x{self.height}, {len(self.ships)} ships)"
+
+
+DEFAULT_RULES = Rules()
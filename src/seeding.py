@@ -0,0 +1,38 @@
+import hashlib
+import random
+
+# Every random decision of a game is drawn from a stream derived from its master seed,
+# its game index and the stream's name. A game therefore replays bit for bit from those
+# values, whichever worker plays it and in whatever order the games are split, and a
+# stream never consumes numbers from another (particles, other games, other workers).
+
+FLEET = "fleet"    # Fleet placement
+AI = "ai"          # The AI's tie-breaks, exploration and sampling
+ENGINE = "engine"  # Engine decisions such as fallback shots
+
+
+def derive_seed(master_seed, *path):
+    """64-bit seed of the stream at `path` under a master seed"""
+    data = repr((master_seed,) + path).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def stream(master_seed, *path):
+    """An independent random.Random for the stream at `path`"""
+    return random.Random(derive_seed(master_seed, *path))
+
+
+def new_master_seed():
+    """Fresh master seed for runs that were not given one"""
+    return random.SystemRandom().getrandbits(64)
+
+
+class GameStreams:
+    """The random streams of one game"""
+
+    def __init__(self, master_seed, game=0):
+        self.master_seed = master_seed
+        self.game = game
+        self.fleet = stream(master_seed, game, FLEET)
+        self.ai = stream(master_seed, game, AI)
+        self.engine = stream(master_seed, game, ENGINE)
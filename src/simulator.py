@@ -0,0 +1,207 @@
+import random
+import numpy as np
+from src.rules import DEFAULT_RULES
+
+
+def placement_masks(size, rules=DEFAULT_RULES):
+    """Return every placement of a ship of this size as a (placements, cells) bool array"""
+    masks = []
+    for row in range(rules.height):
+        for col in range(rules.width):
+            # Horizontal placement
+            if col + size <= rules.width:
+                mask = np.zeros(rules.num_cells, dtype=bool)
+                mask[rules.cell(row, col):rules.cell(row, col) + size] = True
+                masks.append(mask)
+            # Vertical placement
+            if size > 1 and row + size <= rules.height:
+                mask = np.zeros(rules.num_cells, dtype=bool)
+                mask[[rules.cell(row + i, col) for i in range(size)]] = True
+                masks.append(mask)
+    return np.array(masks, dtype=bool)
+
+
+class BatchSimulator:
+    """Plays many independent games in lockstep on stacked NumPy boards"""
+
+    def __init__(self, num_games, rules=None, seed=None):
+        self.num_games = num_games
+        self.rules = rules or DEFAULT_RULES
+        self.ships = list(self.rules.ships)
+        self.num_cells = self.rules.num_cells
+        self.sizes = np.array([ship["size"] for ship in self.ships], dtype=np.int16)
+        self.rng = random.Random(seed)
+
+        # Placement tables, one per distinct ship size
+        self.size_groups = sorted(set(int(size) for size in self.sizes))
+        self.placements = {size: placement_masks(size, self.rules) for size in self.size_groups}
+        self._placement_bits = {
+            size: [sum(1 << int(cell) for cell in np.nonzero(mask)[0]) for mask in masks]
+            for size, masks in self.placements.items()
+        }
+
+        # Per-game state, one row per game
+        num_ships = len(self.ships)
+        self.ship_cells = np.zeros((num_games, num_ships, self.num_cells), dtype=bool)
+        self.ship_id = np.full((num_games, self.num_cells), -1, dtype=np.int8)
+        self.remaining = np.tile(self.sizes, (num_games, 1))
+        self.ship_sunk = np.zeros((num_games, num_ships), dtype=bool)
+        self.shots = np.zeros((num_games, self.num_cells), dtype=bool)
+        self.hits = np.zeros((num_games, self.num_cells), dtype=bool)
+        self.sunk_cells = np.zeros((num_games, self.num_cells), dtype=bool)
+        self.shot_count = np.zeros(num_games, dtype=np.int32)
+        self.done = np.zeros(num_games, dtype=bool)
+
+        for game in range(num_games):
+            self._place_fleet(game)
+
+    def _place_fleet(self, game):
+        """Place a random non-overlapping fleet for one game using bitmasks"""
+        occupied = 0
+        for ship_index, size in enumerate(self.sizes):
+            size = int(size)
+            bits = self._placement_bits[size]
+            while True:
+                choice = self.rng.randrange(len(bits))
+                if not occupied & bits[choice]:
+                    break
+            occupied |= bits[choice]
+            cells = self.placements[size][choice]
+            self.ship_cells[game, ship_index] = cells
+            self.ship_id[game, cells] = ship_index
+
+    def set_fleet(self, game, board):
+        """Replace the fleet of one game by the ships of a Board (placed in self.ships order)"""
+        self.ship_cells[game] = False
+        self.ship_id[game] = -1
+        for ship_index, ship in enumerate(board.ships):
+            cells = [self.rules.cell(row, col) for row, col in ship.coordinates]
+            self.ship_cells[game, ship_index, cells] = True
+            self.ship_id[game, cells] = ship_index
+
+    def active_games(self):
+        """Return the indices of the games that are still running"""
+        return np.nonzero(~self.done)[0]
+
+    def step(self, cells):
+        """Fire one shot in every running game; cells holds one cell index per game"""
+        games = self.active_games()
+        if len(games) == 0:
+            return games, np.zeros(0, dtype=bool)
+
+        cells = np.asarray(cells)[games]
+        if self.shots[games, cells].any():
+            raise ValueError("Policy selected a cell that was already attacked")
+
+        self.shots[games, cells] = True
+        self.shot_count[games] += 1
+
+        # Resolve hits against the ship id grid
+        ship_index = self.ship_id[games, cells]
+        hit = ship_index >= 0
+        hit_games = games[hit]
+        hit_ships = ship_index[hit]
+        self.hits[hit_games, cells[hit]] = True
+        self.remaining[hit_games, hit_ships] -= 1
+
+        # Sunk detection: a ship sinks when its remaining cell count reaches zero
+        sunk = self.remaining[hit_games, hit_ships] == 0
+        if sunk.any():
+            sunk_games = hit_games[sunk]
+            sunk_ships = hit_ships[sunk]
+            self.ship_sunk[sunk_games, sunk_ships] = True
+            self.sunk_cells[sunk_games] |= self.ship_cells[sunk_games, sunk_ships]
+            self.done[sunk_games] = self.ship_sunk[sunk_games].all(axis=1)
+
+        return games, hit
+
+    def run(self, policy, max_steps=None):
+        """Play every game to completion with a batched policy and return the shot counts"""
+        max_steps = max_steps or self.num_cells
+        for _ in range(max_steps):
+            if self.done.all():
+                break
+            self.step(policy.select(self))
+        return self.shot_count.copy()
+
+
+class RandomBatchPolicy:
+    """Fires uniformly at random among the untargeted cells of every game"""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def select(self, sim):
+        """Pick one untargeted cell per game"""
+        scores = self.rng.random((sim.num_games, sim.num_cells))
+        scores[sim.shots] = -1.0
+        return scores.argmax(axis=1)
+
+
+class DensityBatchPolicy:
+    """Vectorized density hunter: fires at the cell covered by the most legal ship placements"""
+
+    def __init__(self, hit_weight=50.0, seed=None):
+        self.hit_weight = hit_weight
+        self.rng = np.random.default_rng(seed)
+        self._tables = None
+
+    def _prepare(self, sim):
+        """Stack every placement into one table with the ship count that can use it"""
+        placements = np.concatenate([sim.placements[size] for size in sim.size_groups]).astype(np.float32)
+        placement_size = np.concatenate([np.full(len(sim.placements[size]), size) for size in sim.size_groups])
+        # (ships, placements): 1 where the ship has the size of the placement
+        ship_fits = (sim.sizes[:, None] == placement_size[None, :]).astype(np.float32)
+        self._tables = (sim, placements, ship_fits)
+
+    def density(self, sim, games=None):
+        """Return the (games, cells) placement density for the given games"""
+        if self._tables is None or self._tables[0] is not sim:
+            self._prepare(sim)
+        _, placements, ship_fits = self._tables
+        if games is None:
+            games = np.arange(sim.num_games)
+
+        # Misses and sunk ships block placements; unresolved hits attract them
+        shots, hits, sunk_cells = sim.shots[games], sim.hits[games], sim.sunk_cells[games]
+        blocked = ((shots & ~hits) | sunk_cells).astype(np.float32)
+        unresolved = (hits & ~sunk_cells).astype(np.float32)
+        afloat = (~sim.ship_sunk[games]).astype(np.float32)
+
+        valid = (blocked @ placements.T) == 0
+        weight = 1.0 + self.hit_weight * (unresolved @ placements.T)
+        weight *= valid
+        weight *= afloat @ ship_fits
+        return weight @ placements
+
+    def select(self, sim):
+        """Pick the highest density untargeted cell per game, breaking ties at random"""
+        games = sim.active_games()
+        scores = self.density(sim, games)
+        scores += self.rng.random(scores.shape, dtype=np.float32) * 1e-3
+        scores[sim.shots[games]] = -1.0
+        cells = np.zeros(sim.num_games, dtype=np.intp)
+        cells[games] = scores.argmax(axis=1)
+        return cells
+
+
+class WeightedDensityBatchPolicy(DensityBatchPolicy):
+    """Density hunter whose scores are scaled by per-cell weights (e.g. where humans like to shoot)"""
+
+    def __init__(self, weights, hit_weight=50.0, seed=None):
+        super().__init__(hit_weight=hit_weight, seed=seed)
+        self.weights = np.asarray(weights, dtype=np.float32)
+
+    def density(self, sim, games=None):
+        return super().density(sim, games) * self.weights
+
+
+def simulate(policy, num_games, batch_size=1000, rules=None, seed=None):
+    """Play num_games headless games in lockstep batches and return every shot count"""
+    rng = random.Random(seed)
+    results = []
+    while len(results) < num_games:
+        batch = min(batch_size, num_games - len(results))
+        sim = BatchSimulator(batch, rules=rules, seed=rng.getrandbits(64))
+        results.extend(int(count) for count in sim.run(policy))
+    return results
@@ -0,0 +1,415 @@
+import asyncio
+import itertools
+import random
+from src.board import Board
+from src.network import encode, decode, NetworkClient
+from src.rules import Rules, DEFAULT_RULES
+from src.sync import BoardEventLog, BoardMirror
+from src.utils.constants import NETWORK_HOST, NETWORK_PORT, SPECTATOR_PORT
+
+# Spectators send {"t": "list"} or {"t": "watch", "g": game id} and receive a snapshot
+# ("snap", with the rules of the game) of every board of the game followed by its shot events ("ev", with "b" the
+# owner of the attacked board) and a final "end". A spectator that falls behind gets a
+# fresh snapshot instead of the events it missed; games never wait for spectators.
+
+SUBSCRIBER_QUEUE = 64
+
+
+class Subscription:
+    """One spectator of one game, with a bounded queue of messages to send"""
+
+    def __init__(self, channel, maxsize=SUBSCRIBER_QUEUE):
+        self.channel = channel
+        self.maxsize = maxsize
+        # One slot more than maxsize, kept for the end marker after an overflow snapshot
+        self.queue = asyncio.Queue(maxsize + 1)
+        self.dropped = 0
+
+    def offer(self, message):
+        """Queue a message without ever blocking; on overflow, replace the backlog by a snapshot"""
+        if self.queue.qsize() < self.maxsize or (message['t'] == 'end' and not self.queue.full()):
+            self.queue.put_nowait(message)
+            return
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.dropped += 1
+        self.queue.put_nowait(self.channel.snapshot())
+        if message['t'] == 'end':
+            self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class _Channel:
+    """Current state of a published game, kept as compact per-board snapshots"""
+
+    def __init__(self, game_id, info, rules):
+        self.game_id = game_id
+        self.info = info
+        self.rules = rules
+        self.boards = {}
+        self.subscribers = set()
+
+    def apply(self, owner, event):
+        board = self.boards.setdefault(owner, {'s': 0, 'hits': 0, 'misses': 0, 'sunk': []})
+        bit = 1 << self.rules.cell(event['r'], event['c'])
+        if event['hit']:
+            board['hits'] |= bit
+        else:
+            board['misses'] |= bit
+        if event.get('k', -1) >= 0:
+            board['sunk'].append(event['k'])
+        board['s'] = event.get('s', board['s'] + 1)
+
+    def snapshot(self):
+        return {'t': 'snap', 'g': self.game_id, 'info': self.info, 'rules': self.rules.to_dict(),
+                'boards': {owner: dict(board, sunk=list(board['sunk'])) for owner, board in self.boards.items()}}
+
+
+class SpectatorPublisher:
+    """Fans the shot events of live games out to any number of spectators
+
+    Games call open_game/publish/close_game from the event loop; none of them waits.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE):
+        self.queue_size = queue_size
+        self.channels = {}
+        self.published = 0
+
+    def open_game(self, game_id, info=None, owners=('1', '2'), rules=None):
+        channel = _Channel(game_id, info or {}, rules or DEFAULT_RULES)
+        for owner in owners:
+            channel.boards[owner] = {'s': 0, 'hits': 0, 'misses': 0, 'sunk': []}
+        self.channels[game_id] = channel
+
+    def publish(self, game_id, owner, event):
+        """Publish a shot event on the board of `owner`"""
+        channel = self.channels.get(game_id)
+        if channel is None:
+            return
+        channel.apply(owner, event)
+        self.published += 1
+        if channel.subscribers:
+            message = dict(event, t='ev', g=game_id, b=owner)
+            for subscription in channel.subscribers:
+                subscription.offer(message)
+
+    def close_game(self, game_id, winner=None):
+        channel = self.channels.pop(game_id, None)
+        if channel is None:
+            return
+        for subscription in channel.subscribers:
+            subscription.offer({'t': 'end', 'g': game_id, 'winner': winner})
+
+    def games(self):
+        return [{'g': game_id, 'info': channel.info} for game_id, channel in self.channels.items()]
+
+    def subscribe(self, game_id):
+        """Start watching a game: the subscription begins with a snapshot. None if unknown"""
+        channel = self.channels.get(game_id)
+        if channel is None:
+            return None
+        subscription = Subscription(channel, self.queue_size)
+        subscription.offer(channel.snapshot())
+        channel.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.channel.subscribers.discard(subscription)
+
+    def stats(self):
+        subscriptions = [sub for channel in self.channels.values() for sub in channel.subscribers]
+        return {
+            'games': len(self.channels),
+            'subscribers': len(subscriptions),
+            'published': self.published,
+            'dropped': sum(sub.dropped for sub in subscriptions)
+        }
+
+
+class SpectatorServer:
+    """TCP front end of a SpectatorPublisher; each spectator is written to by its own task"""
+
+    def __init__(self, publisher, host=NETWORK_HOST, port=SPECTATOR_PORT):
+        self.publisher = publisher
+        self.host = host
+        self.port = port
+        self._server = None
+        self._handlers = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._handlers.values()):
+            writer.close()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        subscription = None
+        pump = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = decode(line) or {}
+                kind = message.get('t')
+                if kind == 'list':
+                    writer.write(encode({'t': 'games', 'games': self.publisher.games()}))
+                elif kind == 'watch':
+                    if pump is not None:
+                        pump.cancel()
+                        pump = None
+                        self.publisher.unsubscribe(subscription)
+                    subscription = self.publisher.subscribe(message.get('g'))
+                    if subscription is None:
+                        writer.write(encode({'t': 'error', 'msg': 'unknown game'}))
+                    else:
+                        pump = asyncio.create_task(self._pump(subscription, writer))
+                elif kind == 'snap' and subscription is not None:
+                    subscription.offer(subscription.channel.snapshot())
+                else:
+                    writer.write(encode({'t': 'error', 'msg': 'unknown message'}))
+        except ConnectionError:
+            pass
+        finally:
+            if pump is not None:
+                pump.cancel()
+                self.publisher.unsubscribe(subscription)
+            writer.close()
+            del self._handlers[task]
+
+    async def _pump(self, subscription, writer):
+        """Send queued messages; a slow socket only makes this spectator's queue overflow"""
+        try:
+            while True:
+                message = await subscription.get()
+                writer.write(encode(message))
+                await writer.drain()
+                if message['t'] == 'end':
+                    return
+        except ConnectionError:
+            pass
+
+
+class SpectatorView:
+    """Spectator-side copy of a watched game, rebuilt from snapshots and events"""
+
+    def __init__(self):
+        self.game_id = None
+        self.info = {}
+        self.boards = {}
+        self.mirrors = {}
+        self.winner = None
+        self.ended = False
+
+    def apply(self, message):
+        """Apply a server message; returns False when a new snapshot is needed"""
+        kind = message.get('t')
+        if kind == 'snap':
+            self.game_id = message['g']
+            self.info = message.get('info', {})
+            rules = Rules.from_dict(message['rules']) if 'rules' in message else DEFAULT_RULES
+            for owner, snapshot in message['boards'].items():
+                if owner not in self.mirrors:
+                    self.boards[owner] = Board(rules)
+                    self.mirrors[owner] = BoardMirror(self.boards[owner])
+                self.mirrors[owner].load_snapshot(snapshot)
+        elif kind == 'ev':
+            mirror = self.mirrors.get(message['b'])
+            if mirror is None or not mirror.apply(message):
+                return False
+        elif kind == 'end':
+            self.winner = message.get('winner')
+            self.ended = True
+        return True
+
+
+class SpectatorClient:
+    """Non-blocking spectator connection, polled once per frame like NetworkMultiplayer"""
+
+    def __init__(self, game_id, host=NETWORK_HOST, port=SPECTATOR_PORT):
+        self.view = SpectatorView()
+        self.client = NetworkClient(host, port)
+        self.client.connect()
+        self.client.send({'t': 'watch', 'g': game_id})
+
+    def poll(self):
+        messages = self.client.poll()
+        for message in messages:
+            if not self.view.apply(message):
+                self.client.send({'t': 'snap'})
+        return messages
+
+    def close(self):
+        self.client.close()
+
+
+def draw_spectator(screen, view, fonts, assets):
+    """Draw both boards of a watched game with draw_grid, hits in red and misses in white"""
+    import pygame
+    from src.ui.grid import draw_grid
+    from src.utils.constants import RED, WHITE
+
+    for owner, position in zip(sorted(view.boards), ("left", "right")):
+        board = view.boards[owner]
+        x, y = draw_grid(screen, board, fonts, assets, position=position,
+                         subtitle=f"Flotte du joueur {owner}")
+        cell_size = board.width / board.rules.width
+        for (row, col), color in [(cell, RED) for cell in board.hits] + [(cell, WHITE) for cell in board.misses]:
+            center = (int(x + (col + 0.5) * cell_size), int(y + (row + 0.5) * cell_size))
+            pygame.draw.circle(screen, color, center, int(cell_size) // 3, 0 if color == RED else 2)
+    if view.ended:
+        text = fonts["small"].render(f"Partie terminée, vainqueur : joueur {view.winner}", True, WHITE)
+        screen.blit(text, (screen.get_width() // 2 - text.get_width() // 2, 20))
+
+
+class MoveBatcher:
+    """Answers the move requests of concurrent AI matches in one ModelService tick per loop turn"""
+
+    def __init__(self, service):
+        self.service = service
+        self._waiting = {}
+        self._scheduled = False
+        self.ticks = 0
+
+    def move(self, session):
+        """Future of the session's next move, answered with the other requests of this loop turn"""
+        loop = asyncio.get_running_loop()
+        future = self._waiting[session] = loop.create_future()
+        self.service.request(session)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._tick)
+        return future
+
+    def _tick(self):
+        self._scheduled = False
+        self.ticks += 1
+        for session, move in self.service.tick():
+            future = self._waiting.pop(session)
+            if not future.cancelled():  # The match was stopped meanwhile
+                future.set_result(move)
+
+
+async def play_ai_match(publisher, game_id, service, rng, delay=0.0, batcher=None):
+    """Play one AI vs AI game on the headless engine, publishing every shot
+
+    With a MoveBatcher, moves are requested through it so that concurrent matches share ticks.
+    """
+    from src.training import random_fleet_board
+
+    logs = {'1': BoardEventLog(random_fleet_board(rng)), '2': BoardEventLog(random_fleet_board(rng))}
+    # Player 1 attacks the board of player 2 and the other way round
+    sessions = {'1': service.open_session(logs['2'].board, random.Random(rng.getrandbits(64))),
+                '2': service.open_session(logs['1'].board, random.Random(rng.getrandbits(64)))}
+    publisher.open_game(game_id, {'kind': 'ai'}, rules=logs['1'].board.rules)
+    shooter = '1'
+    try:
+        while True:
+            target = '2' if shooter == '1' else '1'
+            board = logs[target].board
+            if batcher is not None:
+                row, col = await batcher.move(sessions[shooter])
+            else:
+                row, col = service.get_attack_coordinates(sessions[shooter])
+            if board.view[row][col] != '.':
+                row, col = board.sample_free_cells(1, rng)[0]
+            event = logs[target].attack(row, col)
+            sunk = board.ships[event['k']].size if event['k'] >= 0 else None
+            service.register_result(sessions[shooter], row, col, bool(event['hit']), sunk)
+            publisher.publish(game_id, target, event)
+            if event['hit'] and board.all_ships_sunk():
+                publisher.close_game(game_id, shooter)
+                return shooter
+            if not event['hit']:
+                shooter = target
+            await asyncio.sleep(delay)
+    finally:
+        publisher.close_game(game_id)
+        for session in sessions.values():
+            service.close_session(session)
+
+
+async def run_ai_matches(publisher, games=4, delay=0.5, seed=None):
+    """Keep `games` AI vs AI matches running, starting a new one whenever one ends"""
+    from src.model_service import ModelService
+
+    service = ModelService()
+    batcher = MoveBatcher(service)
+    rng = random.Random(seed)
+    ids = itertools.count(1)
+
+    async def lane():
+        while True:
+            await play_ai_match(publisher, f"ai-{next(ids)}", service, random.Random(rng.getrandbits(32)),
+                                delay, batcher)
+
+    await asyncio.gather(*(lane() for _ in range(games)))
+
+
+async def _serve(args):
+    from src.network import RelayServer
+    publisher = SpectatorPublisher()
+    spectators = SpectatorServer(publisher, args.host, args.port)
+    await spectators.start()
+    relay = RelayServer(args.host, args.relay_port, publisher=publisher)
+    await relay.start()
+    print(f"Spectators on {args.host}:{spectators.port}, players on {args.host}:{relay.port}")
+    await asyncio.gather(relay.serve_forever(), run_ai_matches(publisher, args.ai_games, args.delay))
+
+
+def _watch(args):
+    import pygame
+    from src.utils.constants import GRAY, FPS
+    from src.utils.helpers import initialize_fonts, load_assets
+
+    pygame.init()
+    resolution = (1200, 700)
+    screen = pygame.display.set_mode(resolution)
+    pygame.display.set_caption(f"Bataille Navale - spectateur {args.game}")
+    fonts = initialize_fonts()
+    assets = load_assets(resolution)
+    spectator = SpectatorClient(args.game, args.host, args.port)
+    clock = pygame.time.Clock()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        spectator.poll()
+        screen.fill(GRAY)
+        draw_spectator(screen, spectator.view, fonts, assets)
+        pygame.display.flip()
+        clock.tick(FPS)
+    spectator.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Diffusion des parties en direct aux spectateurs")
+    parser.add_argument("--host", default=NETWORK_HOST)
+    parser.add_argument("--port", type=int, default=SPECTATOR_PORT)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="relay server plus AI vs AI games, both published")
+    serve.add_argument("--relay-port", type=int, default=NETWORK_PORT)
+    serve.add_argument("--ai-games", type=int, default=4)
+    serve.add_argument("--delay", type=float, default=0.5, help="seconds between AI shots")
+    watch = commands.add_parser("watch", help="watch a game in a window")
+    watch.add_argument("game")
+    args = parser.parse_args()
+    if args.command == "serve":
+        asyncio.run(_serve(args))
+    else:
+        _watch(args)
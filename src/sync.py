@@ -0,0 +1,115 @@
+import zlib
+
+# Board changes travel as shot events: {'s': seq, 'r': row, 'c': col, 'hit': 0/1, 'k': sunk ship}
+# where 'k' is the index of the ship sunk by the shot in board.ships, or -1. Every
+# CHECKSUM_INTERVAL events (and on every sink) the event also carries 'v', a checksum of
+# the view after the shot, so replicas can detect a desync and ask for a resync.
+CHECKSUM_INTERVAL = 8
+
+
+def view_checksum(view):
+    """CRC32 of a board view"""
+    return zlib.crc32(''.join(''.join(row) for row in view).encode())
+
+
+class BoardEventLog:
+    """Authoritative stream of the shots received by a board"""
+
+    def __init__(self, board, checksum_interval=CHECKSUM_INTERVAL):
+        self.board = board
+        self.checksum_interval = checksum_interval
+        self.events = []
+        self.sunk = []
+
+    @property
+    def seq(self):
+        return len(self.events)
+
+    def attack(self, row, col):
+        """Fire at the board through receive_attack and return the event, or None if already shot"""
+        board = self.board
+        if board.view[row][col] != '.':
+            return None
+        hit = board.receive_attack(row, col)
+        sunk = board.sunk_ship(row, col) if hit else -1
+        event = {'s': len(self.events) + 1, 'r': row, 'c': col, 'hit': int(hit), 'k': sunk}
+        if sunk >= 0:
+            self.sunk.append(sunk)
+        if sunk >= 0 or event['s'] % self.checksum_interval == 0:
+            event['v'] = view_checksum(board.view)
+        self.events.append(event)
+        return event
+
+    def events_since(self, seq):
+        """Events a replica at `seq` is missing"""
+        return self.events[max(0, seq):]
+
+    def snapshot(self):
+        """Compact full state: the attack masks, the sunk ships and the sequence number"""
+        return {'s': self.seq, 'hits': self.board.hit_mask, 'misses': self.board.miss_mask,
+                'sunk': list(self.sunk)}
+
+    def sync_message(self, seq):
+        """Answer a resync request: the missing events if the replica's seq is known, else a snapshot"""
+        if 0 <= seq <= self.seq:
+            return {'events': self.events_since(seq)}
+        return {'snap': self.snapshot()}
+
+
+class BoardMirror:
+    """Replica of a board kept up to date from a BoardEventLog stream
+
+    The last state confirmed by a checksum is kept as a snapshot; on a checksum mismatch
+    the replica rolls back to it and asks for the events that follow.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.seq = 0
+        self.sunk = []
+        self.desynced = False
+        self._verified = self._snapshot()
+
+    def _snapshot(self):
+        return {'s': self.seq, 'hits': self.board.hit_mask, 'misses': self.board.miss_mask,
+                'sunk': list(self.sunk)}
+
+    def apply(self, event):
+        """Apply one event; returns False when the replica must be resynced"""
+        seq = event.get('s')
+        if seq is not None:
+            if seq <= self.seq:
+                return True  # Already applied
+            if seq != self.seq + 1:
+                self.desynced = True
+                return False
+        self.board.mark_attack(event['r'], event['c'], bool(event['hit']))
+        if event.get('k', -1) >= 0:
+            self.sunk.append(event['k'])
+        if seq is not None:
+            self.seq = seq
+        if 'v' in event:
+            if view_checksum(self.board.view) != event['v']:
+                self.load_snapshot(self._verified)
+                self.desynced = True
+                return False
+            self._verified = self._snapshot()
+        return True
+
+    def load_snapshot(self, snapshot):
+        """Replace the replica's state by a snapshot"""
+        self.board.restore_shots(snapshot['hits'], snapshot['misses'])
+        self.seq = snapshot['s']
+        self.sunk = list(snapshot['sunk'])
+        self._verified = self._snapshot()
+        self.desynced = False
+
+    def apply_sync(self, message):
+        """Apply the answer to a resync request"""
+        if 'snap' in message:
+            self.load_snapshot(message['snap'])
+        self.desynced = False
+        for event in message.get('events', []):
+            if not self.apply(event):
+                return False
+        return True
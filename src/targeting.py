@@ -0,0 +1,169 @@
+import time
+
+# Targeting by posterior sampling: random fleets consistent with every shot seen so far are
+# drawn until the move's time budget runs out, and the free cell covered by the most sampled
+# ships is fired at. Fleets are bitmasks of the board cells (bit r * width + c, as in
+# Board.hit_mask), so checking a placement against the shots is one AND.
+
+# Placement bitmasks span the whole board, which stays cheap up to this many cells
+MAX_CELLS = 4096
+
+# Fleets drawn between two looks at the clock
+CHECK_EVERY = 16
+
+# Random tries to fit a ship that covers no hit before the fleet is rejected
+PLACEMENT_TRIES = 32
+
+# Fleets drawn per move when no time budget is given
+DEFAULT_SAMPLES = 400
+
+
+def _cells(mask):
+    """Cell indices of the set bits of a mask"""
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+class Placements:
+    """Every placement of each ship size of some rules, as bitmasks, also indexed by cell"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.all = {}
+        self.covering = {}
+        for size in {ship['size'] for ship in rules.ships}:
+            masks = []
+            for row in range(rules.height):
+                for col in range(rules.width):
+                    if col + size <= rules.width:
+                        masks.append(sum(1 << rules.cell(row, col + i) for i in range(size)))
+                    if size > 1 and row + size <= rules.height:
+                        masks.append(sum(1 << rules.cell(row + i, col) for i in range(size)))
+            covering = [[] for _ in range(rules.num_cells)]
+            for mask in masks:
+                for cell in _cells(mask):
+                    covering[cell].append(mask)
+            self.all[size] = masks
+            self.covering[size] = covering
+
+
+_placements = {}
+
+
+def placements_for(rules):
+    """Placements of some rules, built once"""
+    placements = _placements.get(rules)
+    if placements is None:
+        placements = _placements[rules] = Placements(rules)
+    return placements
+
+
+def sample_fleet(placements, sizes, hit_mask, blocked, rng, sunk=()):
+    """Bitmask of the cells of a random fleet covering every hit and no blocked cell, or None
+
+    Each sunk ship is put at one of its possible positions (bitmasks), then ships of the
+    given sizes are laid over the lowest uncovered hit, among all the placements of the
+    ships left that fit there, and the other ships are placed anywhere they fit.
+    """
+    occupied = 0
+    for positions in sunk:
+        options = [mask for mask in positions if not mask & occupied]
+        if not options:
+            return None
+        occupied |= options[rng.randrange(len(options))]
+    uncovered = hit_mask & ~occupied
+    pending = list(sizes)
+    while uncovered:
+        cell = (uncovered & -uncovered).bit_length() - 1
+        taken = blocked | occupied
+        options = [(index, mask) for index, size in enumerate(pending)
+                   for mask in placements.covering[size][cell] if not mask & taken]
+        if not options:
+            return None
+        index, mask = options[rng.randrange(len(options))]
+        pending.pop(index)
+        occupied |= mask
+        uncovered &= ~mask
+    for size in pending:
+        masks = placements.all[size]
+        taken = blocked | occupied
+        for _ in range(PLACEMENT_TRIES):
+            mask = masks[rng.randrange(len(masks))]
+            if not mask & taken:
+                occupied |= mask
+                break
+        else:
+            return None
+    return occupied
+
+
+class MonteCarloTargeter:
+    """Anytime targeter: fires at the free cell most often occupied in sampled fleets
+
+    It draws fleets for at most `budget_ms` milliseconds and at most `max_samples` fleets per
+    move (a fixed count, without budget, makes games reproducible from their seed).
+    """
+
+    def __init__(self, budget_ms=None, max_samples=None):
+        self.budget_ms = budget_ms
+        self.max_samples = DEFAULT_SAMPLES if budget_ms is None and max_samples is None else max_samples
+        self.samples = 0
+        self.moves = 0
+
+    def supports(self, rules):
+        return rules.num_cells <= MAX_CELLS
+
+    def posterior(self, board, rng, hits=None, sunk=(), remaining=None):
+        """Per-cell counts of sampled ships over the free cells, and the number of fleets kept
+
+        Fleets of the `remaining` ship sizes (the whole fleet by default) must cover the
+        `hits` cells (every hit by default); `sunk` lists, for each ship reported sunk, the
+        cell lists it may lie on.
+        """
+        rules = board.rules
+        placements = placements_for(rules)
+        shots = board.hit_mask | board.miss_mask
+        hit_mask = board.hit_mask if hits is None else sum(1 << rules.cell(row, col) for row, col in hits)
+        sunk = [[sum(1 << rules.cell(row, col) for row, col in cells) for cells in positions]
+                for positions in sunk]
+        blocked = board.miss_mask
+        free = ((1 << rules.num_cells) - 1) & ~shots
+        sizes = remaining if remaining is not None else [ship['size'] for ship in rules.ships]
+        deadline = None if self.budget_ms is None else time.perf_counter() + self.budget_ms / 1000
+
+        counts = [0] * rules.num_cells
+        kept = drawn = 0
+        while self.max_samples is None or drawn < self.max_samples:
+            if deadline is not None and drawn % CHECK_EVERY == 0 and drawn and time.perf_counter() >= deadline:
+                break
+            drawn += 1
+            fleet = sample_fleet(placements, sizes, hit_mask, blocked, rng, sunk)
+            if fleet is None:
+                continue
+            kept += 1
+            for cell in _cells(fleet & free):
+                counts[cell] += 1
+        self.samples += kept
+        self.moves += 1
+        return counts, kept
+
+    def choose(self, board, rng, hits=None, sunk=(), remaining=None):
+        """Most likely occupied free cell, or None if no consistent fleet was found in time"""
+        counts, kept = self.posterior(board, rng, hits, sunk, remaining)
+        best = max(counts) if kept else 0
+        if not best:
+            return None
+        cells = [cell for cell, count in enumerate(counts) if count == best]
+        return board.rules.coords(cells[rng.randrange(len(cells))])
+
+    def stats(self):
+        """Return move and sample counters"""
+        return {
+            'moves': self.moves,
+            'samples': self.samples,
+            'samples_per_move': self.samples / self.moves if self.moves else 0.0
+        }
@@ -0,0 +1,396 @@
+import json
+import math
+import os
+import random
+from src.seeding import GameStreams, derive_seed, AI
+
+# A player is a JSON-friendly dict: {"name": ..., "type": "rl" | "linear" | "random" | "density", ...}.
+# Every player attacks the same seeded fleets; in a pairing, the player who sinks a fleet
+# in fewer shots wins that game. Shot counts only depend on the player and the fleet, so
+# each (player, seed) game is played once and reused by every pairing that needs it.
+# RL players may add "targeter": {"max_samples": N} to aim with sampled fleets (a sample
+# count rather than a time budget, so results stay reproducible).
+
+DEFAULT_PLAYERS = [
+    {"name": "rl", "type": "rl"},
+    {"name": "density", "type": "density"},
+    {"name": "random", "type": "random"},
+]
+
+# Rough relative cost of one game, used to schedule the slowest jobs first
+PLAYER_COST = {"rl": 10.0, "linear": 10.0, "density": 1.0, "random": 0.2}
+
+CHECKPOINT_VERSION = 3
+
+
+def fleet_board(seed):
+    """The fleet every player faces for a given seed"""
+    from src.training import random_fleet_board
+    return random_fleet_board(GameStreams(seed).fleet)
+
+
+# --- Worker side ------------------------------------------------------------------
+
+_worker_players = {}
+
+
+def _rl_player(spec):
+    """Build (once per worker) a non-learning RL AI, so results do not depend on job order"""
+    key = json.dumps(spec, sort_keys=True)
+    ai = _worker_players.get(key)
+    if ai is None:
+        from src.ai import ReinforcementLearningAI
+        from src.board import Board
+        ai = ReinforcementLearningAI(Board(), learning_rate=spec.get("learning_rate", 0.1),
+                                     discount_factor=spec.get("discount_factor", 0.9),
+                                     exploration_rate=spec.get("exploration_rate", 0.0),
+                                     q_table={}, learn=spec.get("learn", False))
+        if "targeter" in spec:
+            from src.targeting import MonteCarloTargeter
+            ai.targeter = MonteCarloTargeter(**spec["targeter"])
+        if spec["type"] == "linear":
+            from src.linear_policy import LinearPolicy
+            ai.policy = LinearPolicy.load(spec["model"]) if "model" in spec else LinearPolicy.load()
+        elif "model" in spec:
+            ai.load_model(spec["model"])
+        else:
+            ai.load_model()
+        _worker_players[key] = ai
+    return ai
+
+
+def _play_rl(spec, seeds):
+    from src.training import random_fleet_board
+    ai = _rl_player(spec)
+    counts = []
+    for seed in seeds:
+        streams = GameStreams(seed)
+        board = random_fleet_board(streams.fleet)
+        ai.player_board = board
+        ai.rng = streams.ai
+        ai.reset_game_state()
+        shots = 0
+        while not board.all_ships_sunk():
+            row, col = ai.get_attack_coordinates()
+            if board.view[row][col] != '.':
+                row, col = board.sample_free_cells(1, streams.engine)[0]
+            hit, sunk = board.receive_attack(row, col, report_sunk=True)
+            ai.register_result(row, col, hit, sunk.size if sunk else None)
+            shots += 1
+        counts.append(shots)
+    return counts
+
+
+def _play_batch(spec, seeds):
+    """Each seed is simulated on its own, the policy drawing from that game's AI stream
+
+    Batched policies draw their noise for every game of a batch at once, so sharing a batch
+    would make a game's shots depend on the other seeds of its job.
+    """
+    from src.simulator import BatchSimulator, RandomBatchPolicy, DensityBatchPolicy
+    counts = []
+    for seed in seeds:
+        sim = BatchSimulator(1, seed=0)
+        sim.set_fleet(0, fleet_board(seed))
+        if spec["type"] == "density":
+            policy = DensityBatchPolicy(hit_weight=spec.get("hit_weight", 50.0), seed=derive_seed(seed, 0, AI))
+        else:
+            policy = RandomBatchPolicy(seed=derive_seed(seed, 0, AI))
+        counts.append(int(sim.run(policy)[0]))
+    return counts
+
+
+PLAYER_TYPES = {
+    "rl": _play_rl,
+    "linear": _play_rl,
+    "density": _play_batch,
+    "random": _play_batch,
+}
+
+
+def play_games(spec, seeds):
+    """Shots needed by a player to sink the fleet of every seed (runs in a worker)"""
+    return PLAYER_TYPES[spec["type"]](spec, seeds)
+
+
+# --- Ratings ----------------------------------------------------------------------
+
+def game_outcomes(shots_a, shots_b):
+    """(wins, losses, draws) of A against B over the seeds both have played"""
+    wins = losses = draws = 0
+    for seed, count in shots_a.items():
+        other = shots_b.get(seed)
+        if other is None:
+            continue
+        if count < other:
+            wins += 1
+        elif count > other:
+            losses += 1
+        else:
+            draws += 1
+    return wins, losses, draws
+
+
+def elo_ratings(games, names, k=16.0, start=1500.0):
+    """Sequential Elo over (a, b, score of a) games"""
+    ratings = {name: start for name in names}
+    for a, b, score in games:
+        expected = 1.0 / (1.0 + 10 ** ((ratings[b] - ratings[a]) / 400.0))
+        ratings[a] += k * (score - expected)
+        ratings[b] -= k * (score - expected)
+    return ratings
+
+
+def bradley_terry(wins, names, iterations=200, prior=0.5):
+    """Bradley-Terry strengths by minorization-maximization, on the Elo scale (mean 1500)
+
+    wins[(a, b)] counts the wins of a over b, draws counting half; every played pair gets
+    `prior` virtual wins each way so unbeaten or winless players keep a finite rating.
+    """
+    pairs = {frozenset(pair) for pair in wins}
+    won = {name: 0.0 for name in names}
+    played = {}
+    for pair in pairs:
+        a, b = tuple(pair)
+        a_wins = wins.get((a, b), 0.0) + prior
+        b_wins = wins.get((b, a), 0.0) + prior
+        won[a] += a_wins
+        won[b] += b_wins
+        played[(a, b)] = played[(b, a)] = a_wins + b_wins
+
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        updated = {}
+        for name in names:
+            denominator = sum(count / (strength[name] + strength[other])
+                              for (player, other), count in played.items() if player == name)
+            updated[name] = won[name] / denominator if denominator else strength[name]
+        scale = math.exp(sum(math.log(value) for value in updated.values()) / len(updated))
+        strength = {name: value / scale for name, value in updated.items()}
+    return {name: 1500.0 + 400.0 * math.log10(value) for name, value in strength.items()}
+
+
+# --- Tournament -------------------------------------------------------------------
+
+class Tournament:
+    """Round-robin or Swiss tournament between AI players, played in a process pool
+
+    Results are checkpointed to JSON after every finished job; running the same
+    tournament again with the same checkpoint resumes where it stopped.
+    """
+
+    def __init__(self, players=None, games=100, fmt="round-robin", rounds=None, seed=0,
+                 workers=None, chunk_size=10, checkpoint=None):
+        self.players = list(players or DEFAULT_PLAYERS)
+        self.names = [player["name"] for player in self.players]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("Player names must be unique")
+        if fmt not in ("round-robin", "swiss"):
+            raise ValueError(f"Unknown tournament format: {fmt}")
+        self.games = games
+        self.format = fmt
+        self.rounds = rounds or (1 if fmt == "round-robin" else max(1, math.ceil(math.log2(len(self.players)))))
+        self.seed = seed
+        self.workers = workers or max(1, os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.rng = random.Random(seed)
+        self.schedule = []  # One {"seeds": [...], "pairs": [[a, b], ...], "bye": name} per round
+        self.shots = {name: {} for name in self.names}
+        self._load_checkpoint()
+
+    # Checkpoints
+
+    def _config(self):
+        return {"players": self.players, "games": self.games, "format": self.format,
+                "rounds": self.rounds, "seed": self.seed}
+
+    def _load_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return
+        with open(self.checkpoint, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION or data.get("config") != self._config():
+            raise ValueError(f"{self.checkpoint} belongs to a different tournament")
+        self.schedule = data["schedule"]
+        for name, results in data["shots"].items():
+            self.shots[name] = {int(seed): count for seed, count in results.items()}
+        self.rng.setstate(_rng_state(data["rng"]))
+
+    def _save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        data = {"version": CHECKPOINT_VERSION, "config": self._config(), "schedule": self.schedule,
+                "shots": self.shots, "rng": self.rng.getstate()}
+        tmp_path = f"{self.checkpoint}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.checkpoint)
+
+    # Scheduling
+
+    def _pair_round(self):
+        """Pairings (and bye) of the next round: everyone for round-robin, by standings for Swiss"""
+        if self.format == "round-robin":
+            return [[a, b] for i, a in enumerate(self.names) for b in self.names[i + 1:]], None
+        standings = self.standings()
+        order = sorted(self.names, key=lambda name: (-standings[name], self.names.index(name)))
+        bye = None
+        if len(order) % 2:
+            # The lowest-ranked player among those with the fewest byes sits out
+            byes = [past.get("bye") for past in self.schedule]
+            bye = min(reversed(order), key=byes.count)
+            order.remove(bye)
+        played = {frozenset(pair) for past in self.schedule for pair in past["pairs"]}
+        pairs = []
+        while order:
+            first = order.pop(0)
+            # Highest-ranked opponent not met yet, else the next one in the standings
+            opponent = next((other for other in order if frozenset((first, other)) not in played), order[0])
+            order.remove(opponent)
+            pairs.append([first, opponent])
+        return pairs, bye
+
+    def _run_jobs(self, jobs):
+        """Play (player, seeds) jobs, longest first, recording and checkpointing each result"""
+        if not jobs:
+            return
+        specs = {player["name"]: player for player in self.players}
+        jobs.sort(key=lambda job: -PLAYER_COST.get(specs[job[0]]["type"], 1.0) * len(job[1]))
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(play_games, specs[name], seeds): (name, seeds) for name, seeds in jobs}
+            for future in as_completed(futures):
+                name, seeds = futures[future]
+                for seed, count in zip(seeds, future.result()):
+                    self.shots[name][seed] = count
+                self._save_checkpoint()
+
+    def _missing_jobs(self, round_info):
+        jobs = []
+        needed = {name for pair in round_info["pairs"] for name in pair}
+        for name in self.names:
+            if name not in needed:
+                continue
+            missing = [seed for seed in round_info["seeds"] if seed not in self.shots[name]]
+            for start in range(0, len(missing), self.chunk_size):
+                jobs.append((name, missing[start:start + self.chunk_size]))
+        return jobs
+
+    def run(self):
+        """Play every remaining round and return the report"""
+        for index in range(self.rounds):
+            if index == len(self.schedule):
+                seeds = [self.rng.getrandbits(32) for _ in range(self.games)]
+                pairs, bye = self._pair_round()
+                self.schedule.append({"seeds": seeds, "pairs": pairs, "bye": bye})
+                self._save_checkpoint()
+            self._run_jobs(self._missing_jobs(self.schedule[index]))
+        return self.report()
+
+    # Results
+
+    def _pair_seeds(self):
+        """Yield (a, b, seed) for every game of every pairing played so far, in schedule order"""
+        for round_info in self.schedule:
+            for a, b in round_info["pairs"]:
+                for seed in round_info["seeds"]:
+                    if seed in self.shots[a] and seed in self.shots[b]:
+                        yield a, b, seed
+
+    def _pair_games(self):
+        """Yield (a, b, score of a) for every game of every pairing, in schedule order"""
+        for a, b, seed in self._pair_seeds():
+            diff = self.shots[b][seed] - self.shots[a][seed]
+            yield a, b, 1.0 if diff > 0 else (0.0 if diff < 0 else 0.5)
+
+    def standings(self):
+        """Match points so far: 1 for winning a pairing or a bye, 0.5 for a drawn pairing"""
+        points = {name: 0.0 for name in self.names}
+        for round_info in self.schedule:
+            if round_info.get("bye"):
+                points[round_info["bye"]] += 1.0
+            for a, b in round_info["pairs"]:
+                seeds = round_info["seeds"]
+                wins, losses, _ = game_outcomes({s: self.shots[a][s] for s in seeds if s in self.shots[a]},
+                                                {s: self.shots[b][s] for s in seeds if s in self.shots[b]})
+                if wins > losses:
+                    points[a] += 1.0
+                elif losses > wins:
+                    points[b] += 1.0
+                else:
+                    points[a] += 0.5
+                    points[b] += 0.5
+        return points
+
+    def report(self):
+        """Ratings per player and statistics per matchup"""
+        games = list(self._pair_games())
+        wins = {}
+        matchups = {}
+        for a, b, score in games:
+            wins[(a, b)] = wins.get((a, b), 0.0) + score
+            wins[(b, a)] = wins.get((b, a), 0.0) + 1.0 - score
+            # One entry per matchup whatever the order of a pairing
+            if self.names.index(a) > self.names.index(b):
+                a, b, score = b, a, 1.0 - score
+            stats = matchups.setdefault((a, b), {"a": a, "b": b, "games": 0, "wins": 0, "losses": 0, "draws": 0})
+            stats["games"] += 1
+            stats["wins" if score == 1.0 else "losses" if score == 0.0 else "draws"] += 1
+        # Shot differences over the games the pairings of a matchup played, not every shared seed
+        diffs = {}
+        for a, b, seed in self._pair_seeds():
+            if self.names.index(a) > self.names.index(b):
+                a, b = b, a
+            diffs.setdefault((a, b), []).append(self.shots[a][seed] - self.shots[b][seed])
+        for matchup, stats in matchups.items():
+            played = diffs.get(matchup, [])
+            stats["mean_shot_diff"] = sum(played) / len(played) if played else 0.0
+
+        elo = elo_ratings(games, self.names)
+        bt = bradley_terry(wins, self.names)
+        standings = self.standings()
+        players = []
+        for name in self.names:
+            counts = list(self.shots[name].values())
+            players.append({"name": name, "points": standings[name], "elo": elo[name], "bradley_terry": bt[name],
+                            "games": len(counts), "mean_shots": sum(counts) / len(counts) if counts else 0.0})
+        players.sort(key=lambda player: -player["bradley_terry"])
+        return {"players": players, "matchups": list(matchups.values())}
+
+
+def _rng_state(state):
+    """Random.setstate wants tuples where JSON gave lists"""
+    version, internal, gauss = state
+    return version, tuple(internal), gauss
+
+
+def print_report(report):
+    print(f"{'player':<16}{'points':>8}{'elo':>9}{'bt':>9}{'mean shots':>12}{'games':>8}")
+    for player in report["players"]:
+        print(f"{player['name']:<16}{player['points']:>8.1f}{player['elo']:>9.0f}{player['bradley_terry']:>9.0f}"
+              f"{player['mean_shots']:>12.2f}{player['games']:>8}")
+    print()
+    for stats in report["matchups"]:
+        print(f"{stats['a']} vs {stats['b']}: {stats['wins']}-{stats['losses']}-{stats['draws']} "
+              f"over {stats['games']} games, mean shot difference {stats['mean_shot_diff']:+.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Tournoi entre IA sur des flottes identiques")
+    parser.add_argument("--players", help="JSON file with a list of player specs")
+    parser.add_argument("--format", choices=["round-robin", "swiss"], default="round-robin")
+    parser.add_argument("--games", type=int, default=100, help="fleets per round")
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default=None, help="JSON file to resume from and save to")
+    args = parser.parse_args()
+    players = None
+    if args.players:
+        with open(args.players, encoding="utf-8") as f:
+            players = json.load(f)
+    tournament = Tournament(players, args.games, args.format, args.rounds, args.seed,
+                            args.workers, checkpoint=args.checkpoint)
+    print_report(tournament.run())
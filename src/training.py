@@ -0,0 +1,236 @@
+import os
+import random
+from src.ai import ReinforcementLearningAI, MODEL_PATH, LINEAR_MODEL_PATH, board_state_key, shot_reward
+from src.board import Board, new_board
+from src.record import read_record, board_from_fleet, fleet_from_board, header_rules, RECORD_VERSION
+from src.qtable import QTable
+from src.rules import DEFAULT_RULES
+from src.seeding import GameStreams, new_master_seed
+from src.ship import Ship
+
+
+def iter_record_files(paths):
+    """Stream every record found in the given files or directories, one game at a time"""
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        if os.path.isdir(path):
+            import glob
+            files = sorted(glob.glob(os.path.join(path, '*.jsonl')))
+        else:
+            files = [path]
+        for file in files:
+            yield read_record(file)
+
+
+def iter_trajectories(records, shooter=None):
+    """Turn recorded games into (state, action, reward) trajectories, one per attacked fleet
+
+    Only shots fired by `shooter` are kept when it is given (e.g. "player" for human shots).
+    """
+    for entries in records:
+        boards = {}
+        trajectories = {}
+        for entry in entries:
+            if entry['type'] == 'header':
+                rules = header_rules(entry)
+                boards = {name: board_from_fleet(fleet, rules) for name, fleet in entry['fleets'].items()}
+                trajectories = {name: [] for name in boards}
+            elif entry['type'] == 'shot':
+                board = boards[entry['board']]
+                row, col, hit = entry['row'], entry['col'], entry['hit']
+                if shooter is None or entry['by'] == shooter:
+                    # Hits already scored on ships that are still afloat
+                    ship_hits = sum(1 for r, c in board.hits if board.sunk_ship(r, c) < 0)
+                    trajectories[entry['board']].append(
+                        (board_state_key(board), (row, col), shot_reward(hit, ship_hits)))
+                board.receive_attack(row, col)
+        for trajectory in trajectories.values():
+            if trajectory:
+                yield trajectory
+
+
+def discounted_returns(trajectory, discount_factor):
+    """Return the discounted return of every step of a trajectory"""
+    returns = [0.0] * len(trajectory)
+    running = 0.0
+    for i in range(len(trajectory) - 1, -1, -1):
+        running = trajectory[i][2] + discount_factor * running
+        returns[i] = running
+    return returns
+
+
+def random_fleet_board(rng, rules=None):
+    """Build a board with a randomly placed fleet"""
+    board = new_board(rules)
+    for ship_data in board.rules.ships:
+        ship = Ship(ship_data["name"], ship_data["size"])
+        placed = False
+        while not placed:
+            row = rng.randint(0, board.rules.height - 1)
+            col = rng.randint(0, board.rules.width - 1)
+            placed = board.place_ship(ship, row, col, rng.choice([True, False]))
+    return board
+
+
+def generate_records(num_games, ai=None, seed=None, rules=None, first_game=0):
+    """Play self-play games against random fleets and yield each one as record entries
+
+    Game n draws from the streams of (seed, n), so a run split into ranges of games with
+    first_game plays exactly the same games as a single run.
+    """
+    seed = new_master_seed() if seed is None else seed
+    rules = rules or DEFAULT_RULES
+    ai = ai or ReinforcementLearningAI(Board(rules))
+    for game in range(first_game, first_game + num_games):
+        streams = GameStreams(seed, game)
+        board = random_fleet_board(streams.fleet, rules)
+        ai.player_board = board
+        ai.rng = streams.ai
+        ai.reset_game_state()
+
+        entries = [{'type': 'header', 'version': RECORD_VERSION, 'mode': 'selfplay', 'seed': seed, 'game': game,
+                    'grid_size': rules.width, 'rules': rules.to_dict(),
+                    'fleets': {'player': fleet_from_board(board)}}]
+        while not board.all_ships_sunk():
+            row, col = ai.get_attack_coordinates()
+            if board.view[row][col] != '.':
+                row, col = board.sample_free_cells(1, streams.engine)[0]
+            hit, sunk = board.receive_attack(row, col, report_sunk=True)
+            ai.register_result(row, col, hit, sunk.size if sunk else None)
+            entries.append({'type': 'shot', 'n': len(entries) - 1, 'by': 'computer', 'board': 'player',
+                            'row': row, 'col': col, 'hit': hit})
+        entries.append({'type': 'end', 'winner': 'computer', 'shots': len(entries) - 1})
+        yield entries
+
+
+class OfflineTrainer:
+    """Batch Q-learning over streamed trajectories with a bounded experience replay buffer"""
+
+    def __init__(self, ai, buffer_size=50000, batch_size=64, seed=None):
+        self.ai = ai
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.buffer = []
+        self._next_slot = 0
+        self.trajectories = 0
+        self.transitions = 0
+        self.updates = 0
+
+    def add(self, state, action, target):
+        """Store one (state, action, discounted return) sample, overwriting the oldest when full"""
+        if len(self.buffer) < self.buffer_size:
+            self.buffer.append((state, action, target))
+        else:
+            self.buffer[self._next_slot] = (state, action, target)
+            self._next_slot = (self._next_slot + 1) % self.buffer_size
+
+    def replay(self):
+        """Apply one minibatch of Q-value updates sampled from the buffer"""
+        if len(self.buffer) < self.batch_size:
+            return
+        for state, action, target in self.rng.sample(self.buffer, self.batch_size):
+            self.ai._update_q_value(state, action, target)
+        self.updates += self.batch_size
+
+    def train(self, trajectories):
+        """Consume trajectories lazily; each one is replayed into the buffer then sampled"""
+        for trajectory in trajectories:
+            returns = discounted_returns(trajectory, self.ai.discount_factor)
+            for (state, action, _), target in zip(trajectory, returns):
+                self.add(state, action, target)
+            self.trajectories += 1
+            self.transitions += len(trajectory)
+            # Keep roughly one update per stored transition
+            for _ in range(max(1, len(trajectory) // self.batch_size)):
+                self.replay()
+        return self.stats()
+
+    def stats(self):
+        """Return training counters"""
+        return {
+            'trajectories': self.trajectories,
+            'transitions': self.transitions,
+            'updates': self.updates,
+            'buffer': len(self.buffer),
+            'states': len(self.ai.q_table),
+            'q_table': self.ai.q_table.stats() if hasattr(self.ai.q_table, 'stats') else None
+        }
+
+
+class PolicyTrainer:
+    """Logistic regression of a LinearPolicy on where the ships were in recorded games
+
+    Every shot gives one example per untargeted cell: its features in the view the shot was
+    fired from, labelled by the recorded fleet. Each game is one gradient step.
+    """
+
+    def __init__(self, policy, learning_rate=0.5, steps=4, shooter=None):
+        self.policy = policy
+        self.learning_rate = learning_rate
+        self.steps = steps
+        self.shooter = shooter
+        self.games = 0
+        self.examples = 0
+        self.loss = None
+
+    def train(self, records):
+        """Consume records lazily, one fitted game at a time"""
+        import numpy as np
+        from src.linear_policy import cell_features
+
+        for entries in records:
+            boards = {}
+            features = []
+            labels = []
+            for entry in entries:
+                if entry['type'] == 'header':
+                    rules = header_rules(entry)
+                    boards = {name: board_from_fleet(fleet, rules) for name, fleet in entry['fleets'].items()}
+                    ships = {name: np.array(board.grid).ravel() == 'S' for name, board in boards.items()}
+                elif entry['type'] == 'shot':
+                    board = boards[entry['board']]
+                    if (self.shooter is None or entry['by'] == self.shooter) and self.policy.supports(board.rules):
+                        cells, free = cell_features(board)
+                        features.append(cells[free])
+                        labels.append(ships[entry['board']][free])
+                    board.receive_attack(entry['row'], entry['col'])
+            if features:
+                features = np.concatenate(features)
+                self.loss = self.policy.fit(features, np.concatenate(labels), self.learning_rate, self.steps)
+                self.games += 1
+                self.examples += len(features)
+        return self.stats()
+
+    def stats(self):
+        """Return training counters"""
+        from src.linear_policy import FEATURES
+        return {
+            'games': self.games,
+            'examples': self.examples,
+            'loss': self.loss,
+            'weights': {name: round(float(w), 4) for name, w in zip(FEATURES, self.policy.weights)},
+            'bytes': self.policy.nbytes
+        }
+
+
+def train_policy_from_records(paths, model_path=LINEAR_MODEL_PATH, **trainer_options):
+    """Train the saved linear policy on recorded games and write it back"""
+    from src.linear_policy import LinearPolicy
+    policy = LinearPolicy.load(model_path)
+    trainer = PolicyTrainer(policy, **trainer_options)
+    stats = trainer.train(iter_record_files(paths))
+    policy.save(model_path)
+    return stats
+
+
+def train_from_records(paths, model_path=MODEL_PATH, shooter=None, **trainer_options):
+    """Train the saved model on recorded games and write it back"""
+    ai = ReinforcementLearningAI(Board())
+    ai.q_table = QTable()
+    ai.load_model(model_path)
+    trainer = OfflineTrainer(ai, **trainer_options)
+    stats = trainer.train(iter_trajectories(iter_record_files(paths), shooter=shooter))
+    ai.save_model(model_path)
+    return stats
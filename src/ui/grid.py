@@ -1,14 +1,16 @@
 import pygame
 from src.utils.constants import RED, BLACK, WHITE, GREEN, SKY_BLUE, BLUE, WATER_PATH, GRAY
 
-def draw_grid(screen, board, fonts, assets, reveal=False, is_player_grid=False, position="center"):
+def draw_grid(screen, board, fonts, assets, reveal=False, is_player_grid=False, position="center", subtitle=None):
     """Draw a game board grid with ships and hits/misses"""
     # Setup - Move title higher up
     # title = fonts["large"].render("Bataille Navale", True, BLUE)
     # screen.blit(title, (screen.get_width() // 2 - title.get_width() // 2, 10))
     
     # Create subtitle
-    if is_player_grid:
+    if subtitle is not None:
+        subtitle = fonts["small"].render(subtitle, True, WHITE)
+    elif is_player_grid:
         subtitle = fonts["small"].render("Votre grille", True, WHITE)
     else:
         subtitle = fonts["small"].render("Grille adversaire", True, WHITE)
@@ -40,7 +40,7 @@ def draw_main_menu(screen, game_state, fonts, background, button_cooldown=0):
     button_margin = button_width * 0.2
     
     # Center buttons horizontally
-    buttons_total_width = 2 * button_width + button_margin
+    buttons_total_width = 3 * button_width + 2 * button_margin
     buttons_start_x = (screen_width - buttons_total_width) / 2
     buttons_y = screen_height * 0.75
     
@@ -70,6 +70,19 @@ def draw_main_menu(screen, game_state, fonts, background, button_cooldown=0):
         fonts["button"],
         game_state.start_multiplayer if button_cooldown == 0 else None,
     )
+    
+    draw_button(
+        screen,
+        "En réseau",
+        buttons_start_x + 2 * (button_width + button_margin),
+        buttons_y,
+        button_width,
+        button_height,
+        GRAY,
+        WHITE,
+        fonts["button"],
+        game_state.start_network_multiplayer if button_cooldown == 0 else None,
+    )
 
 def draw_ship_selection(screen, game_state, fonts):
     """Draw the ship selection UI during placement phase with responsive layout"""
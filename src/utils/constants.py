@@ -1,9 +1,9 @@
-import pygame
 import os
 
 # Screen settings
 def get_screen_resolution():
     """Get the screen resolution minus a small offset for taskbar"""
+    import pygame  # Only the display needs pygame: logic modules import these constants
     display_w = pygame.display.Info().current_w
     display_h = pygame.display.Info().current_h
     return [display_w, display_h - 72]
@@ -34,6 +34,8 @@ SHIPS = [
 
 # Game speed
 FPS = 60
+IDLE_FPS = 10  # Frame rate of a static screen, input wakes it at once
+INPUT_GRACE_MS = 500  # Full rate kept this long after the last input
 
 # Background path
 BACKGROUND_PATH = os.path.join("assets", "background", "background1.jpg")
@@ -47,5 +49,14 @@ MESSAGE_DURATION = 60  # Standard duration for messages
 ROTATION_COOLDOWN = 15  # Cooldown for ship rotation
 TRANSITION_DELAY = 90  # Delay for state transitions
 
+# Network settings
+NETWORK_HOST = "127.0.0.1"
+NETWORK_PORT = 8765
+SPECTATOR_PORT = 8767
+
+# Played games are recorded (JSON lines, see src/record.py) only when this directory is set
+GAME_RECORDS_DIR = os.environ.get("BATAILLE_RECORDS") or None
+
 # AI constants
-AI_THINKING_DELAY = 90  # Delay to simulate AI thinking
\ No newline at end of file
+AI_THINKING_DELAY = 90  # Delay to simulate AI thinking
+AI_TARGETING_BUDGET_MS = 30  # Time the AI may spend sampling fleets per move (in its worker thread)
\ No newline at end of file
@@ -1,6 +1,9 @@
 import pygame
 import os
 from src.utils.constants import BACKGROUND_PATH, WATER_PATH,GAMEPLAY_BACKGROUND_PATH
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
 
 def load_assets(resolution):
     """Load all game assets"""
@@ -17,7 +20,7 @@ def load_assets(resolution):
         gameplay_bg = pygame.transform.scale(gameplay_bg, resolution)
         assets["gameplay_background"] = gameplay_bg
     except Exception as e:
-        print(f"Error loading background: {e}")
+        log.warning("Error loading background: %s", e)
         # Create a fallback background
         bg = pygame.Surface(resolution)
         bg.fill((30, 50, 90))  # Dark blue
@@ -29,9 +32,9 @@ def load_assets(resolution):
         water = pygame.image.load(WATER_PATH)
         # No need to scale it here - we'll tile it in the grid drawing function
         assets["water"] = water
-        print("Water image loaded successfully")
+        log.debug("Water image loaded")
     except Exception as e:
-        print(f"Error loading water image: {e}")
+        log.warning("Error loading water image: %s", e)
         # We'll fall back to the default sky blue if this fails
     
     # Load ship images
@@ -44,7 +47,7 @@ def load_assets(resolution):
                 ship_img = pygame.image.load(ship_path)
                 assets["ships"][ship_name] = ship_img
     except Exception as e:
-        print(f"Error loading ship assets: {e}")
+        log.warning("Error loading ship assets: %s", e)
     
     # Load UI elements
     try:
@@ -56,7 +59,7 @@ def load_assets(resolution):
                 ui_img = pygame.image.load(ui_path)
                 assets["ui"][ui_element] = ui_img
     except Exception as e:
-        print(f"Error loading UI assets: {e}")
+        log.warning("Error loading UI assets: %s", e)
     
     return assets
 
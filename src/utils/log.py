@@ -0,0 +1,228 @@
+import os
+import sys
+import time
+
+# Leveled, structured logging for the game and the engine. A message is a %-format string
+# with its arguments plus optional key=value fields, and is only formatted by a sink once a
+# logger let it through. Each logger keeps `debug_enabled` / `info_enabled` flags that
+# debug() and info() test first, so a disabled call in the 60 FPS loop formats nothing.
+#
+# Levels come from the BATAILLE_LOG environment variable, a default level and per-module
+# overrides, e.g. "warning,src.multiplayer=debug". Records go to stderr; configure() can
+# add a rotating text file or a JSON-lines file (BATAILLE_LOG_FILE, JSON when it ends in
+# .jsonl), written by a background thread so that disk I/O never blocks a frame.
+# Only the standard `logging` package was avoided: it costs more to import than the
+# engine modules' whole startup budget (see `python -m src bench`).
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+LOG_ENV = "BATAILLE_LOG"
+LOG_FILE_ENV = "BATAILLE_LOG_FILE"
+DEFAULT_LEVEL = INFO
+
+# Rotating files keep this many bytes per file and this many older files
+MAX_BYTES = 1 << 20
+BACKUPS = 3
+
+
+def parse_levels(spec):
+    """(default level, {module: level}) of a spec such as "warning,src.multiplayer=debug" """
+    default = DEFAULT_LEVEL
+    modules = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, level = item.rpartition("=")
+        level = LEVELS.get(level.strip().lower())
+        if level is None:
+            continue
+        if name:
+            modules[name.strip()] = level
+        else:
+            default = level
+    return default, modules
+
+
+def format_record(record):
+    """One line of text for a (time, level, name, message, args, fields) record"""
+    _, level, name, message, args, fields = record
+    text = message % args if args else message
+    if fields:
+        text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+    return f"{LEVEL_NAMES[level].upper()} {name}: {text}"
+
+
+def json_record(record):
+    """One JSON object per record, fields included"""
+    import json  # Only the JSON lines file needs it, keep it out of every module's import
+    created, level, name, message, args, fields = record
+    data = {"time": round(created, 3), "level": LEVEL_NAMES[level], "logger": name,
+            "message": message % args if args else message}
+    data.update(fields)
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class ConsoleSink:
+    """Writes records to stderr as they come"""
+
+    def write(self, record):
+        print(format_record(record), file=sys.stderr)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Appends records to a file, rotating it to path.1 ... path.N past max_bytes"""
+
+    def __init__(self, path, json_lines=False, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.json_lines = json_lines
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write((json_record(record) if self.json_lines else format_record(record)) + "\n")
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self):
+        self._file.close()
+
+
+class BackgroundSink:
+    """Hands records to another sink running in a daemon thread"""
+
+    def __init__(self, sink):
+        import queue
+        import threading
+        self.sink = sink
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                self.sink.write(record)
+            except Exception:
+                pass
+        self.sink.close()
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def close(self):
+        """Write the queued records and stop the thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class Logger:
+    """Logger of one module; get one with get_logger(__name__)"""
+
+    __slots__ = ("name", "level", "debug_enabled", "info_enabled")
+
+    def __init__(self, name):
+        self.name = name
+        self._update()
+
+    def _update(self):
+        self.level = _level_of(self.name)
+        self.debug_enabled = self.level <= DEBUG
+        self.info_enabled = self.level <= INFO
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, message, *args, **fields):
+        if level >= self.level:
+            _emit((time.time(), level, self.name, message, args, fields))
+
+    def debug(self, message, *args, **fields):
+        if self.debug_enabled:
+            _emit((time.time(), DEBUG, self.name, message, args, fields))
+
+    def info(self, message, *args, **fields):
+        if self.info_enabled:
+            _emit((time.time(), INFO, self.name, message, args, fields))
+
+    def warning(self, message, *args, **fields):
+        if self.level <= WARNING:
+            _emit((time.time(), WARNING, self.name, message, args, fields))
+
+    def error(self, message, *args, **fields):
+        if self.level <= ERROR:
+            _emit((time.time(), ERROR, self.name, message, args, fields))
+
+
+_default_level, _module_levels = parse_levels(os.environ.get(LOG_ENV))
+_loggers = {}
+_sinks = [ConsoleSink()]
+_shutdown_registered = False
+
+
+def _level_of(name):
+    """Level of the most specific configured module containing `name`"""
+    while name:
+        if name in _module_levels:
+            return _module_levels[name]
+        name = name.rpartition(".")[0]
+    return _default_level
+
+
+def _emit(record):
+    for sink in _sinks:
+        sink.write(record)
+
+
+def get_logger(name):
+    """The logger of a module, shared by every caller"""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = Logger(name)
+    return logger
+
+
+def configure(levels=None, file=None, json_lines=None, console=True, max_bytes=MAX_BYTES, backups=BACKUPS):
+    """Set the levels (a spec like BATAILLE_LOG's) and the sinks; defaults come from the environment
+
+    A file sink writes from a background thread; it is flushed and closed by shutdown(),
+    which runs at exit.
+    """
+    global _default_level, _module_levels, _shutdown_registered
+    _default_level, _module_levels = parse_levels(os.environ.get(LOG_ENV) if levels is None else levels)
+    for logger in _loggers.values():
+        logger._update()
+
+    shutdown()
+    _sinks[:] = [ConsoleSink()] if console else []
+    file = os.environ.get(LOG_FILE_ENV) if file is None else file
+    if file:
+        json_lines = file.endswith(".jsonl") if json_lines is None else json_lines
+        _sinks.append(BackgroundSink(FileSink(file, json_lines, max_bytes, backups)))
+        if not _shutdown_registered:
+            import atexit
+            atexit.register(shutdown)
+            _shutdown_registered = True
+
+
+def shutdown():
+    """Flush and close the background sinks"""
+    for sink in [sink for sink in _sinks if isinstance(sink, BackgroundSink)]:
+        sink.close()
+        _sinks.remove(sink)
@@ -0,0 +1,57 @@
+import random
+
+from src.game_state import GameState
+
+
+def _place_fleet(game_state, rng):
+    """Place the player's fleet at random, the way the placement screen does"""
+    rules = game_state.rules
+    while game_state.current_ship_index < len(game_state.ships):
+        horizontal = rng.random() < 0.5
+        row, col = rng.randrange(rules.height), rng.randrange(rules.width)
+        if game_state.place_player_ship(row, col, game_state.ships[game_state.current_ship_index]["size"], horizontal):
+            game_state.current_ship_index += 1
+
+
+def test_single_player_game_aims_at_the_player_board():
+    random.seed(11)
+    rng = random.Random(5)
+    game_state = GameState((800, 600))
+    game_state.start_single_player()
+    # The placement screen gives the player a fresh board once the AI exists
+    game_state.new_player_board()
+    assert game_state.computer_ai.player_board is game_state.player_board
+
+    ai = game_state.computer_ai
+    picks = []
+    choose = ai.targeter.choose
+
+    def recording_choose(*args):
+        move = choose(*args)
+        picks.append(move)
+        return move
+
+    ai.targeter.choose = recording_choose
+    _place_fleet(game_state, rng)
+    game_state.state = GameState.GAME
+
+    player_cells = [(row, col) for row in range(game_state.rules.height) for col in range(game_state.rules.width)]
+    targeted = 0
+    try:
+        while game_state.state == GameState.GAME:
+            game_state.player_attack(*player_cells.pop())
+            if game_state.state != GameState.GAME:
+                break
+            del picks[:]
+            game_state.start_computer_turn()
+            game_state.computer_move.result()
+            row, col, _ = game_state.poll_computer_turn()
+            if picks and picks[-1] is not None:
+                # The targeter read the board being played, so its pick is the shot fired
+                assert (row, col) == picks[-1]
+                targeted += 1
+            assert ai.player_board is game_state.player_board
+    finally:
+        game_state.close()
+    assert targeted > 0
+    assert game_state.winner is not None
@@ -0,0 +1,40 @@
+import asyncio
+import random
+
+from src.network import RelayServer, decode, encode
+from src.record import fleet_from_board
+from src.training import random_fleet_board
+
+
+async def _send(reader, writer, message):
+    writer.write(encode(message))
+    await writer.drain()
+    return decode(await asyncio.wait_for(reader.readline(), 2))
+
+
+async def _malformed_resync():
+    server = RelayServer('127.0.0.1', 0)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        assert (await _send(reader, writer, {'t': 'join'}))['t'] == 'wait'
+        # Fleets may arrive before the opponent; the seat is not in a match yet
+        fleet = fleet_from_board(random_fleet_board(random.Random(1)))
+        writer.write(encode({'t': 'fleet', 'ships': fleet}))
+        other_reader, other_writer = await asyncio.open_connection('127.0.0.1', server.port)
+        other_writer.write(encode({'t': 'join'}))
+        assert decode(await asyncio.wait_for(reader.readline(), 2))['t'] == 'joined'
+
+        reply = await _send(reader, writer, {'t': 'resync', 'b': [1], 's': 0})
+        assert reply == {'t': 'error', 'msg': 'cannot resync'}
+        # The connection survives the bad message
+        reply = await _send(reader, writer, {'t': 'resync', 'b': 1, 's': 0})
+        assert reply['t'] == 'sync' and reply['b'] == 1
+        writer.close()
+        other_writer.close()
+    finally:
+        await server.close()
+
+
+def test_unhashable_resync_owner_is_rejected():
+    asyncio.run(_malformed_resync())
@@ -0,0 +1,50 @@
+import pickle
+
+from src.qtable import QTable
+
+
+def test_eviction_keeps_the_table_within_capacity():
+    table = QTable(capacity=64, evict_fraction=1 / 8)
+    for index in range(1000):
+        table.update(('state', index), (index % 10, 0), 1.0, 0.5)
+        assert len(table) <= 64
+    assert table.evictions >= 1000 - 64
+    assert table.stats()['states'] == len(table)
+
+
+def test_eviction_keeps_the_most_visited_states():
+    table = QTable(capacity=64, evict_fraction=1 / 8)
+    hot = [('hot', index) for index in range(16)]
+    for state in hot:
+        table.set(state, (0, 0), 1.0)
+        for _ in range(10):
+            table.get(state)
+    for index in range(500):
+        table.update(('cold', index), (0, 0), 1.0, 0.5)
+    assert all(state in table for state in hot)
+    assert table[hot[0]] == {(0, 0): 1.0}
+
+
+def test_visits_decay_with_age():
+    table = QTable(capacity=2, half_life=4, evict_fraction=0.5)
+    table.set('old', (0, 0), 1.0)
+    for _ in range(8):
+        table.get('old')
+    # 40 epochs later, 8 old visits weigh 8 / 2**10, less than 2 recent ones
+    for _ in range(40):
+        table.advance_epoch()
+    table.set('recent', (0, 0), 1.0)
+    for _ in range(2):
+        table.get('recent')
+    table.set('new', (0, 0), 1.0)
+    assert 'old' not in table
+    assert 'recent' in table and 'new' in table
+
+
+def test_pickle_round_trip():
+    table = QTable(capacity=64, evict_fraction=1 / 8)
+    for index in range(200):
+        table.update(('state', index), (index % 7, index % 3), float(index), 1.0)
+    copy = pickle.loads(pickle.dumps(table))
+    assert len(copy) == len(table)
+    assert dict(copy.items()) == dict(table.items())
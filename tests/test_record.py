@@ -0,0 +1,71 @@
+import random
+
+from src.game_state import GameState
+from src.record import GameRecorder, GameReplay, board_from_fleet, fleet_from_board, read_record
+from src.training import random_fleet_board
+
+
+def _record_game(path, seed=7):
+    """Record a game of random shots at two random fleets; return the fleets and the shots"""
+    rng = random.Random(seed)
+    boards = {'player': random_fleet_board(rng), 'computer': random_fleet_board(rng)}
+    fleets = {name: fleet_from_board(board) for name, board in boards.items()}
+    recorder = GameRecorder('single', seed, path=str(path))
+    recorder.start(fleets)
+    cells = {name: [(row, col) for row in range(10) for col in range(10)] for name in boards}
+    for cell_list in cells.values():
+        rng.shuffle(cell_list)
+    shots = []
+    for index in range(120):
+        name = 'computer' if index % 2 else 'player'
+        row, col = cells[name].pop()
+        hit = boards[name].receive_attack(row, col)
+        recorder.record_shot('player' if name == 'computer' else 'computer', name, row, col, hit)
+        shots.append((name, row, col))
+    # Every shot is on disk before the game ends
+    assert [entry['type'] for entry in read_record(str(path))] == ['header'] + ['shot'] * len(shots)
+    recorder.finish('player')
+    return fleets, shots
+
+
+def test_seek_matches_a_sequential_replay(tmp_path):
+    path = tmp_path / 'game.jsonl'
+    fleets, shots = _record_game(path)
+    replay = GameReplay.load(str(path), snapshot_interval=7)
+    assert len(replay) == len(shots)
+    assert replay.winner == 'player'
+
+    boards = {name: board_from_fleet(fleet) for name, fleet in fleets.items()}
+    for move in range(len(shots) + 1):
+        seeked = replay.boards_at(move)
+        for name, board in boards.items():
+            assert seeked[name].view == board.view
+            assert seeked[name].hits == board.hits and seeked[name].misses == board.misses
+        if move < len(shots):
+            name, row, col = shots[move]
+            boards[name].receive_attack(row, col)
+
+    # Seeking backwards after the end gives the same boards again
+    assert replay.boards_at(10)['player'].view == GameReplay.load(str(path)).boards_at(10)['player'].view
+
+
+def test_abandoned_hot_seat_game_is_finished(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.multiplayer.GAME_RECORDS_DIR', str(tmp_path))
+    game_state = GameState((800, 600))
+    game_state.start_multiplayer()
+    multiplayer = game_state.multiplayer
+    multiplayer.record_games = True
+    for _ in range(2):
+        for index, ship in enumerate(game_state.ships):
+            assert multiplayer.place_ship(2 * index, 0, ship['size'], True)
+        multiplayer.switch_player()
+    multiplayer.attack(9, 9)
+    multiplayer.attack(0, 0)
+
+    game_state.restart_game()
+    records = list(tmp_path.iterdir())
+    assert len(records) == 1
+    entries = list(read_record(str(records[0])))
+    assert [entry['type'] for entry in entries] == ['header', 'shot', 'shot', 'end']
+    assert entries[-1]['winner'] is None
+    game_state.close()
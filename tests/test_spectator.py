@@ -0,0 +1,34 @@
+import random
+
+from src.spectator import SpectatorPublisher, SpectatorView
+from src.sync import BoardEventLog
+from src.training import random_fleet_board
+
+
+def _drain(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def test_slow_spectator_gets_a_snapshot_then_the_end():
+    for queue_size in (1, 2, 8):
+        rng = random.Random(queue_size)
+        log = BoardEventLog(random_fleet_board(rng))
+        publisher = SpectatorPublisher(queue_size=queue_size)
+        publisher.open_game('g')
+        subscription = publisher.subscribe('g')
+        cells = [(row, col) for row in range(10) for col in range(10)]
+        rng.shuffle(cells)
+        for row, col in cells[:30]:
+            publisher.publish('g', '1', log.attack(row, col))
+        publisher.close_game('g', '2')
+
+        messages = _drain(subscription)
+        assert subscription.dropped > 0
+        assert messages[-1] == {'t': 'end', 'g': 'g', 'winner': '2'}
+        view = SpectatorView()
+        for message in messages:
+            assert view.apply(message)
+        assert view.ended and view.boards['1'].view == log.board.view
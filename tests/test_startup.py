@@ -0,0 +1,7 @@
+from src.cli import IMPORT_BUDGET_MS, startup_report
+
+
+def test_startup_modules_import_within_budget():
+    # Same gate as `python -m src bench`: median import time of each module, no pygame/numpy/tkinter
+    report = startup_report(1, IMPORT_BUDGET_MS)
+    assert report['failures'] == [], report['import_ms']
@@ -0,0 +1,68 @@
+import random
+
+from src.board import Board
+from src.sync import BoardEventLog, BoardMirror
+from src.training import random_fleet_board
+
+
+def _played_log(shots=12, checksum_interval=4, seed=3):
+    """Event log of a random fleet after `shots` random shots, with the view after each shot"""
+    rng = random.Random(seed)
+    log = BoardEventLog(random_fleet_board(rng), checksum_interval)
+    cells = [(row, col) for row in range(10) for col in range(10)]
+    rng.shuffle(cells)
+    views = [[row[:] for row in log.board.view]]
+    for row, col in cells[:shots]:
+        log.attack(row, col)
+        views.append([line[:] for line in log.board.view])
+    return log, views
+
+
+def test_mirror_follows_the_log():
+    log, views = _played_log()
+    mirror = BoardMirror(Board())
+    assert all(mirror.apply(event) for event in log.events)
+    assert mirror.seq == log.seq
+    assert mirror.board.view == views[-1]
+
+
+def test_mirror_rolls_back_on_checksum_mismatch():
+    log, views = _played_log()
+    mirror = BoardMirror(Board())
+    events = [dict(event) for event in log.events]
+    assert 'v' in events[3] and 'v' in events[7]
+    # Event 6 lies about its result, the checksum carried by event 8 exposes it
+    events[5]['hit'] = 1 - events[5]['hit']
+    for event in events[:7]:
+        assert mirror.apply(event)
+    assert not mirror.apply(events[7])
+    assert mirror.desynced
+    assert mirror.seq == 4
+    assert mirror.board.view == views[4]
+
+    assert mirror.apply_sync(log.sync_message(mirror.seq))
+    assert not mirror.desynced
+    assert mirror.seq == log.seq
+    assert mirror.board.view == views[-1]
+
+
+def test_mirror_detects_missing_events():
+    log, views = _played_log()
+    mirror = BoardMirror(Board())
+    assert mirror.apply(log.events[0])
+    assert not mirror.apply(log.events[2])
+    assert mirror.desynced
+    assert mirror.seq == 1
+
+    assert mirror.apply_sync(log.sync_message(mirror.seq))
+    assert mirror.board.view == views[-1]
+
+
+def test_unknown_seq_gets_a_snapshot():
+    log, views = _played_log()
+    mirror = BoardMirror(Board())
+    message = log.sync_message(log.seq + 5)
+    assert 'snap' in message
+    assert mirror.apply_sync(message)
+    assert mirror.seq == log.seq
+    assert mirror.board.view == views[-1]